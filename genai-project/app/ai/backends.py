@@ -0,0 +1,139 @@
+import logging
+from typing import Optional
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+
+# auto     — как раньше: device_map="auto", dtype="auto" (GPU, если он есть).
+# cpu      — CPU, float32.
+# cpu-int8 — CPU, динамическое int8-квантование весов nn.Linear (torch.ao).
+# onnx     — ONNX Runtime через optimum (экспорт модели при первой загрузке).
+EXTRACTOR_BACKENDS = ("auto", "cpu", "cpu-int8", "onnx")
+
+
+def build_pipeline(
+    model_name: str,
+    backend: str = "auto",
+    num_threads: Optional[int] = None,
+    logger: logging.Logger = None,
+    *args,
+    **kwargs,
+):
+    """
+    Создаёт text-generation pipeline экстрактора для выбранного бэкенда.
+
+    Все бэкенды отдают обычный transformers.Pipeline, поэтому ограничение
+    вывода через prefix_allowed_tokens_fn (lm-format-enforcer) работает
+    одинаково: оно применяется к логитам на каждом шаге generate.
+
+    Parameters
+    ----------
+    model_name : str
+        Имя или путь модели (Hugging Face).
+    backend : str
+        Один из EXTRACTOR_BACKENDS.
+    num_threads : Optional[int]
+        Число потоков torch для CPU-бэкендов. None — значение по умолчанию.
+    logger : logging.Logger, optional
+        Логгер для сообщений о загрузке.
+
+    Returns
+    -------
+    transformers.Pipeline
+        Готовый pipeline генерации текста.
+
+    Raises
+    ------
+    ValueError
+        Если бэкенд неизвестен.
+    ImportError
+        Если для backend="onnx" не установлен optimum[onnxruntime].
+    """
+    if backend not in EXTRACTOR_BACKENDS:
+        raise ValueError(
+            f"Неизвестный бэкенд экстрактора: {backend}. Допустимые: {', '.join(EXTRACTOR_BACKENDS)}"
+        )
+
+    if backend == "auto":
+        return pipeline(
+            "text-generation",
+            model=model_name,
+            device_map="auto",
+            dtype="auto",
+            *args,
+            **kwargs,
+        )
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    if backend == "cpu":
+        return pipeline(
+            "text-generation",
+            model=model_name,
+            device="cpu",
+            dtype=torch.float32,
+            *args,
+            **kwargs,
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "cpu-int8":
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        model.eval()
+        # Веса линейных слоёв хранятся в int8, активации квантуются на лету;
+        # эмбеддинги и нормализации остаются во float32. inplace=True — без
+        # копии float32-модели, иначе пик памяти при загрузке удваивается.
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        if logger:
+            logger.info("Extractor model quantized to int8 (dynamic, nn.Linear).")
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as e:
+            raise ImportError(
+                "Для бэкенда onnx нужен пакет optimum[onnxruntime]"
+            ) from e
+
+        model = ORTModelForCausalLM.from_pretrained(model_name, export=True)
+        if logger:
+            logger.info("Extractor model exported to ONNX Runtime.")
+
+    return pipeline(
+        "text-generation", model=model, tokenizer=tokenizer, device="cpu", *args, **kwargs
+    )
+
+
+def build_draft_model(model_name: str, backend: str, target_model, logger: logging.Logger = None):
+    """
+    Загружает модель-черновик для assisted generation.
+
+    Черновик должен использовать тот же токенизатор, что и основная модель:
+    его токены проверяются основной моделью и ограничиваются той же
+    prefix_allowed_tokens_fn. Загружается на то же устройство и в том же dtype;
+    для cpu-int8 квантуется так же, как основная.
+
+    Raises
+    ------
+    ValueError
+        Для бэкенда onnx (assisted generation требует torch-модель).
+    """
+    if backend == "onnx":
+        raise ValueError("Модель-черновик не поддерживается для бэкенда onnx")
+
+    if backend == "cpu-int8":
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    else:
+        model = AutoModelForCausalLM.from_pretrained(model_name, dtype=target_model.dtype)
+        model = model.to(target_model.device)
+
+    model.eval()
+    if logger:
+        logger.info(f"Draft model {model_name} loaded for assisted generation.")
+    return model
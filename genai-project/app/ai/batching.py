@@ -0,0 +1,246 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from time import perf_counter
+from typing import Any, Callable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.stats import percentile_ms
+
+
+class ExtractionBatcher:
+    """
+    Планировщик динамических микробатчей для LLM-экстракции.
+
+    Запросы /api/analyze не вызывают экстрактор напрямую, а ставят текст резюме
+    в очередь и ждут свой future. Фоновая задача забирает первый запрос, затем
+    в течение window_ms (или пока не наберётся max_batch_size) дособирает
+    остальные и выполняет их одним пакетным вызовом extractor.extract_batch.
+    gpu_lock удерживается на время всего батча, а не каждого резюме.
+
+    Attributes
+    ----------
+    max_batch_size : int
+        Максимальное число резюме в одном батче. 1 — без батчинга.
+    window_ms : float
+        Сколько миллисекунд ждать дополнительные запросы после первого.
+    executor : Optional[PipelineStage]
+        Этап LLM конвейера анализа (app.api.pipeline), в потоках которого идёт
+        генерация. None — общий пул run_in_threadpool.
+
+    Methods
+    -------
+    submit(text)
+        Ставит резюме в очередь и возвращает (full_name, raw_summary, vector).
+    start()
+        Запускает фоновую задачу (вызывается автоматически при первом submit).
+    stop()
+        Останавливает задачу; ожидающие запросы получают ошибку.
+    run_blocking(fn, *args, **kwargs)
+        Выполняет блокирующий вызов модели в потоке executor.
+    stats()
+        Метрики очереди и размеров батчей для /api/admin/stats.
+    """
+
+    def __init__(
+        self,
+        extractor: Any,
+        gpu_lock: Optional[asyncio.Lock] = None,
+        max_batch_size: int = 4,
+        window_ms: float = 25.0,
+        logger: Optional[logging.Logger] = None,
+        latency_window: int = 1024,
+        executor: Optional[Any] = None,
+    ):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size должен быть положительным")
+
+        self.extractor = extractor
+        self.gpu_lock = gpu_lock
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self._logger = logger
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Батч, который собирается или выполняется (его futures уже не в очереди).
+        self._current_batch: list = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.batch_sizes: Counter = Counter()
+        # Последние значения для перцентилей: ожидание в очереди и полное время запроса.
+        self._queue_waits = deque(maxlen=latency_window)
+        self._latencies = deque(maxlen=latency_window)
+
+    def start(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            return
+
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+        pending = list(self._current_batch)
+        self._current_batch = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Экстрактор остановлен"))
+
+        self._worker = None
+
+    async def run_blocking(self, fn: Callable, *args, **kwargs):
+        if self.executor is not None:
+            return await self.executor.run(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    async def submit(self, text: str, **kwargs):
+        """
+        Экстракция одного резюме. Запрос с kwargs для экстрактора (например,
+        prefill=PromptPrefill) выполняется отдельно, без батча, под gpu_lock.
+        """
+        if kwargs:
+            return await self._submit_alone(text, kwargs)
+
+        self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        started = perf_counter()
+
+        self.submitted += 1
+        self._queue.put_nowait((text, future, started))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        try:
+            return await future
+        finally:
+            self._latencies.append(perf_counter() - started)
+
+    async def _submit_alone(self, text: str, kwargs: dict):
+        started = perf_counter()
+        self.submitted += 1
+
+        try:
+            async with self.gpu_lock or asyncio.Lock():
+                self._queue_waits.append(perf_counter() - started)
+                result = await self.run_blocking(self.extractor, text, **kwargs)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._latencies.append(perf_counter() - started)
+
+        self.completed += 1
+        return result
+
+    async def _collect(self) -> list:
+        batch = self._current_batch = [await self._queue.get()]
+        deadline = perf_counter() + self.window_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - perf_counter()
+
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+
+            # Запросы, отменённые клиентом, пока они ждали в очереди, не тратят GPU.
+            batch = self._current_batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            now = perf_counter()
+            for _, _, started in batch:
+                self._queue_waits.append(now - started)
+
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+
+            try:
+                if self.gpu_lock:
+                    async with self.gpu_lock:
+                        results = await self.run_blocking(self._extract, [text for text, _, _ in batch])
+                else:
+                    results = await self.run_blocking(self._extract, [text for text, _, _ in batch])
+
+            except Exception as e:
+                if self._logger:
+                    self._logger.error(f"Extraction batch of {len(batch)} failed: {e}")
+                results = [e] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+
+                if isinstance(result, Exception):
+                    self.failed += 1
+                    future.set_exception(result)
+                else:
+                    self.completed += 1
+                    future.set_result(result)
+
+            self._current_batch = []
+
+    def _extract(self, texts: List[str]) -> list:
+        extract_batch: Optional[Callable] = getattr(self.extractor, "extract_batch", None)
+
+        if extract_batch is not None:
+            return extract_batch(texts)
+
+        # Экстрактор без пакетного режима: по одному, ошибки остаются у своего запроса.
+        results = []
+        for text in texts:
+            try:
+                results.append(self.extractor(text))
+            except Exception as e:
+                results.append(e)
+
+        return results
+
+    def stats(self) -> dict:
+        total = sum(size * count for size, count in self.batch_sizes.items())
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window_ms,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "mean_batch_size": total / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "queue_wait_p50_ms": percentile_ms(self._queue_waits, 0.5),
+            "queue_wait_p99_ms": percentile_ms(self._queue_waits, 0.99),
+            "latency_p50_ms": percentile_ms(self._latencies, 0.5),
+            "latency_p99_ms": percentile_ms(self._latencies, 0.99),
+        }
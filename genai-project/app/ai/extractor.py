@@ -1,48 +1,268 @@
+import copy
+import json
+import math
+import threading
 import torch
 import logging
 
 # import
+from collections import deque
+from typing import Optional
 from time import time
-from transformers import pipeline
+from transformers import (
+    DynamicCache,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    AutoTokenizer,
+    TextIteratorStreamer,
+)
 from lmformatenforcer import JsonSchemaParser
+from lmformatenforcer.jsonschemaparser import ObjectParsingStage
 from lmformatenforcer.integrations.transformers import (
     build_transformers_prefix_allowed_tokens_fn,
 )
 from app.core.schemas import CandidateSummary
+from app.ai.prompts import SYSTEM_PROMPT_EXTRACT
+from app.ai.backends import build_draft_model, build_pipeline
 from colorama import init
 
 init(autoreset=True)
 
-SYSTEM_PROMPT_EXTRACT = """
-Ты - HR-ассистент, помогающий с отбором кандидатов на работу.
-Твоя задача - анализировать резюме и сопроводительные письма,
-и на их основе составлять отчёт в формате json по модели CandidateSummary:
-```
-class ShiftPreference(IntEnum):
-    DAY_ONLY = 0    # Только дневные смены
-    NIGHT_ONLY = 1  # Только ночные смены
-    ANY = 2         # Готов работать в любое время
-
-class CandidateVector:
-    skills_verified_count: int
-    years_experience: float
-    commute_time_minutes: int
-    shift_preference: ShiftPreference 
-    salary_expectation: int
-    has_certifications: bool
-
-class CandidateSummary:
-    full_name: str    # ФИО кандидата
-    raw_summary: str  # Краткое резюме от LLM (<150 символов)
-    vector: CandidateVector
-```
-
-Если имя не указано, напиши "Не указано".
-Резюме "raw_summary" должно быть кратким!
-2-3 предложения, только важная информация.
-Строки текста пиши на русском языке.
-Не добавляй ничего лишнего, соблюдай синтаксис JSON.
-"""
+
+class StopOnEvent(StoppingCriteria):
+    """Останавливает генерацию, когда выставлен event (например, клиент отключился)."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full(
+            (input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device
+        )
+
+
+class JsonCompleteCriteria(StoppingCriteria):
+    """
+    Останавливает строку батча, как только в ней закрыт корневой JSON-объект.
+
+    Сгенерированный текст строки подаётся посимвольно в копию JsonSchemaParser.
+    Когда в стеке парсера остался только корневой объект в стадии END_OBJECT,
+    дальше enforcer разрешил бы лишь пробелы и EOS, поэтому генерацию можно
+    заканчивать сразу.
+
+    Результат зависит только от переданной последовательности: при assisted
+    generation критерий вызывается и для непроверенных токенов черновика,
+    поэтому состояния парсера хранятся для каждого префикса текста строки,
+    а при расхождении разбор продолжается с общего префикса.
+
+    Попутно считает сгенерированные токены каждой строки и причину остановки:
+    "json", "eos" или "budget" (строка не закончилась до max_new_tokens).
+
+    prompt_len (длина промпта с паддингом) нужно передать, если за шаг может
+    добавиться больше одного токена (assisted generation); иначе она
+    определяется при первом вызове.
+    """
+
+    def __init__(self, tokenizer, parser: JsonSchemaParser, prompt_len: int = None):
+        self.tokenizer = tokenizer
+        self.parser = parser
+        self.eos_token_ids = {tokenizer.eos_token_id, tokenizer.pad_token_id}
+        self.prompt_len = prompt_len
+        self.generated_tokens = []
+        self.stop_reasons = []
+        self._texts = []
+        self._states = []
+
+    def _is_complete(self, row: int, token_ids) -> bool:
+        text = self.tokenizer.decode(token_ids, skip_special_tokens=True)
+        # Незавершённый многобайтовый символ декодируется как U+FFFD — ждём следующий токен.
+        text = text.rstrip("\ufffd")
+
+        previous = self._texts[row]
+        common = 0
+        for old, new in zip(previous, text):
+            if old != new:
+                break
+            common += 1
+
+        # states[i] — парсер после первых i символов; None — вывод разошёлся со схемой.
+        states = self._states[row][: common + 1]
+        for char in text[common:]:
+            parser = states[-1]
+            if parser is not None:
+                try:
+                    parser = parser.add_character(char)
+                except Exception:
+                    parser = None
+            states.append(parser)
+
+        self._texts[row] = text
+        self._states[row] = states
+
+        stack = states[-1].object_stack if states[-1] is not None else []
+        return (
+            len(text) > 0
+            and len(stack) == 1
+            and getattr(stack[0], "current_stage", None) == ObjectParsingStage.END_OBJECT
+        )
+
+    def __call__(self, input_ids, scores, **kwargs):
+        batch_size = input_ids.shape[0]
+
+        if not self._states:
+            if self.prompt_len is None:
+                self.prompt_len = input_ids.shape[1] - 1
+            self._texts = [""] * batch_size
+            self._states = [[self.parser] for _ in range(batch_size)]
+            self.generated_tokens = [0] * batch_size
+            self.stop_reasons = ["budget"] * batch_size
+
+        done = []
+        for row in range(batch_size):
+            generated = input_ids[row, self.prompt_len :].tolist()
+
+            # Закончившиеся строки generate дополняет паддингом: считаем токены до EOS.
+            end = next(
+                (i for i, token in enumerate(generated) if token in self.eos_token_ids),
+                None,
+            )
+            if end is not None:
+                generated = generated[:end]
+
+            if self._is_complete(row, generated):
+                reason = "json"
+            elif end is not None:
+                reason = "eos"
+                end += 1  # сам EOS сгенерирован моделью
+            else:
+                reason = "budget"
+
+            self.generated_tokens[row] = end if reason == "eos" else len(generated)
+            self.stop_reasons[row] = reason
+            done.append(reason != "budget")
+
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+class PromptPrefill:
+    """
+    Инкрементальный префилл KV-кэша промпта, пока текст резюме ещё поступает
+    (например, сегменты транскрибации).
+
+    feed(text) дописывает в кэш токены промпта для текущего текста, кроме
+    последних HOLDBACK: на границе сегментов токенизация хвоста может
+    измениться. Если начало токенизации всё же разошлось, кэш обрезается до
+    общего префикса. take(input_ids) перед генерацией обрезает кэш до общего
+    префикса с итоговым промптом, поэтому результат совпадает с обычной
+    генерацией.
+    """
+
+    HOLDBACK = 8
+
+    def __init__(self, model_ext: "extractor"):
+        self._ext = model_ext
+        self.ids = list(model_ext._prefix_ids)
+        self.cache = copy.deepcopy(model_ext._prefix_cache)
+        self.fed_tokens = 0
+
+    def feed(self, text: str) -> int:
+        """Префилл по тексту, полученному к этому моменту. Возвращает число новых токенов."""
+        tokenizer = self._ext._pipeline.tokenizer
+        ids = tokenizer(self._ext._prompt_prefix_text + text, add_special_tokens=False)["input_ids"]
+        stable = ids[: max(len(self._ext._prefix_ids), len(ids) - self.HOLDBACK)]
+
+        self._crop(stable)
+        new_ids = stable[len(self.ids) :]
+        if not new_ids:
+            return 0
+
+        model = self._ext._pipeline.model
+        with torch.no_grad():
+            model(
+                input_ids=torch.tensor([new_ids], device=model.device),
+                past_key_values=self.cache,
+                use_cache=True,
+            )
+        self.ids += new_ids
+        self.fed_tokens += len(new_ids)
+        return len(new_ids)
+
+    def _crop(self, ids: list) -> None:
+        common = 0
+        for cached, new in zip(self.ids, ids):
+            if cached != new:
+                break
+            common += 1
+
+        if common < len(self.ids):
+            self.cache.crop(common)
+            self.ids = self.ids[:common]
+
+    def take(self, input_ids: list) -> DynamicCache:
+        """Кэш для генерации по input_ids (хотя бы один токен остаётся непросчитанным)."""
+        self._crop(input_ids[: len(input_ids) - 1])
+        return self.cache
+
+
+def _schema_sample(schema: dict, defs: dict):
+    """Значение максимальной длины для JSON-схемы (строки заполняются до maxLength)."""
+    if "$ref" in schema:
+        return _schema_sample(defs[schema["$ref"].split("/")[-1]], defs)
+    if "enum" in schema:
+        return max(schema["enum"], key=lambda value: len(json.dumps(value)))
+    if "anyOf" in schema:
+        samples = [_schema_sample(option, defs) for option in schema["anyOf"]]
+        return max(samples, key=lambda value: len(json.dumps(value, ensure_ascii=False)))
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _schema_sample(value, defs)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [_schema_sample(schema.get("items", {}), defs)] * schema.get("maxItems", 3)
+    if kind == "string":
+        filler = "Опытный сварщик, стаж пять лет, готов к ночным сменам. "
+        length = schema.get("maxLength", 200)
+        return (filler * (length // len(filler) + 1))[:length]
+    if kind == "integer":
+        return 10**9
+    if kind == "number":
+        return 123456.789
+    if kind == "boolean":
+        return False
+    return None
+
+
+def schema_token_budget(tokenizer, schema: dict, margin: float = 1.5, slack: int = 16) -> int:
+    """
+    Бюджет max_new_tokens для ответа по JSON-схеме.
+
+    Строится «максимальный» экземпляр схемы (строки длиной maxLength, самые
+    длинные значения enum, крупные числа) в форматировании с отступами,
+    его длина в токенах умножается на margin и к ней добавляется slack.
+
+    Parameters
+    ----------
+    tokenizer : PreTrainedTokenizer
+        Токенизатор модели.
+    schema : dict
+        JSON-схема ответа (CandidateSummary.model_json_schema()).
+    margin : float
+        Запас на иное разбиение текста на токены.
+    slack : int
+        Запас на пробелы и переносы строк между полями.
+
+    Returns
+    -------
+    int
+        Максимальное число генерируемых токенов.
+    """
+    sample = _schema_sample(schema, schema.get("$defs", {}))
+    text = json.dumps(sample, ensure_ascii=False, indent=2)
+    tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    return math.ceil(tokens * margin) + slack
 
 
 class extractor:
@@ -57,63 +277,301 @@ class extractor:
         Парсер для обеспечения соответствия вывода заданной JSON-схеме.
     _prefix_func : callable
         Функция для ограничения токенов вывода в соответствии с JSON-схемой.
+    _prefix_cache : DynamicCache | None
+        KV-кэш неизменного префикса диалога (системный промпт в chat-шаблоне),
+        посчитанный один раз при инициализации.
+    reuse_prefix_cache : bool
+        Использовать ли _prefix_cache для одиночных запросов.
+    backend : str
+        Бэкенд инференса (см. app.ai.backends.EXTRACTOR_BACKENDS).
+    _assistant_model : PreTrainedModel | None
+        Малая модель-черновик с тем же токенизатором для assisted generation
+        (спекулятивного декодирования) одиночных запросов.
+    max_new_tokens : int
+        Бюджет генерации, выведенный из JSON-схемы CandidateSummary
+        (см. schema_token_budget).
 
     Methods
     -------
     __call__(prompt, *args, **kwds)
         Вызывает модель трансформера с ограничением вывода по схеме.
+    extract_batch(prompts, *args, **kwds)
+        То же для нескольких резюме одним пакетным вызовом модели.
+    stream(prompt, stop_event=None, **kwds)
+        То же с потоковой выдачей сгенерированного текста.
+    generation_stats()
+        Счётчики токенов и скорости генерации для /api/admin/stats.
 
     """
 
-    def __init__(self, model_name: str, logger: logging.Logger = None, *args, **kwargs):
+    def __init__(
+        self,
+        model_name: str,
+        logger: logging.Logger = None,
+        *args,
+        reuse_prefix_cache: bool = True,
+        backend: str = "auto",
+        num_threads: int = None,
+        draft_model_name: str = None,
+        **kwargs,
+    ):
         if logger:
-            logger.info(f"Initializing extractor with model {model_name}...")
-        self._pipeline = pipeline(
-            "text-generation",
-            model=model_name,
-            device_map="auto",
-            dtype="auto",
-            *args,
-            **kwargs,
+            logger.info(f"Initializing extractor with model {model_name} ({backend} backend)...")
+        self.backend = backend
+        self._pipeline = build_pipeline(
+            model_name, backend, num_threads, logger, *args, **kwargs
         )
+        # Для пакетной генерации decoder-only модели паддинг должен быть слева.
+        tokenizer = self._pipeline.tokenizer
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
         self._sum_parser = JsonSchemaParser(CandidateSummary.model_json_schema())
         self._sum_prefix_func = build_transformers_prefix_allowed_tokens_fn(
             self._pipeline.tokenizer, self._sum_parser
         )
-        if logger:
-            logger.info(f"Extractor initialized.")
+        # Отдельный экземпляр парсера для JsonCompleteCriteria: у enforcer'а
+        # свой контекст разбора, делить его между ними нельзя.
+        self._completion_parser = JsonSchemaParser(
+            CandidateSummary.model_json_schema(), config=self._sum_parser.config
+        )
+        self.max_new_tokens = schema_token_budget(
+            tokenizer, CandidateSummary.model_json_schema()
+        )
         self._logger = logger
+        self.reuse_prefix_cache = reuse_prefix_cache
+
+        self._generation_log = deque(maxlen=256)
+        self._totals = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "generated_tokens": 0,
+            "seconds": 0.0,
+            "draft_tokens": 0,
+            "accepted_draft_tokens": 0,
+        }
+        self._stop_reasons = {"json": 0, "eos": 0, "budget": 0}
+        self._stats_lock = threading.Lock()
+        # У ONNX Runtime свой формат KV-кэша, DynamicCache к нему не применим.
+        self._prefix_ids, self._prefix_cache = (
+            self._build_prefix_cache() if backend != "onnx" else (None, None)
+        )
+        self._assistant_model = None
+        self._forward_calls = {"target": 0, "draft": 0}
+        if draft_model_name:
+            self._load_draft_model(draft_model_name)
+
+        if logger:
+            logger.info(f"Extractor initialized (max_new_tokens={self.max_new_tokens}).")
+
+    def _load_draft_model(self, draft_model_name: str):
+        """Загружает черновик и считает проходы обеих моделей (для доли принятых токенов)."""
+        draft_tokenizer = AutoTokenizer.from_pretrained(draft_model_name)
+        if draft_tokenizer.get_vocab() != self._pipeline.tokenizer.get_vocab():
+            raise ValueError(
+                f"Модель-черновик {draft_model_name} использует другой токенизатор"
+            )
+
+        self._assistant_model = build_draft_model(
+            draft_model_name, self.backend, self._pipeline.model, self._logger
+        )
+
+        def counter(name):
+            def hook(module, inputs, output):
+                self._forward_calls[name] += 1
+
+            return hook
+
+        self._pipeline.model.register_forward_hook(counter("target"))
+        self._assistant_model.register_forward_hook(counter("draft"))
+
+    def _build_prefix_cache(self):
+        """
+        Предзаполняет KV-кэш для общей части всех промптов.
+
+        Общая часть — chat-шаблон до начала текста резюме (системный промпт
+        и открывающие токены сообщения пользователя). Если токенизация
+        полного промпта не начинается с токенов префикса, кэш не используется.
+        """
+        tokenizer = self._pipeline.tokenizer
+        marker = "\u0000RESUME\u0000"
+        rendered = tokenizer.apply_chat_template(
+            self._messages(marker), add_generation_prompt=True, tokenize=False
+        )
+        prefix_text = rendered[: rendered.index(marker)]
+        prefix_ids = tokenizer(prefix_text, add_special_tokens=False)["input_ids"]
+        self._prompt_prefix_text = prefix_text
+
+        probe_ids = self._prompt_ids("Проверка токенизации").tolist()[0]
+        if probe_ids[: len(prefix_ids)] != prefix_ids:
+            if self._logger:
+                self._logger.warning("Prompt prefix is not token-aligned, KV cache reuse disabled.")
+            return None, None
+
+        model = self._pipeline.model
+        with torch.no_grad():
+            cache = model(
+                input_ids=torch.tensor([prefix_ids], device=model.device),
+                past_key_values=DynamicCache(),
+                use_cache=True,
+            ).past_key_values
 
-    def __call__(self, prompt, *args, **kwds):
-        tm = time()
         if self._logger:
-            self._logger.info("Starting extraction process.")
-        sum_json_str = self._pipeline(
-            [
-                [
-                    {"role": "system", "content": SYSTEM_PROMPT_EXTRACT},
-                    {"role": "user", "content": prompt + " /no_think"},
-                ]
-            ],
-            *args,
-            max_new_tokens=2048,
+            self._logger.info(f"Prompt prefix cached ({len(prefix_ids)} tokens).")
+        return prefix_ids, cache
+
+    def _messages(self, prompt: str) -> list:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT_EXTRACT},
+            {"role": "user", "content": prompt + " /no_think"},
+        ]
+
+    def _prompt_ids(self, prompt: str) -> torch.Tensor:
+        tokenizer = self._pipeline.tokenizer
+        text = tokenizer.apply_chat_template(
+            self._messages(prompt), add_generation_prompt=True, tokenize=False
+        )
+        return tokenizer(text, add_special_tokens=False, return_tensors="pt")["input_ids"]
+
+    def prefill_session(self) -> Optional[PromptPrefill]:
+        """
+        Сессия инкрементального префилла для _generate(..., prefill=...).
+        None, если KV-кэш префикса не используется (onnx, невыровненный префикс).
+        """
+        if not self.reuse_prefix_cache or self._prefix_cache is None:
+            return None
+        return PromptPrefill(self)
+
+    def count_tokens(self, text: str) -> int:
+        """Длина текста резюме в токенах модели (без промпта и чат-шаблона)."""
+        return len(self._pipeline.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _stopping_criteria(self, kwds: dict, prompt_len: int = None) -> JsonCompleteCriteria:
+        """Добавляет в kwds остановку по закрытию JSON (к уже переданным критериям)."""
+        criteria = JsonCompleteCriteria(
+            self._pipeline.tokenizer, self._completion_parser, prompt_len
+        )
+        kwds["stopping_criteria"] = StoppingCriteriaList(
+            [criteria, *kwds.get("stopping_criteria", [])]
+        )
+        return criteria
+
+    def _record(
+        self,
+        prompt_tokens: list,
+        criteria: JsonCompleteCriteria,
+        seconds: float,
+        draft: dict = None,
+    ):
+        """Запоминает счётчики токенов по каждому запросу генерации."""
+        with self._stats_lock:
+            for row, prompt_len in enumerate(prompt_tokens):
+                generated = criteria.generated_tokens[row] if criteria.generated_tokens else 0
+                reason = criteria.stop_reasons[row] if criteria.stop_reasons else "budget"
+                entry = {
+                    "prompt_tokens": prompt_len,
+                    "generated_tokens": generated,
+                    "seconds": seconds,
+                    "tokens_per_sec": generated / seconds if seconds > 0 else 0.0,
+                    "stop_reason": reason,
+                    "batch_size": len(prompt_tokens),
+                }
+                if draft is not None:
+                    # Каждый проход основной модели принимает совпавшие токены
+                    # черновика и добавляет один свой.
+                    accepted = max(0, generated - draft["target_steps"])
+                    entry["draft_tokens"] = draft["draft_tokens"]
+                    entry["accepted_draft_tokens"] = accepted
+                    self._totals["draft_tokens"] += draft["draft_tokens"]
+                    self._totals["accepted_draft_tokens"] += accepted
+
+                self._generation_log.append(entry)
+                self._totals["requests"] += 1
+                self._totals["prompt_tokens"] += prompt_len
+                self._totals["generated_tokens"] += generated
+                self._stop_reasons[reason] += 1
+
+                if self._logger:
+                    self._logger.info(
+                        f"Generation: {prompt_len} prompt tokens, {generated} generated "
+                        f"({entry['tokens_per_sec']:.1f} tok/s), stop: {reason}."
+                    )
+            self._totals["seconds"] += seconds
+
+    def _generate(self, prompt: str, *args, **kwds) -> str:
+        """
+        Генерация JSON-ответа для одного резюме.
+
+        Использует KV-кэш префикса, если он есть (или кэш из prefill —
+        PromptPrefill, уже просчитанный по тексту резюме), и модель-черновик
+        (assisted generation), если она задана. Без них и при позиционных
+        аргументах pipeline вызов идёт через pipeline.
+        """
+        tm = time()
+        max_new_tokens = kwds.pop("max_new_tokens", self.max_new_tokens)
+        prefill = kwds.pop("prefill", None)
+        use_prefix_cache = self.reuse_prefix_cache and self._prefix_cache is not None
+
+        if args or not (use_prefix_cache or self._assistant_model is not None):
+            criteria = self._stopping_criteria(kwds)
+            generated = self._pipeline(
+                [self._messages(prompt)],
+                *args,
+                max_new_tokens=max_new_tokens,
+                prefix_allowed_tokens_fn=self._sum_prefix_func,
+                repetition_penalty=1.15,
+                return_full_text=False,
+                **kwds,
+            )[-1]
+            self._record([self._prompt_ids(prompt).shape[1]], criteria, time() - tm)
+            return generated[0]["generated_text"]
+
+        model = self._pipeline.model
+        tokenizer = self._pipeline.tokenizer
+        input_ids = self._prompt_ids(prompt).to(model.device)
+        criteria = self._stopping_criteria(kwds, prompt_len=input_ids.shape[1])
+
+        if use_prefix_cache and prefill is not None:
+            # Кэш сессии используется один раз; префилл — только по непросчитанному хвосту.
+            kwds["past_key_values"] = prefill.take(input_ids[0].tolist())
+        elif use_prefix_cache:
+            # generate дописывает кэш, поэтому каждому запросу нужна своя копия;
+            # префилл проходит только по токенам после префикса.
+            kwds["past_key_values"] = copy.deepcopy(self._prefix_cache)
+
+        draft = None
+        if self._assistant_model is not None:
+            # Черновик предлагает несколько токенов, основная модель проверяет их
+            # за один проход; ограничение по схеме применяется к обеим моделям.
+            kwds["assistant_model"] = self._assistant_model
+            calls_before = dict(self._forward_calls)
+
+        output = model.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            max_new_tokens=max_new_tokens,
             prefix_allowed_tokens_fn=self._sum_prefix_func,
             repetition_penalty=1.15,
-            return_full_text=False,
+            pad_token_id=tokenizer.pad_token_id,
             **kwds,
-        )[-1]
-        sum_json_str = str.strip(sum_json_str[0]["generated_text"], "\n ")
+        )
+
+        if self._assistant_model is not None:
+            draft = {
+                "target_steps": self._forward_calls["target"] - calls_before["target"],
+                "draft_tokens": self._forward_calls["draft"] - calls_before["draft"],
+            }
+        self._record([input_ids.shape[1]], criteria, time() - tm, draft)
+        return tokenizer.decode(
+            output[0, input_ids.shape[1] :], skip_special_tokens=True
+        )
+
+    def _parse(self, generated_text: str):
+        sum_json_str = str.strip(generated_text, "\n ")
         sum_json_str = sum_json_str.replace("\t", "  ").replace("\n", " ")
-        if self._logger:
-            self._logger.info("LLM output received.")
 
         try:
             candidate_summary = CandidateSummary.model_validate_json(sum_json_str)
-            inference_time = time() - tm
-            if self._logger:
-                self._logger.info(
-                    f"LLM output successfully parsed as CandidateSummary JSON. (Took {inference_time:.1f} sec.)"
-                )
         except Exception as e:
             if self._logger:
                 self._logger.error(
@@ -126,6 +584,163 @@ class extractor:
             candidate_summary.vector,
         )
 
+    def __call__(self, prompt, *args, **kwds):
+        tm = time()
+        if self._logger:
+            self._logger.info("Starting extraction process.")
+        generated_text = self._generate(prompt, *args, **kwds)
+        if self._logger:
+            self._logger.info("LLM output received.")
+
+        result = self._parse(generated_text)
+        inference_time = time() - tm
+        if self._logger:
+            self._logger.info(
+                f"LLM output successfully parsed as CandidateSummary JSON. (Took {inference_time:.1f} sec.)"
+            )
+        return result
+
+    def stream(self, prompt: str, stop_event: threading.Event = None, **kwds):
+        """
+        Экстракция с потоковой выдачей текста через TextIteratorStreamer.
+
+        Генерация идёт в фоновом потоке, фрагменты JSON отдаются по мере
+        декодирования.
+
+        Parameters
+        ----------
+        prompt : str
+            Текст резюме.
+        stop_event : threading.Event, optional
+            Если выставлен, генерация прерывается на следующем токене.
+
+        Yields
+        ------
+        tuple
+            ("token", str) для каждого фрагмента текста и в конце
+            ("result", (full_name, raw_summary, vector)).
+        """
+        tm = time()
+        streamer = TextIteratorStreamer(
+            self._pipeline.tokenizer, skip_prompt=True, skip_special_tokens=True
+        )
+        if stop_event is not None:
+            kwds["stopping_criteria"] = StoppingCriteriaList([StopOnEvent(stop_event)])
+
+        errors = []
+
+        def generate():
+            try:
+                self._generate(prompt, streamer=streamer, **kwds)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+
+        chunks = []
+        for text in streamer:
+            chunks.append(text)
+            yield "token", text
+
+        thread.join()
+        if errors:
+            raise errors[0]
+        if stop_event is not None and stop_event.is_set():
+            raise RuntimeError("Генерация прервана")
+
+        result = self._parse("".join(chunks))
+        if self._logger:
+            self._logger.info(f"Streamed extraction finished. (Took {time() - tm:.1f} sec.)")
+        yield "result", result
+
+    def extract_batch(self, prompts: list[str], *args, **kwds) -> list:
+        """
+        Извлекает данные из нескольких резюме одним пакетным вызовом pipeline.
+
+        Промпты дополняются паддингом слева до общей длины и генерируются
+        вместе; ограничение по JSON-схеме применяется к каждой строке батча
+        отдельно. Батч из одного резюме идёт через _generate и использует
+        KV-кэш системного промпта и модель-черновик (при паддинге слева
+        позиции префикса у строк батча различаются, поэтому общий кэш к ним
+        не применим, а assisted generation в transformers работает только
+        с батчем из одной строки).
+
+        Returns
+        -------
+        list
+            Для каждого промпта кортеж (full_name, raw_summary, vector)
+            или исключение, если его вывод не разобрался. Ошибка одного
+            резюме не влияет на остальные.
+        """
+        if len(prompts) == 1 and not args:
+            try:
+                return [self(prompts[0], **kwds)]
+            except Exception as e:
+                return [e]
+
+        tm = time()
+        if self._logger:
+            self._logger.info(f"Starting batch extraction of {len(prompts)} resumes.")
+        criteria = self._stopping_criteria(kwds)
+        outputs = self._pipeline(
+            [self._messages(prompt) for prompt in prompts],
+            *args,
+            batch_size=len(prompts),
+            max_new_tokens=kwds.pop("max_new_tokens", self.max_new_tokens),
+            prefix_allowed_tokens_fn=self._sum_prefix_func,
+            repetition_penalty=1.15,
+            return_full_text=False,
+            **kwds,
+        )
+
+        self._record(
+            [self._prompt_ids(prompt).shape[1] for prompt in prompts], criteria, time() - tm
+        )
+
+        results = []
+        for generated in outputs:
+            try:
+                results.append(self._parse(generated[0]["generated_text"]))
+            except Exception as e:
+                results.append(e)
+
+        if self._logger:
+            self._logger.info(
+                f"Batch of {len(prompts)} extracted. (Took {time() - tm:.1f} sec.)"
+            )
+        return results
+
+
+    def generation_stats(self) -> dict:
+        """
+        Счётчики генерации для /api/admin/stats.
+
+        Returns
+        -------
+        dict
+            Суммарные токены промпта и вывода, средняя скорость (токенов/с),
+            причины остановки, доля принятых токенов черновика (если он задан)
+            и 16 последних запросов.
+        """
+        with self._stats_lock:
+            totals = dict(self._totals)
+            return {
+                "max_new_tokens": self.max_new_tokens,
+                **totals,
+                "tokens_per_sec": (
+                    totals["generated_tokens"] / totals["seconds"] if totals["seconds"] else 0.0
+                ),
+                "draft_acceptance_rate": (
+                    totals["accepted_draft_tokens"] / totals["draft_tokens"]
+                    if totals["draft_tokens"]
+                    else None
+                ),
+                "stop_reasons": dict(self._stop_reasons),
+                "recent": list(self._generation_log)[-16:],
+            }
+
 
 def get_vram_info(device_name: str):
     """
@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+from app.core.schemas import CandidateSummary
+
+SYSTEM_PROMPT_EXTRACT = """
+Ты - HR-ассистент, помогающий с отбором кандидатов на работу.
+Твоя задача - анализировать резюме и сопроводительные письма,
+и на их основе составлять отчёт в формате json по модели CandidateSummary:
+```
+class ShiftPreference(IntEnum):
+    DAY_ONLY = 0    # Только дневные смены
+    NIGHT_ONLY = 1  # Только ночные смены
+    ANY = 2         # Готов работать в любое время
+
+class CandidateVector:
+    skills_verified_count: int
+    years_experience: float
+    commute_time_minutes: int
+    shift_preference: ShiftPreference 
+    salary_expectation: int
+    has_certifications: bool
+
+class CandidateSummary:
+    full_name: str    # ФИО кандидата
+    raw_summary: str  # Краткое резюме от LLM (<150 символов)
+    vector: CandidateVector
+```
+
+Если имя не указано, напиши "Не указано".
+Резюме "raw_summary" должно быть кратким!
+2-3 предложения, только важная информация.
+Строки текста пиши на русском языке.
+Не добавляй ничего лишнего, соблюдай синтаксис JSON.
+"""
+
+
+def _prompt_version() -> str:
+    """
+    Версия промпта экстракции: хэш системного промпта и JSON-схемы ответа.
+
+    Меняется автоматически при любом изменении SYSTEM_PROMPT_EXTRACT или
+    CandidateSummary и служит ключом инвалидации кэша результатов.
+    """
+    payload = SYSTEM_PROMPT_EXTRACT + json.dumps(
+        CandidateSummary.model_json_schema(), sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+PROMPT_VERSION = _prompt_version()
@@ -0,0 +1,196 @@
+import re
+import threading
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Optional, Tuple
+
+from app.ai.batching import ExtractionBatcher
+from app.ai.rule_extractor import WORD_NUMBERS
+from app.core.schemas import CandidateVector
+
+# Оговорки и неоднозначности, на которых малая модель ошибается чаще:
+# диапазоны, приблизительные значения, самоисправления.
+HEDGE_PATTERN = re.compile(
+    r"\d\s*(?:-|–|—|до)\s*\d|\bпримерно\b|\bоколо\b|\bгде-то\b|\bнаверное\b|\bвроде\b"
+    r"|\bвернее\b|\bточнее\b|\bто есть\b|\bили\b|\bхотя\b|\bзато\b|\bно\b|\bесли\b"
+)
+# Строка длиннее — скорее свободный текст (интервью), чем поле анкеты.
+FREE_FORM_LINE_WORDS = 15
+
+
+def complexity_score(text: str) -> float:
+    """
+    Дешёвая оценка сложности резюме для малой модели, 0..1.
+
+    Половина — доля слов в «длинных» строках свободного текста (интервью,
+    рассказ о себе), половина — плотность оговорок (HEDGE_PATTERN) на 100 слов,
+    где 4 и больше дают максимум. Шаблонная анкета получает около 0.
+    """
+    lines = [line.split() for line in text.splitlines() if line.strip()]
+    words = sum(len(line) for line in lines)
+    if not words:
+        return 0.0
+
+    free_form = sum(len(line) for line in lines if len(line) > FREE_FORM_LINE_WORDS) / words
+    hedges = len(HEDGE_PATTERN.findall(text.lower())) * 100 / words
+    return 0.5 * free_form + 0.5 * min(1.0, hedges / 4)
+
+
+def _mentions_number(text: str, value: float) -> bool:
+    lowered = text.lower().replace("\u00a0", " ")
+    numbers = {
+        # "85 000" и "85" из "85 000" — оба варианта.
+        float(match.replace(" ", "").replace(",", "."))
+        for pattern in (r"\d[\d ]*\d(?:[.,]\d+)?", r"\d+(?:[.,]\d+)?")
+        for match in re.findall(pattern, lowered)
+    }
+    numbers |= {float(number) for word, number in WORD_NUMBERS.items() if re.search(rf"\b{word}\b", lowered)}
+    return any(abs(value - number) < 0.51 for number in numbers)
+
+
+def extraction_confidence(text: str, full_name: str, vector: CandidateVector) -> float:
+    """
+    Правдоподобие ответа LLM по исходному тексту, 0..1 (доля пройденных проверок).
+
+    Проверки: слова ФИО встречаются в тексте (по первым 4 буквам — с учётом
+    склонений); ожидаемая зарплата (или она же в тысячах) и стаж в годах
+    упоминаются в тексте числом или словом. Нулевые значения не проверяются:
+    «не указано» так же правдоподобно.
+    """
+    lowered = text.lower().replace("ё", "е")
+    checks = []
+
+    name_words = [word for word in re.findall(r"[а-яёa-z]+", full_name.lower().replace("ё", "е")) if len(word) > 1]
+    if name_words:
+        checks.append(all(word[:4] in lowered for word in name_words))
+
+    if vector.salary_expectation:
+        salary = vector.salary_expectation
+        checks.append(_mentions_number(text, salary) or _mentions_number(text, salary / 1000))
+
+    if vector.years_experience:
+        checks.append(_mentions_number(text, vector.years_experience))
+
+    return sum(checks) / len(checks) if checks else 1.0
+
+
+class ExtractionRouter:
+    """
+    Маршрутизатор LLM-экстракции между малой и большой моделью.
+
+    Короткие и простые резюме (не длиннее max_small_tokens токенов и со
+    complexity_score не выше max_small_complexity) идут в малую модель.
+    Если её ответ не прошёл валидацию схемы, она упала с ошибкой или
+    extraction_confidence ниже min_confidence, резюме повторно отправляется
+    в большую модель.
+    Остальные резюме сразу идут в большую.
+
+    У каждой модели свой ExtractionBatcher (обычно с общим gpu_lock).
+
+    Attributes
+    ----------
+    max_small_tokens : int
+        Максимальная длина резюме в токенах для малой модели.
+    max_small_complexity : float
+        Максимальная оценка сложности для малой модели.
+    min_confidence : float
+        Порог правдоподобия ответа малой модели; ниже — эскалация.
+
+    Methods
+    -------
+    submit(text)
+        Экстракция с выбором модели; возвращает (full_name, raw_summary, vector).
+    choose(text)
+        "small" или "large" и причина выбора.
+    stats()
+        Счётчики по моделям и причинам эскалации для /api/admin/stats.
+    """
+
+    def __init__(
+        self,
+        small: ExtractionBatcher,
+        large: ExtractionBatcher,
+        count_tokens: Callable[[str], int],
+        max_small_tokens: int = 512,
+        max_small_complexity: float = 0.5,
+        min_confidence: float = 0.75,
+    ):
+        self.batchers = {"small": small, "large": large}
+        self._count_tokens = count_tokens
+        self.max_small_tokens = max_small_tokens
+        self.max_small_complexity = max_small_complexity
+        self.min_confidence = min_confidence
+
+        self._lock = threading.Lock()
+        self.requests = {name: 0 for name in self.batchers}
+        self.accepted = {name: 0 for name in self.batchers}
+        self.seconds = {name: 0.0 for name in self.batchers}
+        self.routes: Counter = Counter()
+        self.escalations: Counter = Counter()
+
+    def choose(self, text: str) -> Tuple[str, str]:
+        if self._count_tokens(text) > self.max_small_tokens:
+            return "large", "long_input"
+        if complexity_score(text) > self.max_small_complexity:
+            return "large", "complex_input"
+        return "small", "simple_input"
+
+    async def _run(self, name: str, text: str):
+        started = perf_counter()
+        try:
+            return await self.batchers[name].submit(text)
+        finally:
+            with self._lock:
+                self.requests[name] += 1
+                self.seconds[name] += perf_counter() - started
+
+    def _accept(self, name: str) -> None:
+        with self._lock:
+            self.accepted[name] += 1
+
+    async def submit(self, text: str):
+        name, reason = self.choose(text)
+        with self._lock:
+            self.routes[reason] += 1
+
+        if name == "small":
+            escalation: Optional[str] = None
+            try:
+                full_name, raw_summary, vector = await self._run("small", text)
+            except ValueError:
+                # pydantic.ValidationError — ответ не прошёл схему CandidateSummary.
+                escalation = "validation_failed"
+            except Exception:
+                # Ошибка малой модели не должна ронять запрос, который выполнит большая.
+                escalation = "small_failed"
+            else:
+                if extraction_confidence(text, full_name, vector) >= self.min_confidence:
+                    self._accept("small")
+                    return full_name, raw_summary, vector
+                escalation = "low_confidence"
+
+            with self._lock:
+                self.escalations[escalation] += 1
+
+        result = await self._run("large", text)
+        self._accept("large")
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {
+                name: {
+                    "requests": self.requests[name],
+                    "accepted": self.accepted[name],
+                    "mean_latency_s": self.seconds[name] / self.requests[name] if self.requests[name] else None,
+                }
+                for name in self.batchers
+            }
+            return {
+                "max_small_tokens": self.max_small_tokens,
+                "max_small_complexity": self.max_small_complexity,
+                "min_confidence": self.min_confidence,
+                "models": models,
+                "routes": dict(self.routes),
+                "escalations": dict(self.escalations),
+            }
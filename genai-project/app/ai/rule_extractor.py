@@ -0,0 +1,402 @@
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.enums import ShiftPreference
+from app.core.schemas import RAW_SUMMARY_MAX_LENGTH, CandidateVector
+
+# Уверенность по умолчанию для значения из строки вида "Метка: значение",
+# разобранного целиком и без противоречий.
+LABELED_CONFIDENCE = 0.95
+# Значение разобрано, но неоднозначно (диапазон, несколько меток с разными значениями).
+AMBIGUOUS_CONFIDENCE = 0.5
+# Стаж больше — скорее календарный год ("с 2015 года"), чем число лет.
+MAX_YEARS_EXPERIENCE = 60
+
+NUMBER = r"\d+(?:[.,]\d+)?"
+NEGATION = r"(?:\bне\b|\bнет\b|\bбез\b|\bкроме\b)"
+# Приблизительное значение или граница: "около 5 лет", "больше 10 лет", "от 70 000".
+HEDGE = r"\b(?:около|примерно|приблизительно|почти|где-то|больше|более|свыше|меньше|менее|от)\b"
+# Не рубли: сумма попала бы в резюме как рубли.
+FOREIGN_CURRENCY = r"\$|€|\busd\b|\beur\b|евро|долл"
+LINE_PATTERN = re.compile(r"^\s*[-•*]?\s*([А-Яа-яЁёA-Za-z .()/]+?)\s*[:—–]\s*(.+?)\s*$")
+
+WORD_NUMBERS = {
+    "один": 1, "одного": 1, "полтора": 1.5, "полгода": 0.5, "два": 2, "двух": 2,
+    "три": 3, "трёх": 3, "трех": 3, "четыре": 4, "пять": 5, "шесть": 6,
+    "семь": 7, "восемь": 8, "девять": 9, "десять": 10,
+}
+
+
+class FieldValue(NamedTuple):
+    """Значение поля и уверенность в нём (0..1)."""
+
+    value: object
+    confidence: float
+
+
+class RuleExtraction(NamedTuple):
+    """
+    Результат правил: значения полей CandidateSummary и их уверенность.
+
+    Attributes
+    ----------
+    full_name : Optional[str]
+        ФИО, если найдено.
+    raw_summary : Optional[str]
+        Краткое резюме, собранное по шаблону из найденных полей.
+    vector : Optional[CandidateVector]
+        Вектор признаков, если найдены все поля.
+    confidence : float
+        Минимальная уверенность по всем полям (0, если какого-то нет).
+    field_confidence : Dict[str, float]
+        Уверенность по каждому полю.
+    """
+
+    full_name: Optional[str]
+    raw_summary: Optional[str]
+    vector: Optional[CandidateVector]
+    confidence: float
+    field_confidence: Dict[str, float]
+
+
+def _number(text: str) -> Optional[float]:
+    match = re.search(NUMBER, text)
+    if match:
+        return float(match.group().replace(",", "."))
+
+    for word in re.findall(r"[а-яё]+", text.lower()):
+        if word in WORD_NUMBERS:
+            return float(WORD_NUMBERS[word])
+    return None
+
+
+def _is_range(text: str) -> bool:
+    return bool(re.search(rf"{NUMBER}\s*(?:-|–|—|до)\s*{NUMBER}", text))
+
+
+def parse_years(text: str) -> Optional[FieldValue]:
+    """"5 лет", "3,5 года", "2 года 6 месяцев", "8 месяцев", "без опыта"."""
+    lowered = text.lower()
+    no_experience = re.search(r"\bнет\b|без опыта|отсутств", lowered)
+    if no_experience and _number(lowered) is None:
+        return FieldValue(0.0, LABELED_CONFIDENCE)
+
+    years = re.search(rf"({NUMBER}|[а-яё]+)\s*(?:год|года|лет|г\.)", lowered)
+    months = re.search(rf"({NUMBER})\s*(?:мес)", lowered)
+    if years is None and months is None:
+        value = _number(lowered)
+        if value is None or value > MAX_YEARS_EXPERIENCE:
+            return None
+        return FieldValue(value, AMBIGUOUS_CONFIDENCE)
+
+    value = _number(years.group(1)) if years else 0.0
+    if value is None or value > MAX_YEARS_EXPERIENCE:
+        return None
+    if months:
+        value += float(months.group(1).replace(",", ".")) / 12
+
+    # "нет опыта в сварке, 3 года стропальщиком": какой опыт считать — решает LLM;
+    # так же с датами: "с 2015 года", "5 лет (2018–2023)".
+    calendar = re.search(r"\bс\s+\d|\b(?:19|20)\d\d\b", lowered)
+    ambiguous = _is_range(lowered) or no_experience or calendar or re.search(HEDGE, lowered)
+    confidence = AMBIGUOUS_CONFIDENCE if ambiguous else LABELED_CONFIDENCE
+    return FieldValue(round(value, 2), confidence)
+
+
+def parse_minutes(text: str) -> Optional[FieldValue]:
+    """"40 минут", "1 час 20 минут", "1,5 часа", "2 ч"."""
+    lowered = text.lower()
+    hours = re.search(rf"({NUMBER}|[а-яё]+)\s*(?:час|ч\b)", lowered)
+    minutes = re.search(rf"({NUMBER})\s*(?:мин|м\b)", lowered)
+
+    if hours is None and minutes is None:
+        value = _number(lowered)
+        return None if value is None else FieldValue(int(value), AMBIGUOUS_CONFIDENCE)
+
+    total = 0.0
+    if hours:
+        hours_value = _number(hours.group(1))
+        if hours_value is None:
+            return None
+        total += hours_value * 60
+    if minutes:
+        total += float(minutes.group(1).replace(",", "."))
+
+    ambiguous = _is_range(lowered) or re.search(HEDGE, lowered)
+    confidence = AMBIGUOUS_CONFIDENCE if ambiguous else LABELED_CONFIDENCE
+    return FieldValue(int(round(total)), confidence)
+
+
+def _negated(cue: str, text: str) -> bool:
+    """Упоминание cue с отрицанием в той же части фразы: "ночные не рассматриваю", "без ночных"."""
+    return bool(re.search(rf"{NEGATION}[^,;]*{cue}|{cue}[^,;]*{NEGATION}", text))
+
+
+def parse_shift(text: str) -> Optional[FieldValue]:
+    """"любой", "2/2", "только дневные", "ночные не рассматриваю", "сменный"."""
+    lowered = text.lower().strip(" .!")
+    # "день/ночь" и "5/2" — готовые ответы, а не отдельные упоминания дня и ночи.
+    cues = re.sub(r"день\s*(?:/|и)\s*ночь|5\s*/\s*2", " ", lowered)
+    any_shift = bool(
+        re.search(r"любо|сменн|круглосуточ|\d\s*/\s*\d|^готов[аы]?$", cues)
+        or re.search(r"день\s*(?:/|и)\s*ночь", lowered)
+    )
+
+    day_cue, night_cue = r"(?:дневн|\bдень\b|пятидневк)", r"(?:ночн|\bночь\b)"
+    day = bool(re.search(day_cue, cues) or re.search(r"5\s*/\s*2", lowered))
+    night = bool(re.search(night_cue, cues))
+    day_negated, night_negated = day and _negated(day_cue, cues), night and _negated(night_cue, cues)
+    if day_negated and night_negated:
+        return None
+
+    # Отказ от ночных смен означает дневные, и наоборот.
+    day, night = (day and not day_negated) or night_negated, (night and not night_negated) or day_negated
+    restricted = day_negated or night_negated or bool(re.search(r"только|исключительно|лишь", cues))
+
+    if any_shift and day != night:
+        # "2/2, готов к ночным сменам" — согласие и на ночные; "2/2, только день" — противоречие.
+        value = ShiftPreference.DAY_ONLY if day else ShiftPreference.NIGHT_ONLY
+        if restricted or not re.search(r"готов\w*\s+(?:и\s+)?(?:к|на)\s", cues):
+            return FieldValue(value, AMBIGUOUS_CONFIDENCE)
+        return FieldValue(ShiftPreference.ANY, LABELED_CONFIDENCE)
+    if any_shift:
+        return FieldValue(ShiftPreference.ANY, LABELED_CONFIDENCE)
+    if day and night:
+        return FieldValue(ShiftPreference.ANY, AMBIGUOUS_CONFIDENCE)
+    if day:
+        return FieldValue(ShiftPreference.DAY_ONLY, LABELED_CONFIDENCE)
+    if night:
+        return FieldValue(ShiftPreference.NIGHT_ONLY, LABELED_CONFIDENCE)
+    return None
+
+
+def parse_salary(text: str) -> Optional[FieldValue]:
+    """"60 000 руб.", "60к", "60 тыс.", "1,5 млн"; "от 70 000", "$1500" — неоднозначно."""
+    lowered = text.lower().replace("\u00a0", " ")
+    match = re.search(r"\d[\d ]*(?:[.,]\d+)?", lowered)
+    if match is None:
+        return None
+
+    value = float(match.group().replace(" ", "").replace(",", "."))
+    millions = bool(re.search(r"\d\s*(?:млн|миллион)", lowered))
+    if millions:
+        value *= 1_000_000
+    elif re.search(r"\d\s*(?:к\b|k\b|тыс)", lowered):
+        value *= 1000
+
+    # Суммы в миллионах обычно годовые: период уточняет LLM.
+    ambiguous = (
+        millions
+        or _is_range(lowered.replace(" ", ""))
+        or re.search(HEDGE, lowered)
+        or re.search(FOREIGN_CURRENCY, lowered)
+    )
+    confidence = AMBIGUOUS_CONFIDENCE if ambiguous else LABELED_CONFIDENCE
+    return FieldValue(int(value), confidence)
+
+
+def parse_certifications(text: str) -> Optional[FieldValue]:
+    """"нет", "есть", "да" или перечень удостоверений."""
+    lowered = text.lower().strip(" .")
+    if re.fullmatch(r"нет|нету|не имею|отсутству\w*|-|—", lowered):
+        return FieldValue(False, LABELED_CONFIDENCE)
+    # "нет, но готов получить", "не имею действующих", "без просрочек" — решает LLM.
+    if re.search(rf"{NEGATION}|\bнету\b|отсутств", lowered):
+        return FieldValue(False, AMBIGUOUS_CONFIDENCE)
+    if "просроч" in lowered:
+        return FieldValue(False, LABELED_CONFIDENCE)
+    if lowered:
+        return FieldValue(True, LABELED_CONFIDENCE)
+    return None
+
+
+def parse_skills(text: str) -> Optional[FieldValue]:
+    """Число ("3") или перечень навыков через запятую/точку с запятой."""
+    stripped = text.strip(" .")
+    if re.fullmatch(r"\d+", stripped):
+        return FieldValue(int(stripped), LABELED_CONFIDENCE)
+    if re.fullmatch(r"нет|отсутствуют", stripped.lower()):
+        return FieldValue(0, LABELED_CONFIDENCE)
+
+    items = [item for item in re.split(r"[,;]", stripped) if item.strip()]
+    return FieldValue(len(items), LABELED_CONFIDENCE) if items else None
+
+
+def parse_name(text: str) -> Optional[FieldValue]:
+    words = text.split()
+    if 1 < len(words) <= 4 and all(re.fullmatch(r"[А-ЯЁA-Z][а-яёa-z.\-]*", word) for word in words):
+        return FieldValue(" ".join(words), LABELED_CONFIDENCE)
+    return FieldValue(text, AMBIGUOUS_CONFIDENCE) if text else None
+
+
+def parse_text(text: str) -> Optional[FieldValue]:
+    return FieldValue(text.strip(" ."), LABELED_CONFIDENCE) if text.strip(" .") else None
+
+
+# Поле -> (метки строк "Метка: значение", разборщик значения).
+FIELD_RULES: Dict[str, Tuple[Tuple[str, ...], Callable[[str], Optional[FieldValue]]]] = {
+    "full_name": (("фио", "ф.и.о.", "имя", "полное имя", "имя кандидата"), parse_name),
+    "position": (("должность", "желаемая должность", "профессия", "специальность", "вакансия"), parse_text),
+    "skills_verified_count": (
+        ("подтвержденные навыки", "подтверждённые навыки", "навыки", "ключевые навыки"),
+        parse_skills,
+    ),
+    "years_experience": (("опыт", "опыт работы", "стаж", "общий стаж", "стаж работы"), parse_years),
+    "commute_time_minutes": (
+        ("время в пути", "дорога", "дорога до работы", "время до работы", "дорога до места работы"),
+        parse_minutes,
+    ),
+    "shift_preference": (("график", "график работы", "смены", "предпочитаемый график", "желаемый график"), parse_shift),
+    "salary_expectation": (
+        ("зарплата", "ожидаемая зарплата", "желаемая зарплата", "зарплатные ожидания", "оклад", "доход"),
+        parse_salary,
+    ),
+    "has_certifications": (
+        ("сертификаты", "удостоверения", "допуски", "корочки", "сертификаты и допуски"),
+        parse_certifications,
+    ),
+}
+
+REQUIRED_FIELDS = ("full_name",) + tuple(CandidateVector.model_fields)
+
+_LABELS = {label: field for field, (labels, _) in FIELD_RULES.items() for label in labels}
+
+_SHIFT_TEXT = {
+    ShiftPreference.DAY_ONLY: "только дневные смены",
+    ShiftPreference.NIGHT_ONLY: "только ночные смены",
+    ShiftPreference.ANY: "любой график",
+}
+
+
+class RuleExtractor:
+    """
+    Детерминированный экстрактор для шаблонных резюме (строки "Метка: значение").
+
+    Каждое поле CandidateSummary ищется по набору меток и разбирается
+    регулярными выражениями; уверенность поля снижается для диапазонов,
+    противоречащих друг другу повторов и значений без единиц измерения.
+    Если все поля найдены с уверенностью не ниже min_confidence, LLM не нужна.
+
+    Attributes
+    ----------
+    min_confidence : float
+        Порог уверенности для быстрого пути.
+
+    Methods
+    -------
+    extract(text)
+        Разбор резюме: значения полей и их уверенность (RuleExtraction).
+    try_extract(text)
+        (full_name, raw_summary, vector) или None, если нужна LLM; считает попадания.
+    stats()
+        Доля быстрого пути и поля, из-за которых он не сработал.
+    """
+
+    def __init__(self, min_confidence: float = 0.9):
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.missing_fields: Counter = Counter()
+
+    def _fields(self, text: str) -> Dict[str, FieldValue]:
+        found: Dict[str, List[FieldValue]] = {}
+
+        for line in text.splitlines():
+            match = LINE_PATTERN.match(line)
+            if match is None:
+                continue
+
+            field = _LABELS.get(" ".join(match.group(1).lower().split()))
+            if field is None:
+                continue
+
+            parsed = FIELD_RULES[field][1](match.group(2))
+            if parsed is not None:
+                found.setdefault(field, []).append(parsed)
+
+        fields = {}
+        for field, values in found.items():
+            best = max(values, key=lambda item: item.confidence)
+            if len({item.value for item in values}) > 1:
+                best = FieldValue(best.value, min(best.confidence, AMBIGUOUS_CONFIDENCE))
+            fields[field] = best
+
+        return fields
+
+    @staticmethod
+    def _summary(fields: Dict[str, FieldValue]) -> str:
+        parts = []
+        if "years_experience" in fields:
+            parts.append(f"опыт {fields['years_experience'].value:g} г.")
+        if "commute_time_minutes" in fields:
+            parts.append(f"дорога {fields['commute_time_minutes'].value} мин")
+        if "shift_preference" in fields:
+            parts.append(_SHIFT_TEXT[fields["shift_preference"].value])
+        if "salary_expectation" in fields:
+            parts.append(f"ожидания {fields['salary_expectation'].value:,} руб.".replace(",", " "))
+        if "has_certifications" in fields:
+            parts.append("есть удостоверения" if fields["has_certifications"].value else "без удостоверений")
+
+        summary = "; ".join(parts)
+        if "position" in fields:
+            summary = f"{fields['position'].value}: {summary}"
+        summary = summary[:1].upper() + summary[1:] + "."
+        return summary[:RAW_SUMMARY_MAX_LENGTH]
+
+    def extract(self, text: str) -> RuleExtraction:
+        fields = self._fields(text)
+        field_confidence = {
+            field: fields[field].confidence if field in fields else 0.0
+            for field in REQUIRED_FIELDS
+        }
+
+        vector = None
+        if all(field in fields for field in CandidateVector.model_fields):
+            try:
+                vector = CandidateVector(
+                    **{field: fields[field].value for field in CandidateVector.model_fields}
+                )
+            except ValueError:
+                vector = None
+
+        full_name = fields["full_name"].value if "full_name" in fields else None
+
+        return RuleExtraction(
+            full_name=full_name,
+            raw_summary=self._summary(fields) if fields else None,
+            vector=vector,
+            confidence=min(field_confidence.values()) if vector is not None else 0.0,
+            field_confidence=field_confidence,
+        )
+
+    def try_extract(self, text: str) -> Optional[Tuple[str, str, CandidateVector]]:
+        result = self.extract(text)
+        hit = result.vector is not None and result.confidence >= self.min_confidence
+
+        with self._lock:
+            self.attempts += 1
+            if hit:
+                self.hits += 1
+            else:
+                self.missing_fields.update(
+                    field
+                    for field, confidence in result.field_confidence.items()
+                    if confidence < self.min_confidence
+                )
+
+        if not hit:
+            return None
+        return result.full_name, result.raw_summary, result.vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "min_confidence": self.min_confidence,
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+                "low_confidence_fields": dict(self.missing_fields.most_common()),
+            }
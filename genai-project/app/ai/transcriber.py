@@ -1,7 +1,19 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from time import perf_counter
+from bisect import bisect_right
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Tuple, Union
+
 import torch
 import numpy as np
 from transformers import pipeline
-from faster_whisper import WhisperModel
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.stats import percentile_ms
 
 device = "cuda:0" if torch.cuda.is_available() else "cpu"
 # device = "cpu"
@@ -11,7 +23,8 @@ dtype = torch.float16 if torch.cuda.is_available() else torch.float32
 
 class transcriber:
     def __init__(self, model_name: str, *args, **kwargs):
-        self._model = WhisperModel(model_name)
+        # kwargs — параметры WhisperModel: device, compute_type, cpu_threads, num_workers.
+        self._model = WhisperModel(model_name, *args, **kwargs)
         # self._pipeline = pipeline(
         #     "automatic-speech-recognition",
         #     model=model_name,
@@ -28,3 +41,325 @@ class transcriber:
 
 # "deepdml/faster-whisper-large-v3-turbo-ct2"
 # "medium"
+
+class TranscriptSegment(NamedTuple):
+    """Сегмент транскрипта: начало и конец в секундах от начала файла, текст."""
+
+    start: float
+    end: float
+    text: str
+
+
+SAMPLING_RATE = 16000
+# Окно декодирования Whisper; клипы батча не длиннее.
+CHUNK_SECONDS = 30.0
+
+
+def speech_windows(audio: np.ndarray, max_duration: float = CHUNK_SECONDS) -> List[Tuple[float, float]]:
+    """
+    Окна с речью (секунды) не длиннее max_duration.
+
+    Соседние фрагменты речи (Silero VAD) объединяются, пока окно от начала
+    первого до конца последнего укладывается в max_duration, — так батч
+    состоит из почти полных 30-секундных клипов, а не из коротких фраз.
+    """
+    stamps = get_speech_timestamps(
+        audio, VadOptions(max_speech_duration_s=max_duration, min_silence_duration_ms=160)
+    )
+    windows: List[List[float]] = []
+    for stamp in stamps:
+        start, end = stamp["start"] / SAMPLING_RATE, stamp["end"] / SAMPLING_RATE
+        if windows and end - windows[-1][0] <= max_duration:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+    return [(start, end) for start, end in windows]
+
+
+def transcribe_files_batched(
+    model: WhisperModel, paths: List[str], batch_size: int = 8, max_group_seconds: float = 1800.0, **kwargs
+) -> List[Tuple[List[TranscriptSegment], float]]:
+    """
+    Пакетная транскрибация нескольких файлов через BatchedInferencePipeline.
+
+    Аудио файлов склеивается в один массив, окна речи каждого файла
+    передаются как clip_timestamps, поэтому батчи заполняются клипами разных
+    файлов подряд. Сегменты возвращаются к своим файлам по смещению.
+    Файлы обрабатываются группами не длиннее max_group_seconds, чтобы не
+    держать в памяти весь день записей.
+
+    Returns
+    -------
+    List[Tuple[List[TranscriptSegment], float]]
+        Сегменты (время от начала файла; пусто, если речи нет) и длительность
+        в секундах для каждого файла в порядке paths.
+    """
+    pipeline = BatchedInferencePipeline(model=model)
+    segments: List[List[TranscriptSegment]] = [[] for _ in paths]
+    durations: List[float] = []
+
+    group: List[Tuple[int, np.ndarray]] = []
+    group_seconds = 0.0
+
+    def flush():
+        if not group:
+            return
+
+        offsets, clips, position = [], [], 0.0
+        for _, audio in group:
+            offsets.append(position)
+            clips += [{"start": position + start, "end": position + end} for start, end in speech_windows(audio)]
+            position += len(audio) / SAMPLING_RATE
+
+        if clips:
+            decoded, _ = pipeline.transcribe(
+                np.concatenate([audio for _, audio in group]),
+                clip_timestamps=clips,
+                batch_size=batch_size,
+                **kwargs,
+            )
+            for segment in decoded:
+                owner = bisect_right(offsets, segment.start) - 1
+                offset = offsets[owner]
+                segments[group[owner][0]].append(
+                    TranscriptSegment(segment.start - offset, segment.end - offset, segment.text)
+                )
+
+        group.clear()
+
+    for index, path in enumerate(paths):
+        audio = decode_audio(str(path), sampling_rate=SAMPLING_RATE)
+        duration = len(audio) / SAMPLING_RATE
+        durations.append(duration)
+        if group and group_seconds + duration > max_group_seconds:
+            flush()
+            group_seconds = 0.0
+        group.append((index, audio))
+        group_seconds += duration
+
+    flush()
+    return list(zip(segments, durations))
+
+
+class TranscriberPool:
+    """
+    Пул загруженных моделей Whisper, общий на процесс.
+
+    Модели создаются один раз (load() из lifespan), запросы берут свободный
+    экземпляр из пула и возвращают его после транскрибации. Одновременно
+    выполняется не больше pool_size транскрибаций, остальные ждут в очереди.
+    Память — pool_size копий весов; на CPU каждая использует cpu_threads
+    потоков, поэтому pool_size * cpu_threads не стоит делать больше числа ядер.
+
+    Attributes
+    ----------
+    model_size : str
+        Имя или путь модели faster-whisper ("medium", "large-v3", ...).
+    pool_size : int
+        Число экземпляров модели (максимум одновременных транскрибаций).
+    executor : Optional[PipelineStage]
+        Этап транскрибации конвейера анализа (app.api.pipeline), в потоках
+        которого идёт декодирование. None — общий пул потоков.
+
+    Methods
+    -------
+    load_models()
+        Создаёт pool_size моделей (синхронно, можно в пуле потоков).
+    add(models)
+        Делает модели доступными запросам; только в потоке цикла событий.
+    load()
+        load_models() и add() вместе — для кода без фоновой загрузки.
+    transcribe(file_path, **kwargs)
+        Текст аудиофайла; ждёт свободный экземпляр.
+    transcribe_stream(file_path, **kwargs)
+        То же, но сегменты отдаются по мере декодирования.
+    stats()
+        Метрики очереди и длительности для /api/admin/stats.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "medium",
+        device: str = "auto",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        num_workers: int = 1,
+        pool_size: int = 1,
+        vad_filter: bool = True,
+        logger: Optional[logging.Logger] = None,
+        latency_window: int = 1024,
+        executor: Optional[Any] = None,
+    ):
+        if pool_size <= 0:
+            raise ValueError("pool_size должен быть положительным")
+
+        self.model_size = model_size
+        self.pool_size = pool_size
+        self._model_kwargs = {
+            "device": device,
+            "compute_type": compute_type,
+            "cpu_threads": cpu_threads,
+            "num_workers": num_workers,
+        }
+        # VAD (Silero) вырезает паузы до декодирования: в интервью их много.
+        self.transcribe_kwargs = {"vad_filter": vad_filter}
+        self._logger = logger
+        self.executor = executor
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.busy_seconds = 0.0
+        self._queue_waits = deque(maxlen=latency_window)
+        self._latencies = deque(maxlen=latency_window)
+
+    def load_models(self) -> List[transcriber]:
+        models = [transcriber(self.model_size, **self._model_kwargs) for _ in range(self.pool_size)]
+
+        if self._logger:
+            self._logger.info(
+                f"Whisper {self.model_size} loaded: {self.pool_size} instance(s), {self._model_kwargs}."
+            )
+        return models
+
+    def add(self, models: List[transcriber]) -> None:
+        # asyncio.Queue не потокобезопасна: put_nowait из рабочего потока может
+        # не разбудить запрос, уже ждущий в _acquire().
+        for model in models:
+            self._idle.put_nowait(model)
+
+    def load(self) -> None:
+        self.add(self.load_models())
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        if self.executor is not None:
+            return await self.executor.run(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    async def _acquire(self) -> transcriber:
+        started = perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+        try:
+            model = await self._idle.get()
+        finally:
+            self.waiting -= 1
+
+        self._queue_waits.append(perf_counter() - started)
+        return model
+
+    async def transcribe_batch(
+        self, file_paths: List[str], batch_size: int = 8, timestamps: bool = False, **kwargs
+    ) -> List[Union[str, List[TranscriptSegment]]]:
+        """
+        Тексты нескольких файлов одним пакетным проходом (transcribe_files_batched)
+        на одном экземпляре пула. Для массовой загрузки: клипы разных файлов
+        декодируются вместе батчами по batch_size. С timestamps=True вместо
+        текста — список TranscriptSegment каждого файла.
+        """
+        started = perf_counter()
+        model = await self._acquire()
+        acquired = perf_counter()
+
+        try:
+            results = await self._run_blocking(
+                transcribe_files_batched, model._model, list(file_paths), batch_size, **kwargs
+            )
+        except Exception:
+            self.failed += len(file_paths)
+            raise
+        finally:
+            self._idle.put_nowait(model)
+            self._latencies.append(perf_counter() - started)
+
+        self.completed += len(file_paths)
+        self.busy_seconds += perf_counter() - acquired
+        self.audio_seconds += sum(duration for _, duration in results)
+        if timestamps:
+            return [segments for segments, _ in results]
+        return [" ".join(segment.text for segment in segments) for segments, _ in results]
+
+    async def transcribe_stream(
+        self, file_path: str, timestamps: bool = False, **kwargs
+    ) -> AsyncIterator[Union[str, TranscriptSegment]]:
+        """
+        Текст сегментов по мере декодирования (с timestamps=True — TranscriptSegment).
+
+        faster-whisper декодирует сегменты лениво; генератор перебирается в
+        отдельном потоке, пока экземпляр модели занят этим запросом. Если
+        потребитель закрыл поток раньше, декодирование останавливается на
+        следующем сегменте и экземпляр возвращается в пул.
+        """
+        started = perf_counter()
+        model = await self._acquire()
+        acquired = perf_counter()
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop_event = threading.Event()
+
+        def produce():
+            try:
+                segments, info = model(str(file_path), **{**self.transcribe_kwargs, **kwargs})
+                for segment in segments:
+                    if stop_event.is_set():
+                        return
+                    loop.call_soon_threadsafe(
+                        queue.put_nowait, ("segment", TranscriptSegment(segment.start, segment.end, segment.text))
+                    )
+                loop.call_soon_threadsafe(queue.put_nowait, ("done", info))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+
+        producer = asyncio.ensure_future(self._run_blocking(produce))
+        info = None
+
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == "error":
+                    raise payload
+                if kind == "done":
+                    info = payload
+                    break
+                yield payload if timestamps else payload.text
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            stop_event.set()
+            await producer
+            self._idle.put_nowait(model)
+            self._latencies.append(perf_counter() - started)
+
+            if info is not None:
+                self.completed += 1
+                self.busy_seconds += perf_counter() - acquired
+                self.audio_seconds += info.duration
+
+    async def transcribe(self, file_path: str, **kwargs) -> str:
+        return " ".join([text async for text in self.transcribe_stream(file_path, **kwargs)])
+
+    def stats(self) -> dict:
+        return {
+            "model_size": self.model_size,
+            **self._model_kwargs,
+            **self.transcribe_kwargs,
+            "pool_size": self.pool_size,
+            "idle": self._idle.qsize(),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "audio_seconds": self.audio_seconds,
+            # < 1 — быстрее реального времени.
+            "real_time_factor": self.busy_seconds / self.audio_seconds if self.audio_seconds else None,
+            "queue_wait_p50_ms": percentile_ms(self._queue_waits, 0.5),
+            "queue_wait_p99_ms": percentile_ms(self._queue_waits, 0.99),
+            "latency_p50_ms": percentile_ms(self._latencies, 0.5),
+            "latency_p99_ms": percentile_ms(self._latencies, 0.99),
+        }
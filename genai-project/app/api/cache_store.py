@@ -0,0 +1,226 @@
+import threading
+from time import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import Engine, func
+from sqlmodel import Session, delete, select, update
+
+from app.api.models_db import CacheEntryTable
+
+
+class PersistentCache:
+    """
+    Персистентный кэш поверх таблицы cache_entries (SQLite).
+
+    Переживает перезапуск процесса, в отличие от LRUCache из app.core.cache.
+    Записи одного пространства имён ограничены по числу и суммарному размеру;
+    при переполнении удаляются записи, которые дольше всего не читались.
+
+    Чтение не пишет в базу: время последнего обращения копится в памяти и
+    записывается одной транзакцией перед вытеснением (в put) или когда
+    накопится flush_every ключей. Так попадания в кэш не конкурируют за
+    блокировку записи SQLite с остальными запросами; при перезапуске
+    теряются только незаписанные обращения (порядок LRU, не значения).
+
+    Attributes
+    ----------
+    namespace : str
+        Имя кэша; разные кэши делят одну таблицу.
+    max_entries : Optional[int]
+        Максимальное число записей. None — без ограничения.
+    max_bytes : Optional[int]
+        Максимальный суммарный размер значений в байтах. None — без ограничения.
+    flush_every : int
+        Сколько прочитанных ключей копить в памяти до записи в базу.
+
+    Methods
+    -------
+    get(key)
+        Возвращает сохранённое значение или None.
+    put(key, value)
+        Сохраняет значение и при необходимости вытесняет старые записи.
+    flush()
+        Записывает накопленные обращения в базу.
+    delete(key)
+        Удаляет запись (например, если её не удалось разобрать).
+    clear()
+        Удаляет все записи пространства имён.
+    stats()
+        Счётчики и текущий размер для /api/admin/stats.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time,
+        flush_every: int = 256,
+    ):
+        self.engine = engine
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Ключ -> [время последнего чтения, число чтений] с прошлой записи в базу.
+        self._accesses: Dict[str, list] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def get(self, key: str) -> Optional[str]:
+        with Session(self.engine) as session:
+            entry = session.get(CacheEntryTable, (self.namespace, key))
+            value = None if entry is None else entry.value
+
+        if value is None:
+            self._count("misses")
+            return None
+
+        with self._lock:
+            access = self._accesses.setdefault(key, [0.0, 0])
+            access[0] = self._clock()
+            access[1] += 1
+            self.hits += 1
+            flush = len(self._accesses) >= self.flush_every
+
+        if flush:
+            self.flush()
+        return value
+
+    def flush(self) -> None:
+        with Session(self.engine) as session:
+            self._flush(session)
+
+    def _flush(self, session: Session) -> None:
+        with self._lock:
+            accesses, self._accesses = self._accesses, {}
+
+        if not accesses:
+            return
+
+        for key, (last_access, hits) in accesses.items():
+            session.exec(
+                update(CacheEntryTable)
+                .where(CacheEntryTable.namespace == self.namespace, CacheEntryTable.key == key)
+                .values(last_access=last_access, hits=CacheEntryTable.hits + hits)
+            )
+        session.commit()
+
+    def put(self, key: str, value: str) -> None:
+        now = self._clock()
+        with self._lock:
+            self._accesses.pop(key, None)
+
+        with Session(self.engine) as session:
+            session.merge(
+                CacheEntryTable(
+                    namespace=self.namespace,
+                    key=key,
+                    value=value,
+                    size_bytes=len(value.encode("utf-8")),
+                    created_at=now,
+                    last_access=now,
+                )
+            )
+            session.commit()
+
+            self._count("writes")
+            self._flush(session)
+            self._evict(session)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._accesses.pop(key, None)
+
+        with Session(self.engine) as session:
+            session.exec(
+                delete(CacheEntryTable).where(
+                    CacheEntryTable.namespace == self.namespace,
+                    CacheEntryTable.key == key,
+                )
+            )
+            session.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._accesses.clear()
+
+        with Session(self.engine) as session:
+            session.exec(
+                delete(CacheEntryTable).where(CacheEntryTable.namespace == self.namespace)
+            )
+            session.commit()
+
+    def _usage(self, session: Session) -> tuple[int, int]:
+        entries, size = session.exec(
+            select(func.count(), func.coalesce(func.sum(CacheEntryTable.size_bytes), 0)).where(
+                CacheEntryTable.namespace == self.namespace
+            )
+        ).one()
+        return int(entries), int(size)
+
+    def _evict(self, session: Session) -> None:
+        if self.max_entries is None and self.max_bytes is None:
+            return
+
+        entries, size = self._usage(session)
+        over_entries = self.max_entries is not None and entries > self.max_entries
+        over_bytes = self.max_bytes is not None and size > self.max_bytes
+
+        if not (over_entries or over_bytes):
+            return
+
+        # Кандидаты на вытеснение — от самых давно прочитанных.
+        oldest = session.exec(
+            select(CacheEntryTable.key, CacheEntryTable.size_bytes)
+            .where(CacheEntryTable.namespace == self.namespace)
+            .order_by(CacheEntryTable.last_access, CacheEntryTable.created_at)
+        )
+
+        evicted = []
+        for key, size_bytes in oldest:
+            if (self.max_entries is None or entries <= self.max_entries) and (
+                self.max_bytes is None or size <= self.max_bytes
+            ):
+                break
+            evicted.append(key)
+            entries -= 1
+            size -= size_bytes
+
+        session.exec(
+            delete(CacheEntryTable).where(
+                CacheEntryTable.namespace == self.namespace,
+                CacheEntryTable.key.in_(evicted),
+            )
+        )
+        session.commit()
+        self._count("evictions", len(evicted))
+
+    def stats(self) -> dict:
+        with Session(self.engine) as session:
+            entries, size = self._usage(session)
+
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -64,3 +64,39 @@ class CandidateTable(SQLModel, table=True):
     vec_shift_preference: int
     vec_salary_expectation: int
     vec_has_certifications: bool
+
+
+class CacheEntryTable(SQLModel, table=True):
+    """
+    Запись персистентного кэша с адресацией по содержимому.
+
+    Общая таблица для всех кэшей приложения: записи разных кэшей
+    разделены пространством имён (namespace).
+
+    Attributes
+    ----------
+    namespace : str
+        Имя кэша (например, "extraction").
+    key : str
+        Ключ записи (sha256 нормализованного входа и версии обработчика).
+    value : str
+        Сериализованный результат (JSON).
+    size_bytes : int
+        Размер value в байтах (для ограничения объёма кэша).
+    created_at : float
+        Unix-время записи.
+    last_access : float
+        Unix-время последнего чтения (для LRU-вытеснения).
+    hits : int
+        Сколько раз запись была прочитана.
+    """
+
+    __tablename__ = "cache_entries"
+
+    namespace: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    value: str
+    size_bytes: int
+    created_at: float
+    last_access: float = Field(index=True)
+    hits: int = 0
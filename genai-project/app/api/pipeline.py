@@ -0,0 +1,288 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.stats import percentile_ms
+
+IO = "io"
+TRANSCRIPTION = "transcription"
+LLM = "llm"
+PREDICT = "predict"
+
+
+class PipelineStage:
+    """
+    Этап конвейера анализа со своим пулом потоков фиксированного размера.
+
+    Работа этапа не делит потоки с другими этапами и с пулом run_in_threadpool:
+    долгая транскрибация не занимает потоки, нужные записи в БД, и наоборот.
+    Перед этапом — ограниченная очередь: одновременно принимается не больше
+    workers + queue_size задач, остальные вызывающие ждут (обратное давление
+    на предыдущий этап).
+
+    Attributes
+    ----------
+    name : str
+        Имя этапа в метриках.
+    workers : int
+        Число потоков этапа.
+    queue_size : int
+        Сколько задач может ждать свободный поток.
+
+    Methods
+    -------
+    run(fn, *args, **kwargs)
+        Выполняет fn в потоке этапа и возвращает результат.
+    stats()
+        Загрузка, очередь и время ожидания для /api/admin/stats.
+    shutdown()
+        Останавливает пул потоков.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, latency_window: int = 1024):
+        if workers <= 0:
+            raise ValueError("workers должен быть положительным")
+        if queue_size < 0:
+            raise ValueError("queue_size не может быть отрицательным")
+
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{name}")
+        self._slots = asyncio.Semaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._started_at = perf_counter()
+
+        self.blocked = 0
+        self.max_blocked = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._queue_waits = deque(maxlen=latency_window)
+
+    def _call(self, submitted: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        started = perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._queue_waits.append(started - submitted)
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.busy_seconds += perf_counter() - started
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        self.blocked += 1
+        self.max_blocked = max(self.max_blocked, self.blocked)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.blocked -= 1
+
+        try:
+            with self._lock:
+                self.queued += 1
+                self.max_queued = max(self.max_queued, self.queued)
+
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._call, perf_counter(), fn, args, kwargs
+            )
+            try:
+                result = await future
+            except Exception:
+                self.failed += 1
+                raise
+        finally:
+            self._slots.release()
+
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = perf_counter() - self._started_at
+            busy = self.busy_seconds
+            queue_waits = list(self._queue_waits)
+            queued, running = self.queued, self.running
+
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "running": running,
+            "queued": queued,
+            "max_queued": self.max_queued,
+            # Ждут места в очереди этапа (очередь заполнена).
+            "blocked": self.blocked,
+            "max_blocked": self.max_blocked,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": busy,
+            # Доля времени, когда потоки этапа заняты: ~1 — этап узкое место.
+            "utilisation": busy / (elapsed * self.workers) if elapsed > 0 else 0.0,
+            "queue_wait_p50_ms": percentile_ms(queue_waits, 0.5),
+            "queue_wait_p99_ms": percentile_ms(queue_waits, 0.99),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AnalysisPipeline:
+    """
+    Конвейер анализа кандидатов: этапы I/O, транскрибации, LLM и
+    ML-предсказания с записью в БД, у каждого свой пул потоков.
+
+    Запросы проходят этапы по очереди, но разные запросы находятся на разных
+    этапах одновременно: пока запрос N в LLM, запрос N+1 транскрибируется, а
+    N-1 пишется в БД. Размеры этапов подбираются по utilisation и
+    queue_wait_* из stats(): у узкого места загрузка около 1 и растущее
+    ожидание. Число запросов в конвейере ограничено max_in_flight; сверх
+    него admit() отвечает 503 с Retry-After.
+
+    Attributes
+    ----------
+    stages : Dict[str, PipelineStage]
+        Этапы по именам (IO, TRANSCRIPTION, LLM, PREDICT).
+    max_in_flight : int
+        Максимум запросов в конвейере одновременно.
+
+    Methods
+    -------
+    run(stage, fn, *args, **kwargs)
+        Выполняет fn на указанном этапе.
+    stage(name)
+        Этап по имени (передаётся в ExtractionBatcher и TranscriberPool).
+    admit(count=1)
+        Асинхронный контекст на время обработки запроса из count резюме.
+    reserve(count=1)
+        То же без контекста: возвращает функцию освобождения (для SSE, где
+        запрос живёт дольше обработчика маршрута).
+    stats()
+        Метрики этапов для /api/admin/stats.
+    shutdown()
+        Останавливает пулы потоков всех этапов.
+    """
+
+    def __init__(
+        self,
+        io_workers: int = 4,
+        transcription_workers: int = 1,
+        llm_workers: int = 1,
+        predict_workers: int = 2,
+        queue_size: int = 32,
+        max_in_flight: int = 64,
+        retry_after_seconds: int = 10,
+    ):
+        self.stages: Dict[str, PipelineStage] = {
+            name: PipelineStage(name, workers, queue_size)
+            for name, workers in (
+                (IO, io_workers),
+                (TRANSCRIPTION, transcription_workers),
+                (LLM, llm_workers),
+                (PREDICT, predict_workers),
+            )
+        }
+        self.max_in_flight = max_in_flight
+        self.retry_after_seconds = retry_after_seconds
+
+        self.in_flight = 0
+        self.max_seen_in_flight = 0
+        self.rejected = 0
+
+    def stage(self, name: str) -> PipelineStage:
+        return self.stages[name]
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        return await self.stages[stage].run(fn, *args, **kwargs)
+
+    def reserve(self, count: int = 1) -> Callable[[], None]:
+        """
+        Занимает count мест в конвейере (по одному на резюме).
+
+        Пакет больше max_in_flight принимается только в пустой конвейер,
+        иначе он не прошёл бы никогда.
+
+        Returns
+        -------
+        Callable[[], None]
+            Освобождает занятые места; повторный вызов ничего не делает.
+
+        Raises
+        ------
+        HTTPException (503)
+            Мест в конвейере не хватает.
+        """
+        if self.in_flight and self.in_flight + count > self.max_in_flight:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис перегружен, повторите запрос позже",
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+
+        self.in_flight += count
+        self.max_seen_in_flight = max(self.max_seen_in_flight, self.in_flight)
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight -= count
+
+        return release
+
+    @asynccontextmanager
+    async def admit(self, count: int = 1) -> AsyncIterator[None]:
+        """reserve(count) на время блока; 503, если мест не хватает."""
+        release = self.reserve(count)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_seen_in_flight": self.max_seen_in_flight,
+            "rejected": self.rejected,
+            "stages": {name: stage.stats() for name, stage in self.stages.items()},
+        }
+
+    def shutdown(self) -> None:
+        for stage in self.stages.values():
+            stage.shutdown()
+
+
+async def run_stage(pipeline: Optional[AnalysisPipeline], stage: str, fn: Callable, *args, **kwargs) -> Any:
+    """fn в потоке этапа конвейера; без конвейера — в общем пуле run_in_threadpool."""
+
+    if pipeline is None:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return await pipeline.run(stage, fn, *args, **kwargs)
+
+
+def admit(pipeline: Optional[AnalysisPipeline], count: int = 1):
+    """AnalysisPipeline.admit(count) или пустой контекст, если конвейера нет."""
+
+    return pipeline.admit(count) if pipeline is not None else nullcontext()
+
+
+def reserve(pipeline: Optional[AnalysisPipeline], count: int = 1) -> Callable[[], None]:
+    """AnalysisPipeline.reserve(count) или пустое освобождение, если конвейера нет."""
+
+    return pipeline.reserve(count) if pipeline is not None else lambda: None
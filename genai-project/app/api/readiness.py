@@ -0,0 +1,138 @@
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ComponentRegistry:
+    """
+    Реестр тяжёлых компонентов, загружаемых в фоне после старта сервера.
+
+    Lifespan не ждёт загрузки моделей: uvicorn сразу принимает запросы, а
+    маршруты, которым нужен ещё не готовый компонент, отвечают 503 с
+    заголовком Retry-After (см. require_components). Остальные маршруты
+    (история, статика дашборда, метрики) обслуживаются немедленно.
+
+    Attributes
+    ----------
+    retry_after_seconds : int
+        Значение Retry-After для компонентов, которые ещё загружаются.
+
+    Methods
+    -------
+    load(name, loader)
+        Выполняет loader в пуле потоков и отмечает компонент готовым или упавшим.
+    fail(name, error)
+        Отмечает упавшим компонент, который не будет загружаться.
+    is_ready(name)
+        Готов ли компонент.
+    ready()
+        Готовы ли все компоненты.
+    snapshot()
+        Состояние компонентов для /api/health/ready.
+    """
+
+    def __init__(self, names: Iterable[str], retry_after_seconds: int = 10):
+        self.retry_after_seconds = retry_after_seconds
+        self._lock = threading.Lock()
+        self._components: Dict[str, dict] = {
+            name: {"status": PENDING, "seconds": None, "error": None} for name in names
+        }
+
+    def _update(self, name: str, **fields) -> None:
+        with self._lock:
+            self._components[name].update(fields)
+
+    async def load(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Загружает компонент, не блокируя цикл событий.
+
+        Returns
+        -------
+        Any
+            Результат loader.
+
+        Raises
+        ------
+        Exception
+            Ошибка loader (компонент при этом помечается FAILED).
+        """
+        if name not in self._components:
+            raise KeyError(f"Неизвестный компонент: {name}")
+
+        self._update(name, status=LOADING, error=None)
+        started = perf_counter()
+
+        try:
+            result = await run_in_threadpool(loader)
+        except Exception as e:
+            self._update(name, status=FAILED, seconds=perf_counter() - started, error=str(e))
+            raise
+
+        self._update(name, status=READY, seconds=perf_counter() - started)
+        return result
+
+    def fail(self, name: str, error: str) -> None:
+        """Компонент не загружается (например, упала загрузка, от которой он зависит)."""
+        self._update(name, status=FAILED, error=error)
+
+    def status(self, name: str) -> str:
+        return self._components[name]["status"]
+
+    def is_ready(self, name: str) -> bool:
+        return self.status(name) == READY
+
+    def ready(self) -> bool:
+        return all(self.is_ready(name) for name in self._components)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: dict(state) for name, state in self._components.items()}
+
+
+def require_components(*names: str) -> Callable[[Request], None]:
+    """
+    Зависимость FastAPI: 503, пока указанные компоненты не готовы.
+
+    Для загружающихся компонентов ответ содержит Retry-After; для упавших —
+    нет, повтор без перезапуска сервиса не поможет.
+
+    Parameters
+    ----------
+    *names : str
+        Имена компонентов из app.state.components.
+
+    Returns
+    -------
+    Callable[[Request], None]
+        Функция для Depends(...) или dependencies=[...].
+    """
+
+    def dependency(request: Request) -> None:
+        components: Optional[ComponentRegistry] = getattr(request.app.state, "components", None)
+        if components is None:
+            return
+
+        failed = [name for name in names if components.status(name) == FAILED]
+        if failed:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Компоненты не загрузились: {', '.join(failed)}",
+            )
+
+        loading = [name for name in names if not components.is_ready(name)]
+        if loading:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Компоненты ещё загружаются: {', '.join(loading)}",
+                headers={"Retry-After": str(components.retry_after_seconds)},
+            )
+
+    return dependency
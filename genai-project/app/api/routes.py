@@ -1,20 +1,37 @@
+import json
+
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlmodel import Session
 from typing import List
 
 from app.api.database import get_session
-from app.api.services import process_candidate, get_all_candidates
-from app.core.schemas import CandidateResult
+from app.api.pipeline import reserve
+from app.api.readiness import FAILED, require_components
+from app.api.services import (
+    get_all_candidates,
+    process_candidate,
+    process_candidate_stream,
+    process_candidates_bulk,
+    save_upload_file,
+)
+from app.core.config import settings
+from app.core.schemas import BulkAnalyzeItem, CandidateResult
 
 # APIRouter позволяет вынести маршруты в отдельный файл, чтобы не захламлять main.py.
 router = APIRouter()
 
+# Анализу нужны обе модели; пока они грузятся в фоне, ответ — 503 с Retry-After.
+ANALYZE_COMPONENTS = [Depends(require_components("extractor", "predictor"))]
+
 
 @router.post(
     "/analyze",
     response_model=CandidateResult,
     status_code=status.HTTP_201_CREATED,
     summary="Анализ кандидата",
+    dependencies=ANALYZE_COMPONENTS,
 )
 async def analyze_candidate(
     request: Request,
@@ -47,15 +64,29 @@ async def analyze_candidate(
 
     Raises
     ------
+    HTTPException (503)
+        Модели ещё загружаются или конвейер анализа перегружен.
     HTTPException (500)
         Если произошла внутренняя ошибка сервера (ошибка записи файла, сбой БД, etc).
     """
     try:
-        model_ext = request.app.state.extractor
-        lock = request.app.state.gpu_lock
-        result = await process_candidate(file, session, model_ext, lock)
+        batcher = request.app.state.extraction_batcher
+        predictor = request.app.state.predictor
+        cache = request.app.state.extraction_cache
+        rules = request.app.state.rule_extractor
+        router = request.app.state.extraction_router
+        transcriber = request.app.state.transcriber
+        transcripts = request.app.state.transcript_cache
+        pipeline = request.app.state.pipeline
+        result = await process_candidate(
+            file, session, batcher, predictor, cache, rules, router, transcriber, transcripts, pipeline
+        )
         return result
 
+    except HTTPException:
+        # 400/503 из сервисов (например, Whisper ещё загружается) — как есть.
+        raise
+
     except Exception as e:
         # ======================= NOTE ==========================
         # скорее всего нужен логировщик (logger.error) в релизе.
@@ -67,6 +98,150 @@ async def analyze_candidate(
         )
 
 
+@router.post(
+    "/analyze/bulk",
+    response_model=List[BulkAnalyzeItem],
+    status_code=status.HTTP_201_CREATED,
+    summary="Массовый анализ кандидатов",
+    dependencies=ANALYZE_COMPONENTS,
+)
+async def analyze_candidates_bulk(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    session: Session = Depends(get_session),
+) -> List[BulkAnalyzeItem]:
+    """
+    Массовая загрузка резюме и записей интервью (например, за рабочий день).
+
+    Аудиофайлы транскрибируются одним пакетным проходом Whisper, резюме
+    экстрагируются параллельно. Ошибка отдельного файла попадает в его
+    элемент ответа и не прерывает обработку остальных.
+
+    Parameters
+    ----------
+    files : List[UploadFile]
+        Файлы резюме (аудио или текст), не больше BULK_MAX_FILES.
+    session : Session
+        Активная сессия базы данных.
+
+    Returns
+    -------
+    List[BulkAnalyzeItem]
+        Результат или ошибка для каждого файла в порядке загрузки.
+
+    Raises
+    ------
+    HTTPException (413)
+        Файлов больше BULK_MAX_FILES.
+    HTTPException (500)
+        Внутренняя ошибка сервера (ошибка записи файла, сбой пакетной обработки).
+    """
+    if len(files) > settings.BULK_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Не больше {settings.BULK_MAX_FILES} файлов за запрос",
+        )
+
+    try:
+        return await process_candidates_bulk(
+            files,
+            session,
+            request.app.state.extraction_batcher,
+            request.app.state.predictor,
+            request.app.state.extraction_cache,
+            request.app.state.rule_extractor,
+            request.app.state.extraction_router,
+            request.app.state.transcriber,
+            request.app.state.transcript_cache,
+            request.app.state.pipeline,
+        )
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        print(f"Error processing bulk upload: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal Server Error: {str(e)}",
+        )
+
+
+@router.post(
+    "/analyze/stream",
+    summary="Анализ кандидата с потоковым прогрессом",
+    dependencies=ANALYZE_COMPONENTS,
+)
+async def analyze_candidate_stream(
+    request: Request,
+    file: UploadFile = File(...),
+) -> StreamingResponse:
+    """
+    Потоковый вариант /analyze (Server-Sent Events).
+
+    Клиент получает события по мере выполнения этапов (чтение/транскрибация,
+    LLM-экстракция, ML-предсказание, запись в БД), фрагменты JSON, которые
+    генерирует LLM, и итоговый CandidateResult последним событием "result".
+    Ошибки приходят событием "error" (HTTP-статус к этому моменту уже 200),
+    поэтому перегрузка конвейера проверяется до начала стрима.
+
+    Parameters
+    ----------
+    file : UploadFile
+        Файл резюме (аудио или текст).
+
+    Returns
+    -------
+    StreamingResponse
+        Поток text/event-stream: строки "event: <тип>" и "data: <json>".
+
+    Raises
+    ------
+    HTTPException
+        503, если конвейер анализа перегружен.
+    """
+    release = reserve(request.app.state.pipeline)
+
+    try:
+        # UploadFile закрывается до начала стрима, поэтому файл сохраняется сразу.
+        file_path = await save_upload_file(file, request.app.state.pipeline)
+    except Exception as e:
+        release()
+        print(f"Error saving upload: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal Server Error: {str(e)}",
+        )
+
+    events = process_candidate_stream(
+        file_path,
+        request.app.state.extraction_batcher,
+        request.app.state.predictor,
+        request.app.state.extraction_cache,
+        request.app.state.rule_extractor,
+        request.app.state.transcriber,
+        request.app.state.transcript_cache,
+        request.app.state.pipeline,
+        request.app.state.extraction_router,
+    )
+
+    async def event_stream():
+        try:
+            async for event in events:
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"event: {event['event']}\ndata: {data}\n\n"
+        finally:
+            release()
+
+    # background освобождает место, если клиент отключился до начала стрима.
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release),
+    )
+
+
 @router.get(
     "/history", response_model=List[CandidateResult], summary="История анализов"
 )
@@ -99,3 +274,90 @@ def get_history(session: Session = Depends(get_session)) -> List[CandidateResult
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not fetch history",
         )
+
+
+@router.get("/admin/stats", summary="Служебные метрики")
+def get_admin_stats(request: Request) -> dict:
+    """
+    Эндпоинт для просмотра служебных метрик работающего процесса.
+
+    Нужен, чтобы подбирать размеры кэшей, окно батчинга и число потоков
+    этапов. Группы метрик:
+
+    - predictor_cache: попадания, промахи и вытеснения кэшей ML-предиктора;
+    - extraction_batcher, extraction_generation: очередь, батчи и задержки
+      LLM-экстракции, токены и причины остановки генерации;
+    - extraction_cache, transcript_cache: персистентные кэши;
+    - extraction_fast_path, extraction_routing: доля резюме, разобранных
+      правилами, и маршрутизация между малой и основной моделью;
+    - transcription: пул Whisper;
+    - pipeline: загрузка и очереди этапов конвейера анализа.
+
+    Returns
+    -------
+    dict
+        Метрики по компонентам приложения.
+    """
+    predictor = request.app.state.predictor.get()
+    extraction_cache = request.app.state.extraction_cache
+    rule_extractor = request.app.state.rule_extractor
+    batcher = request.app.state.extraction_batcher
+    generation_stats = getattr(batcher.extractor, "generation_stats", None)
+    router = request.app.state.extraction_router
+    transcriber = request.app.state.transcriber
+    transcript_cache = request.app.state.transcript_cache
+
+    return {
+        "predictor_cache": predictor.cache_stats() if predictor else None,
+        "extraction_batcher": request.app.state.extraction_batcher.stats(),
+        "extraction_cache": extraction_cache.stats() if extraction_cache else None,
+        "extraction_generation": generation_stats() if generation_stats else None,
+        "extraction_fast_path": rule_extractor.stats() if rule_extractor else None,
+        "extraction_routing": router.stats() if router else None,
+        "transcription": transcriber.stats() if transcriber else None,
+        "transcript_cache": transcript_cache.stats() if transcript_cache else None,
+        "pipeline": request.app.state.pipeline.stats(),
+    }
+
+
+@router.get("/health/live", summary="Проверка, что процесс жив")
+def health_live() -> dict:
+    """
+    Liveness-проба: процесс запущен и обслуживает запросы.
+
+    Не зависит от загрузки моделей, поэтому отвечает 200 сразу после старта.
+
+    Returns
+    -------
+    dict
+        {"status": "alive"}.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", summary="Готовность компонентов")
+def health_ready(request: Request) -> JSONResponse:
+    """
+    Readiness-проба: загружены ли ML-предиктор и LLM-экстрактор.
+
+    Returns
+    -------
+    JSONResponse
+        200, если все компоненты готовы, иначе 503 (с Retry-After, если
+        ни один не упал). Тело — {"ready": bool, "components": {имя: состояние}},
+        где состояние содержит status (pending/loading/ready/failed),
+        время загрузки в секундах и текст ошибки.
+    """
+    components = request.app.state.components
+    snapshot = components.snapshot()
+    ready = components.ready()
+
+    headers = {}
+    if not ready and all(state["status"] != FAILED for state in snapshot.values()):
+        headers["Retry-After"] = str(components.retry_after_seconds)
+
+    return JSONResponse(
+        {"ready": ready, "components": snapshot},
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers=headers,
+    )
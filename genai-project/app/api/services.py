@@ -1,22 +1,37 @@
-import asyncio
+from contextlib import aclosing
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import hashlib
+import threading
+import unicodedata
 import uuid
 import json
 
 from fastapi import UploadFile, HTTPException
-from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
 from app.core.config import settings
-from app.core.schemas import CandidateVector, CandidateResult
+from app.core.schemas import BulkAnalyzeItem, CandidateVector, CandidateResult, CandidateSummary
 from app.core.enums import ShiftPreference
 from app.api.models_db import CandidateTable
-from app.ai.extractor import extractor
-from app.ai.transcriber import transcriber
-
-
-async def save_upload_file(upload_file: UploadFile) -> Path:
+from app.api.database import engine
+from app.ai.batching import ExtractionBatcher
+from app.ai.prompts import PROMPT_VERSION
+from app.ai.routing import ExtractionRouter
+from app.ai.rule_extractor import RuleExtractor
+from app.api.cache_store import PersistentCache
+from app.api.pipeline import IO, PREDICT, AnalysisPipeline, admit, run_stage
+from app.ai.transcriber import TranscriberPool, TranscriptSegment
+from app.ml_legacy.predictor import SharedPredictor
+from app.ml_legacy.feature_vector import FeatureVector
+
+if TYPE_CHECKING:
+    # Экстрактор тянет transformers; в TESTING он не импортируется.
+    from app.ai.extractor import PromptPrefill
+
+
+async def save_upload_file(upload_file: UploadFile, pipeline: Optional[AnalysisPipeline] = None) -> Path:
     """
     Сохраняет загруженный файл на диск с уникальным именем.
 
@@ -26,6 +41,8 @@ async def save_upload_file(upload_file: UploadFile) -> Path:
         Объект файла от FastAPI. Содержит:
         - filename: оригинальное имя файла
         - file: поток байтов (file-like object)
+    pipeline : AnalysisPipeline, optional
+        Конвейер анализа; запись на диск идёт на его этапе I/O.
 
     Returns
     -------
@@ -44,67 +61,436 @@ async def save_upload_file(upload_file: UploadFile) -> Path:
     file_path.parent.mkdir(parents=True, exist_ok=True)
 
     content = await upload_file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    await run_stage(pipeline, IO, file_path.write_bytes, content)
 
     return file_path
 
 
-async def ai_extract(
-    file_path: Path, ext: extractor, gpu_lock: asyncio.Lock = None
-) -> Tuple[str, str, CandidateVector]:
-    """AI экстракция данных из резюме."""
+def normalize_resume_text(text: str) -> str:
+    """Нормализация текста резюме для ключа кэша: NFC, без лишних пробелов."""
+
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def extraction_cache_key(resume_text: str, model_name: str) -> str:
+    """
+    Ключ кэша экстракции: sha256 от нормализованного текста, имени модели
+    и версии промпта (PROMPT_VERSION меняется вместе с промптом и схемой).
+    """
+
+    payload = "\0".join([model_name, PROMPT_VERSION, normalize_resume_text(resume_text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def extraction_model_name(router: Optional[ExtractionRouter] = None) -> str:
+    """
+    Имя для ключа кэша экстракции: основная модель или, если ответ даёт
+    router, обе его модели и пороги (от них зависит, какая модель ответит).
+    """
+
+    if router is None:
+        return settings.EXTRACTOR_MODEL_NAME
+
+    return "router:" + "/".join(
+        map(
+            str,
+            (
+                settings.EXTRACTOR_SMALL_MODEL_NAME,
+                settings.EXTRACTOR_MODEL_NAME,
+                router.max_small_tokens,
+                router.max_small_complexity,
+                router.min_confidence,
+            ),
+        )
+    )
+
+
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+
+
+def audio_fingerprint(file_path: Path, chunk_size: int = 1 << 20) -> str:
+    """sha256 от байтов аудиофайла: повторная загрузка той же записи даёт тот же отпечаток."""
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def transcript_cache_key(fingerprint: str) -> str:
+    """
+    Ключ кэша транскриптов: отпечаток аудио, модель Whisper и VAD
+    (от них зависит текст и разбиение на сегменты).
+    """
+
+    payload = "\0".join(
+        [fingerprint, settings.TRANSCRIBER_MODEL_SIZE, f"vad={settings.TRANSCRIBER_VAD_FILTER}"]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def join_segments(segments: list[TranscriptSegment]) -> str:
+    return " ".join(segment.text for segment in segments)
+
+
+def get_cached_transcript(
+    transcript_cache: Optional[PersistentCache], cache_key: str
+) -> Optional[list[TranscriptSegment]]:
+    """Сегменты транскрипта из кэша или None (кэш выключен, промах, битая запись)."""
+
+    if transcript_cache is None:
+        return None
+
+    cached = transcript_cache.get(cache_key)
+
+    if cached is None:
+        return None
+
+    try:
+        return [TranscriptSegment(*segment) for segment in json.loads(cached)["segments"]]
+    except (ValueError, KeyError, TypeError):
+        transcript_cache.delete(cache_key)
+        return None
+
+
+def store_transcript(
+    transcript_cache: Optional[PersistentCache], cache_key: str, segments: list[TranscriptSegment]
+) -> None:
+    if transcript_cache is None:
+        return
+
+    transcript_cache.put(
+        cache_key,
+        json.dumps(
+            {"text": join_segments(segments), "segments": [list(segment) for segment in segments]},
+            ensure_ascii=False,
+        ),
+    )
+
+
+
+class TranscriptPrefill:
+    """
+    Префилл промпта экстрактора по мере транскрибации аудио.
+
+    Вызывается с текстом, накопленным к очередному сегменту, и, если
+    экстрактор свободен, дописывает его токены в KV-кэш (PromptPrefill) в
+    фоне, пока Whisper декодирует следующие сегменты. Одновременно идёт не
+    больше одного префилла; пропущенный текст догоняется следующим вызовом
+    или при генерации.
+    """
+
+    def __init__(self, batcher: ExtractionBatcher):
+        # Сессия (копия KV-кэша префикса) создаётся при первом префилле в потоке
+        # экстрактора, а не здесь: копирование не должно блокировать цикл событий.
+        self._session_factory = getattr(batcher.extractor, "prefill_session", None)
+        self.session: Optional["PromptPrefill"] = None
+        self._lock = batcher.gpu_lock or asyncio.Lock()
+        self._batcher = batcher
+        self._task: Optional[asyncio.Future] = None
+
+    def __call__(self, text: str) -> None:
+        if self._session_factory is None or self._lock.locked():
+            return
+        if self._task is not None and (not self._task.done() or self._task.exception() is not None):
+            return
+
+        self._task = asyncio.ensure_future(self._feed(text))
+
+    async def _feed(self, text: str) -> None:
+        async with self._lock:
+            if self.session is None:
+                self.session = await self._batcher.run_blocking(self._session_factory)
+            await self._batcher.run_blocking(self.session.feed, text)
+
+    async def result(self) -> Optional["PromptPrefill"]:
+        """Дожидается последнего префилла; None, если префилл недоступен или упал."""
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                print(f"Prompt prefill failed: {e}")
+                self.session = None
+        return self.session
+
+
+async def read_resume_text(
+    file_path: Path,
+    transcriber_pool: Optional[TranscriberPool] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+    transcript_cache: Optional[PersistentCache] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
+) -> str:
+    """
+    Текст резюме из файла: аудио транскрибируется общим пулом Whisper
+    (app.state.transcriber), текст читается как есть.
+
+    Сегменты аудио копятся в буфере по мере декодирования; on_text, если
+    задан, вызывается с накопленным текстом после каждого сегмента
+    (например, TranscriptPrefill). Если передан transcript_cache, повторно
+    загруженная запись (те же байты) берётся из кэша без Whisper — в том
+    числе пока пул ещё загружается. Чтение файла, отпечаток аудио и
+    обращения к transcript_cache (SQLite) выполняются на этапе I/O
+    конвейера pipeline.
+
+    Raises
+    ------
+    HTTPException (503)
+        Аудиофайл, а пул моделей ещё не загружен.
+    HTTPException (400)
+        Ошибка при транскрибации.
+    """
 
     extension = file_path.suffix.lower()
 
-    if extension in [".wav", ".mp3"]:
+    if extension in AUDIO_EXTENSIONS:
+        cache_key = None
+        if transcript_cache is not None:
+            cache_key = transcript_cache_key(await run_stage(pipeline, IO, audio_fingerprint, file_path))
+            cached = await run_stage(pipeline, IO, get_cached_transcript, transcript_cache, cache_key)
+            if cached is not None:
+                text = join_segments(cached)
+                if on_text is not None:
+                    on_text(text)
+                return text
+
+        if transcriber_pool is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Модель транскрибации ещё загружается",
+                headers={"Retry-After": str(settings.STARTUP_RETRY_AFTER_SECONDS)},
+            )
         try:
-            stt_model = transcriber("medium")
-            segments, info = stt_model(str(file_path))
-            resume_text = " ".join([segment.text for segment in segments])
+            segments = []
+            async for segment in transcriber_pool.transcribe_stream(file_path, timestamps=True):
+                segments.append(segment)
+                if on_text is not None:
+                    on_text(join_segments(segments))
         except Exception:
             raise HTTPException(
                 status_code=400, detail="Ошибка при обработке аудиофайла"
             )
-    else:
-        with open(file_path, "r", encoding="utf-8") as f:
-            resume_text = f.read()
 
-    if gpu_lock:
-        async with gpu_lock:
-            name, summary, vector = await run_in_threadpool(ext, resume_text)
+        if transcript_cache is not None:
+            await run_stage(pipeline, IO, store_transcript, transcript_cache, cache_key, segments)
+        return join_segments(segments)
+
+    return await run_stage(pipeline, IO, file_path.read_text, encoding="utf-8")
+
+
+def get_cached_extraction(
+    extraction_cache: Optional[PersistentCache], resume_text: str, model_name: Optional[str] = None
+) -> Optional[Tuple[str, str, CandidateVector]]:
+    """
+    Результат экстракции из кэша или None (кэш выключен, промах, устаревшая запись).
+    model_name — см. extraction_model_name, по умолчанию основная модель.
+    """
+
+    if extraction_cache is None:
+        return None
+
+    cache_key = extraction_cache_key(resume_text, model_name or extraction_model_name())
+    cached = extraction_cache.get(cache_key)
+
+    if cached is None:
+        return None
+
+    try:
+        summary = CandidateSummary.model_validate_json(cached)
+    except ValueError:
+        extraction_cache.delete(cache_key)
+        return None
+
+    return summary.full_name, summary.raw_summary, summary.vector
+
+
+def find_cached_extraction(
+    extraction_cache: Optional[PersistentCache], resume_text: str, model_names: list[str]
+) -> Optional[Tuple[str, str, CandidateVector]]:
+    """Первый найденный в кэше ответ под одним из model_names (по порядку)."""
+
+    for model_name in model_names:
+        cached = get_cached_extraction(extraction_cache, resume_text, model_name)
+        if cached is not None:
+            return cached
+    return None
+
+
+def store_extraction(
+    extraction_cache: Optional[PersistentCache],
+    resume_text: str,
+    extracted: Tuple[str, str, CandidateVector],
+    model_name: Optional[str] = None,
+) -> None:
+    if extraction_cache is None:
+        return
+
+    name, summary, vector = extracted
+    extraction_cache.put(
+        extraction_cache_key(resume_text, model_name or extraction_model_name()),
+        CandidateSummary(full_name=name, raw_summary=summary, vector=vector).model_dump_json(),
+    )
+
+
+async def ai_extract(
+    file_path: Path,
+    batcher: ExtractionBatcher,
+    extraction_cache: Optional[PersistentCache] = None,
+    rule_extractor: Optional[RuleExtractor] = None,
+    router: Optional[ExtractionRouter] = None,
+    transcriber_pool: Optional[TranscriberPool] = None,
+    transcript_cache: Optional[PersistentCache] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
+) -> Tuple[str, str, CandidateVector]:
+    """
+    AI экстракция данных из резюме (через планировщик микробатчей).
+
+    Если передан rule_extractor и он уверенно разобрал все поля шаблонного
+    резюме, LLM не вызывается. Если передан extraction_cache, результат для
+    того же текста (с точностью до пробелов) берётся из кэша без вызова LLM.
+    Если передан router, короткие простые резюме сначала идут в малую модель,
+    а batcher основной модели используется через него. Аудио транскрибируется
+    через transcriber_pool потоково: промпт основной модели предзаполняется,
+    пока декодируются последние сегменты (без router — малая модель может
+    оказаться не той, для которой заполнен кэш). Транскрипты повторно
+    загруженных записей берутся из transcript_cache.
+    """
+
+    prefill = None
+    if file_path.suffix.lower() in AUDIO_EXTENSIONS and router is None:
+        prefill = TranscriptPrefill(batcher)
+
+    resume_text = await read_resume_text(file_path, transcriber_pool, prefill, transcript_cache, pipeline)
+    prefill_session = await prefill.result() if prefill is not None else None
+
+    return await extract_resume(
+        resume_text, batcher, extraction_cache, rule_extractor, router, prefill_session, pipeline
+    )
+
+
+async def extract_resume(
+    resume_text: str,
+    batcher: ExtractionBatcher,
+    extraction_cache: Optional[PersistentCache] = None,
+    rule_extractor: Optional[RuleExtractor] = None,
+    router: Optional[ExtractionRouter] = None,
+    prefill: Optional["PromptPrefill"] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
+) -> Tuple[str, str, CandidateVector]:
+    """
+    Экстракция по готовому тексту резюме: правила, кэш, затем LLM (см. ai_extract).
+    Обращения к кэшу (SQLite) выполняются на этапе I/O конвейера pipeline.
+    """
+
+    if rule_extractor is not None:
+        fast = rule_extractor.try_extract(resume_text)
+        if fast is not None:
+            return fast
+
+    # С предзаполненным промптом отвечает основная модель, без маршрутизатора.
+    # Ответ основной модели (например, из /analyze/stream) подходит и маршрутизатору.
+    model_name = extraction_model_name(router if prefill is None else None)
+    model_names = list(dict.fromkeys([model_name, extraction_model_name()]))
+    cached = await run_stage(pipeline, IO, find_cached_extraction, extraction_cache, resume_text, model_names)
+
+    if cached is not None:
+        return cached
+
+    if prefill is not None:
+        name, summary, vector = await batcher.submit(resume_text, prefill=prefill)
     else:
-        name, summary, vector = await run_in_threadpool(ext, resume_text)
+        name, summary, vector = await (router or batcher).submit(resume_text)
+
+    await run_stage(
+        pipeline, IO, store_extraction, extraction_cache, resume_text, (name, summary, vector), model_name
+    )
 
     return name, summary, vector
 
 
-async def ml_predict(vector: CandidateVector) -> Tuple[float, list[str]]:
-    """Вызов ML-модуля для предсказания удержания кандидата."""
+async def stream_extraction(
+    resume_text: str, batcher: ExtractionBatcher, prefill: Optional["PromptPrefill"] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Потоковая экстракция: ("token", фрагмент JSON) по мере генерации,
+    в конце ("result", (full_name, raw_summary, vector)).
+
+    Генерация идёт в отдельном потоке под gpu_lock планировщика, мимо
+    микробатчей (у каждого потокового запроса свой TextIteratorStreamer).
+    Если клиент отключился, генерация останавливается.
+    Экстрактор без потокового режима отдаёт только итоговый результат.
+    prefill — KV-кэш, заполненный во время транскрибации (TranscriptPrefill).
+    """
+
+    model_ext = batcher.extractor
 
-    try:
-        from app.ml_legacy.predictor import RetentionPredictor
+    if not hasattr(model_ext, "stream"):
+        yield "result", await batcher.submit(resume_text)
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop_event = threading.Event()
+
+    def produce():
+        try:
+            kwds = {"prefill": prefill} if prefill is not None else {}
+            for item in model_ext.stream(resume_text, stop_event=stop_event, **kwds):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async with batcher.gpu_lock or asyncio.Lock():
+        producer = asyncio.ensure_future(batcher.run_blocking(produce))
 
-        predictor = RetentionPredictor()
-        predictor.load_model()
+        try:
+            while (item := await queue.get()) is not None:
+                if item[0] == "error":
+                    raise item[1]
+                yield item
+        finally:
+            stop_event.set()
+            await producer
 
-        if predictor.model is None:
-            predictor.train_model()
-            predictor.save_model()
 
-        features = {
-            "skills_verified_count": vector.skills_verified_count,
-            "years_experience": vector.years_experience,
-            "commute_time_minutes": vector.commute_time_minutes,
-            "shift_preference": vector.shift_preference.value,
-            "salary_expectation": vector.salary_expectation,
-            "has_certifications": vector.has_certifications,
-        }
+async def ml_predict(
+    vector: CandidateVector,
+    shared_predictor: SharedPredictor,
+    pipeline: Optional[AnalysisPipeline] = None,
+) -> Tuple[float, list[str]]:
+    """Вызов ML-модуля для предсказания удержания кандидата (на этапе PREDICT конвейера)."""
 
-        prediction = predictor.predict_retention(features)
-        risk_factors = predictor.explain_prediction(features)
+    return await run_stage(pipeline, PREDICT, predict_retention, vector, shared_predictor)
 
-        return float(prediction["retention_probability"]), risk_factors
+
+def predict_retention(
+    vector: CandidateVector, shared_predictor: SharedPredictor
+) -> Tuple[float, list[str]]:
+    """Синхронная часть ml_predict: CatBoost или эвристика, если модель недоступна."""
+
+    try:
+        predictor = shared_predictor.get()
+
+        if predictor is None:
+            raise RuntimeError("ML-модель не загружена")
+
+        features = FeatureVector.from_mapping(
+            {
+                "skills_verified_count": vector.skills_verified_count,
+                "years_experience": vector.years_experience,
+                "commute_time_minutes": vector.commute_time_minutes,
+                "shift_preference": vector.shift_preference.value,
+                "salary_expectation": vector.salary_expectation,
+                "has_certifications": vector.has_certifications,
+            }
+        )
+
+        scored = predictor.score(features)
+
+        return float(scored["retention_probability"]), scored["risk_factors"]
 
     except Exception as e:
         print(f"ML модуль недоступен: {e}")
@@ -131,8 +517,14 @@ async def ml_predict(vector: CandidateVector) -> Tuple[float, list[str]]:
 async def process_candidate(
     upload_file: UploadFile,
     session: Session,
-    model_ext: extractor,
-    gpu_lock: asyncio.Lock = None,
+    batcher: ExtractionBatcher,
+    shared_predictor: SharedPredictor,
+    extraction_cache: Optional[PersistentCache] = None,
+    rule_extractor: Optional[RuleExtractor] = None,
+    router: Optional[ExtractionRouter] = None,
+    transcriber_pool: Optional[TranscriberPool] = None,
+    transcript_cache: Optional[PersistentCache] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
 ) -> CandidateResult:
     """
     Полный цикл обработки кандидата.
@@ -149,6 +541,23 @@ async def process_candidate(
         Файл резюме от рекрутера.
     session : Session
         Сессия БД (приходит из dependency injection в routes.py).
+    batcher : ExtractionBatcher
+        Планировщик пакетной LLM-экстракции (app.state.extraction_batcher).
+    shared_predictor : SharedPredictor
+        Общий ML-предиктор приложения (app.state.predictor).
+    extraction_cache : PersistentCache, optional
+        Кэш результатов экстракции (app.state.extraction_cache).
+    rule_extractor : RuleExtractor, optional
+        Быстрый путь для шаблонных резюме (app.state.rule_extractor).
+    router : ExtractionRouter, optional
+        Выбор между малой и основной LLM (app.state.extraction_router).
+    transcriber_pool : TranscriberPool, optional
+        Пул моделей Whisper для аудио (app.state.transcriber).
+    transcript_cache : PersistentCache, optional
+        Кэш транскриптов аудио по отпечатку файла (app.state.transcript_cache).
+    pipeline : AnalysisPipeline, optional
+        Конвейер анализа (app.state.pipeline): у каждого этапа свой пул
+        потоков, поэтому этапы разных запросов выполняются одновременно.
 
     Returns
     -------
@@ -157,15 +566,170 @@ async def process_candidate(
 
     Raises
     ------
+    HTTPException (503)
+        В конвейере уже PIPELINE_MAX_IN_FLIGHT запросов.
     Exception
         Любые ошибки обрабатываются в routes.py (там будет try/except).
     """
 
-    file_path = await save_upload_file(upload_file)
+    async with admit(pipeline):
+        file_path = await save_upload_file(upload_file, pipeline)
+
+        full_name, raw_summary, vector = await ai_extract(
+            file_path,
+            batcher,
+            extraction_cache,
+            rule_extractor,
+            router,
+            transcriber_pool,
+            transcript_cache,
+            pipeline,
+        )
+
+        retention_score, risk_factors = await ml_predict(vector, shared_predictor, pipeline)
+
+        return await run_stage(
+            pipeline, PREDICT, save_candidate, session, full_name, raw_summary, vector, retention_score, risk_factors
+        )
+
+
+async def process_candidates_bulk(
+    upload_files: list[UploadFile],
+    session: Session,
+    batcher: ExtractionBatcher,
+    shared_predictor: SharedPredictor,
+    extraction_cache: Optional[PersistentCache] = None,
+    rule_extractor: Optional[RuleExtractor] = None,
+    router: Optional[ExtractionRouter] = None,
+    transcriber_pool: Optional[TranscriberPool] = None,
+    transcript_cache: Optional[PersistentCache] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
+) -> list[BulkAnalyzeItem]:
+    """
+    Массовая обработка кандидатов (например, записи телефонных интервью за день).
+
+    Все аудиофайлы транскрибируются одним пакетным вызовом
+    (TranscriberPool.transcribe_batch): клипы разных файлов делят батчи.
+    Затем тексты экстрагируются параллельно, поэтому планировщик LLM собирает
+    их в микробатчи. Записи, уже лежащие в transcript_cache, в батч не
+    попадают. Ошибка одного файла не прерывает остальные. В конвейере пакет
+    занимает по месту на файл.
+
+    Returns
+    -------
+    list[BulkAnalyzeItem]
+        Результат или текст ошибки для каждого файла в порядке загрузки.
+
+    Raises
+    ------
+    HTTPException (503)
+        Среди файлов есть аудио, а пул Whisper ещё не загружен, или
+        конвейер анализа перегружен.
+    """
+
+    async with admit(pipeline, len(upload_files)):
+        return await _process_bulk(
+            upload_files,
+            session,
+            batcher,
+            shared_predictor,
+            extraction_cache,
+            rule_extractor,
+            router,
+            transcriber_pool,
+            transcript_cache,
+            pipeline,
+        )
+
+
+async def _process_bulk(
+    upload_files: list[UploadFile],
+    session: Session,
+    batcher: ExtractionBatcher,
+    shared_predictor: SharedPredictor,
+    extraction_cache: Optional[PersistentCache],
+    rule_extractor: Optional[RuleExtractor],
+    router: Optional[ExtractionRouter],
+    transcriber_pool: Optional[TranscriberPool],
+    transcript_cache: Optional[PersistentCache],
+    pipeline: Optional[AnalysisPipeline],
+) -> list[BulkAnalyzeItem]:
+    file_paths = [await save_upload_file(upload_file, pipeline) for upload_file in upload_files]
+    texts: list[Optional[str]] = [None] * len(file_paths)
+    errors: list[Optional[str]] = [None] * len(file_paths)
+
+    audio = [i for i, path in enumerate(file_paths) if path.suffix.lower() in AUDIO_EXTENSIONS]
+    audio_set = set(audio)
+    cache_keys: dict[int, str] = {}
+
+    if transcript_cache is not None:
+        for i in audio:
+            cache_keys[i] = transcript_cache_key(await run_stage(pipeline, IO, audio_fingerprint, file_paths[i]))
+            cached = await run_stage(pipeline, IO, get_cached_transcript, transcript_cache, cache_keys[i])
+            if cached is not None:
+                texts[i] = join_segments(cached)
+        audio = [i for i in audio if texts[i] is None]
+
+    if audio:
+        if transcriber_pool is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Модель транскрибации ещё загружается",
+                headers={"Retry-After": str(settings.STARTUP_RETRY_AFTER_SECONDS)},
+            )
+        try:
+            transcripts = await transcriber_pool.transcribe_batch(
+                [file_paths[i] for i in audio], batch_size=settings.TRANSCRIBER_BATCH_SIZE, timestamps=True
+            )
+            for i, segments in zip(audio, transcripts):
+                texts[i] = join_segments(segments)
+                if transcript_cache is not None:
+                    await run_stage(pipeline, IO, store_transcript, transcript_cache, cache_keys[i], segments)
+        except Exception as e:
+            print(f"Batched transcription failed: {e}")
+            for i in audio:
+                errors[i] = "Ошибка при обработке аудиофайла"
+
+    for i, path in enumerate(file_paths):
+        if i not in audio_set:
+            try:
+                texts[i] = await read_resume_text(path, pipeline=pipeline)
+            except (OSError, UnicodeDecodeError):
+                errors[i] = "Не удалось прочитать файл"
+
+    async def analyze(text: str):
+        full_name, raw_summary, vector = await extract_resume(
+            text, batcher, extraction_cache, rule_extractor, router, pipeline=pipeline
+        )
+        retention_score, risk_factors = await ml_predict(vector, shared_predictor, pipeline)
+        return full_name, raw_summary, vector, retention_score, risk_factors
+
+    pending = [i for i in range(len(file_paths)) if errors[i] is None]
+    analyzed = await asyncio.gather(*(analyze(texts[i]) for i in pending), return_exceptions=True)
+
+    results: list[Optional[CandidateResult]] = [None] * len(file_paths)
+    for i, outcome in zip(pending, analyzed):
+        if isinstance(outcome, Exception):
+            errors[i] = str(outcome)
+        else:
+            # Сессия запроса одна, поэтому записи идут по очереди.
+            results[i] = await run_stage(pipeline, PREDICT, save_candidate, session, *outcome)
 
-    full_name, raw_summary, vector = await ai_extract(file_path, model_ext, gpu_lock)
+    return [
+        BulkAnalyzeItem(filename=upload_file.filename, result=result, error=error)
+        for upload_file, result, error in zip(upload_files, results, errors)
+    ]
 
-    retention_score, risk_factors = await ml_predict(vector)
+
+def save_candidate(
+    session: Session,
+    full_name: str,
+    raw_summary: str,
+    vector: CandidateVector,
+    retention_score: float,
+    risk_factors: list[str],
+) -> CandidateResult:
+    """Запись результата анализа в БД и формирование ответа."""
 
     db_candidate = CandidateTable(
         full_name=full_name,
@@ -196,6 +760,106 @@ async def process_candidate(
     return result
 
 
+def _stage(stage: str, status: str, **extra) -> dict:
+    return {"event": "stage", "stage": stage, "status": status, **extra}
+
+
+async def process_candidate_stream(
+    file_path: Path,
+    batcher: ExtractionBatcher,
+    shared_predictor: SharedPredictor,
+    extraction_cache: Optional[PersistentCache] = None,
+    rule_extractor: Optional[RuleExtractor] = None,
+    transcriber_pool: Optional[TranscriberPool] = None,
+    transcript_cache: Optional[PersistentCache] = None,
+    pipeline: Optional[AnalysisPipeline] = None,
+    router: Optional[ExtractionRouter] = None,
+) -> AsyncIterator[dict]:
+    """
+    Потоковый вариант process_candidate для /analyze/stream.
+
+    Файл уже сохранён роутом (UploadFile и сессия запроса закрываются до начала
+    стрима), сессию БД функция открывает сама. Место в конвейере тоже занимает
+    роут: отказ 503 должен прийти до того, как отправлен статус 200.
+
+    Генерирует всегда основная модель: клиенту идут её токены, а малой модели
+    router пришлось бы при эскалации отзывать уже отправленный JSON. Из кэша
+    при этом берётся и ответ, сохранённый /analyze через router, так что
+    одно резюме не разбирается заново при смене эндпоинта. Новый ответ
+    сохраняется под ключом основной модели.
+
+    Yields
+    ------
+    dict
+        События: {"event": "stage", "stage", "status"} на начале и конце каждого
+        этапа, {"event": "token", "text"} с фрагментами JSON от LLM,
+        {"event": "result", "data"} с итоговым CandidateResult
+        или {"event": "error", "detail"} при ошибке.
+    """
+
+    try:
+        yield _stage("read", "started")
+        prefill = TranscriptPrefill(batcher) if file_path.suffix.lower() in AUDIO_EXTENSIONS else None
+        resume_text = await read_resume_text(file_path, transcriber_pool, prefill, transcript_cache, pipeline)
+        prefill_session = await prefill.result() if prefill is not None else None
+        yield _stage("read", "done", chars=len(resume_text))
+
+        yield _stage("extract", "started")
+        extracted = rule_extractor.try_extract(resume_text) if rule_extractor else None
+
+        if extracted is not None:
+            yield _stage("extract", "done", cached=False, fast_path=True)
+        elif (
+            extracted := await run_stage(
+                pipeline,
+                IO,
+                find_cached_extraction,
+                extraction_cache,
+                resume_text,
+                list(dict.fromkeys([extraction_model_name(), extraction_model_name(router)])),
+            )
+        ) is not None:
+            yield _stage("extract", "done", cached=True)
+        else:
+            # aclosing: при отключении клиента генерация останавливается и gpu_lock
+            # освобождается сразу, а не при сборке мусора.
+            async with aclosing(stream_extraction(resume_text, batcher, prefill_session)) as chunks:
+                async for kind, payload in chunks:
+                    if kind == "token":
+                        yield {"event": "token", "text": payload}
+                    else:
+                        extracted = payload
+
+            await run_stage(pipeline, IO, store_extraction, extraction_cache, resume_text, extracted)
+            yield _stage("extract", "done", cached=False)
+
+        full_name, raw_summary, vector = extracted
+
+        yield _stage("predict", "started")
+        retention_score, risk_factors = await ml_predict(vector, shared_predictor, pipeline)
+        yield _stage("predict", "done")
+
+        yield _stage("save", "started")
+
+        def save() -> CandidateResult:
+            with Session(engine) as session:
+                return save_candidate(
+                    session, full_name, raw_summary, vector, retention_score, risk_factors
+                )
+
+        result = await run_stage(pipeline, PREDICT, save)
+        yield _stage("save", "done")
+
+        yield {"event": "result", "data": result.model_dump(mode="json")}
+
+    except HTTPException as e:
+        yield {"event": "error", "detail": e.detail}
+
+    except Exception as e:
+        print(f"Error processing candidate stream: {e}")
+        yield {"event": "error", "detail": f"Internal Server Error: {str(e)}"}
+
+
 def get_all_candidates(session: Session) -> list[CandidateResult]:
     """
     Получает список всех кандидатов из БД.
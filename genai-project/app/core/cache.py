@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Потокобезопасный кэш в памяти с ограничением размера и LRU-вытеснением.
+
+    Используется для мемоизации результатов, которые дорого пересчитывать
+    (предсказания и объяснения ML-модели). Дополнительно поддерживает TTL
+    и ведёт счётчики попаданий, промахов и вытеснений для админских метрик.
+
+    Attributes
+    ----------
+    max_size : int
+        Максимальное количество записей. При переполнении вытесняется
+        запись, к которой дольше всего не обращались.
+    ttl_seconds : Optional[float]
+        Время жизни записи в секундах. None — записи не устаревают.
+
+    Methods
+    -------
+    get(key, default=None)
+        Возвращает значение и помечает запись как недавно использованную.
+    put(key, value)
+        Сохраняет значение, при необходимости вытесняя старые записи.
+    clear()
+        Удаляет все записи (инвалидация), счётчики сохраняются.
+    stats()
+        Снимок счётчиков для мониторинга.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size должен быть положительным")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            stored_at, value = entry
+
+            if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._clock(), value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,4 +1,5 @@
 import os
+from typing import Literal, Optional
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -21,12 +22,184 @@ class Settings(BaseSettings):
     UPLOAD_DIR : str
         Путь в файловой системе для временного хранения загруженных резюме.
         По умолчанию: "/tmp/Worker_Selection_App_uploads".
+    PREDICTOR_CACHE_SIZE : int
+        Максимальное число записей в каждом кэше ML-предиктора (LRU).
+        По умолчанию: 4096.
+    PREDICTOR_CACHE_TTL_SECONDS : Optional[float]
+        Время жизни записи в кэшах ML-предиктора. None — без ограничения.
+        По умолчанию: None.
+    PREDICTOR_LOOKUP_RESOLUTION : Optional[int]
+        Число корзин на непрерывный признак для табличного режима предиктора
+        (PredictionGrid). None — табличный режим выключен, модель вызывается напрямую.
+        По умолчанию: None.
+    EXTRACTION_MAX_BATCH_SIZE : int
+        Максимальное число резюме в одном пакетном вызове LLM-экстрактора.
+        1 — каждое резюме обрабатывается отдельно.
+        По умолчанию: 4.
+    EXTRACTION_BATCH_WINDOW_MS : float
+        Сколько миллисекунд планировщик ждёт дополнительные резюме после первого
+        перед запуском батча (компромисс между пропускной способностью и задержкой).
+        По умолчанию: 25.0.
+    EXTRACTOR_MODEL_NAME : str
+        Имя или путь LLM-модели экстрактора (Hugging Face).
+        По умолчанию: "Qwen/Qwen3-4B-Instruct-2507".
+    EXTRACTOR_BACKEND : str
+        Бэкенд инференса экстрактора: "auto" (device_map="auto", GPU при наличии),
+        "cpu" (float32), "cpu-int8" (динамическое int8-квантование) или
+        "onnx" (ONNX Runtime, нужен optimum[onnxruntime]).
+        По умолчанию: "auto".
+    EXTRACTOR_NUM_THREADS : Optional[int]
+        Число потоков torch для CPU-бэкендов. None — значение torch по умолчанию.
+        По умолчанию: None.
+    EXTRACTOR_DRAFT_MODEL_NAME : Optional[str]
+        Малая модель с тем же токенизатором (например, "Qwen/Qwen3-0.6B") для
+        спекулятивного декодирования одиночных запросов. None — без черновика.
+        По умолчанию: None.
+    EXTRACTOR_SMALL_MODEL_NAME : Optional[str]
+        Малая instruct-модель (например, "Qwen/Qwen2.5-0.5B-Instruct") для
+        коротких простых резюме; сложные и неудачные случаи уходят в основную
+        модель (app.ai.routing.ExtractionRouter). None — только основная модель.
+        По умолчанию: None.
+    ROUTER_SMALL_MAX_TOKENS : int
+        Максимальная длина резюме в токенах, при которой пробуется малая модель.
+        По умолчанию: 512.
+    ROUTER_SMALL_MAX_COMPLEXITY : float
+        Максимальная оценка сложности резюме (0..1) для малой модели.
+        По умолчанию: 0.5.
+    ROUTER_MIN_CONFIDENCE : float
+        Минимальное правдоподобие ответа малой модели (0..1); ниже — повтор
+        на основной модели.
+        По умолчанию: 0.75.
+    TRANSCRIBER_MODEL_SIZE : str
+        Модель faster-whisper для аудиорезюме ("medium", "large-v3", путь к CT2-модели).
+        По умолчанию: "medium".
+    TRANSCRIBER_DEVICE : str
+        Устройство Whisper: "auto", "cpu" или "cuda".
+        По умолчанию: "auto".
+    TRANSCRIBER_COMPUTE_TYPE : str
+        Тип вычислений CTranslate2: "int8" (CPU), "float16", "int8_float16" (GPU) и т.д.
+        По умолчанию: "int8".
+    TRANSCRIBER_CPU_THREADS : int
+        Потоков на один экземпляр модели на CPU. 0 — значение CTranslate2 по умолчанию.
+        По умолчанию: 0.
+    TRANSCRIBER_NUM_WORKERS : int
+        Параметр num_workers WhisperModel (параллельные вызовы одного экземпляра).
+        По умолчанию: 1.
+    TRANSCRIBER_POOL_SIZE : int
+        Число экземпляров модели в пуле = максимум одновременных транскрибаций;
+        остальные запросы ждут в очереди.
+        По умолчанию: 1.
+    TRANSCRIBER_VAD_FILTER : bool
+        Вырезать паузы VAD-фильтром (Silero) перед декодированием Whisper.
+        По умолчанию: True.
+    TRANSCRIBER_BATCH_SIZE : int
+        Число 30-секундных клипов в одном батче Whisper при массовой загрузке
+        (/api/analyze/bulk); клипы разных файлов делят батчи.
+        По умолчанию: 8.
+    BULK_MAX_FILES : int
+        Максимальное число файлов в одном запросе /api/analyze/bulk.
+        По умолчанию: 100.
+    EXTRACTION_CACHE_ENABLED : bool
+        Хранить ли результаты экстракции в персистентном кэше (таблица cache_entries),
+        чтобы повторная загрузка того же резюме не запускала LLM.
+        По умолчанию: True.
+    EXTRACTION_CACHE_MAX_ENTRIES : Optional[int]
+        Максимальное число записей кэша экстракции. None — без ограничения.
+        По умолчанию: 10000.
+    EXTRACTION_CACHE_MAX_BYTES : Optional[int]
+        Максимальный суммарный размер записей кэша экстракции в байтах.
+        По умолчанию: 64 МиБ.
+    TRANSCRIPT_CACHE_ENABLED : bool
+        Включает персистентный кэш транскриптов аудио (ключ — sha256 файла,
+        модель Whisper и VAD): повторно загруженные записи не транскрибируются.
+        По умолчанию: True.
+    TRANSCRIPT_CACHE_MAX_BYTES : Optional[int]
+        Максимальный суммарный размер транскриптов (текст и сегменты с
+        таймкодами) в байтах; при превышении вытесняются давно не читавшиеся.
+        None — без ограничения.
+        По умолчанию: 64 МиБ.
+    FAST_PATH_ENABLED : bool
+        Пробовать ли детерминированный разбор шаблонных резюме (RuleExtractor)
+        перед вызовом LLM.
+        По умолчанию: True.
+    FAST_PATH_MIN_CONFIDENCE : float
+        Минимальная уверенность по каждому полю, при которой LLM не вызывается.
+        По умолчанию: 0.9.
+    PIPELINE_IO_WORKERS : int
+        Потоков этапа I/O конвейера анализа (запись и чтение файлов, отпечатки аудио).
+        По умолчанию: 4.
+    PIPELINE_TRANSCRIPTION_WORKERS : Optional[int]
+        Потоков этапа транскрибации. None — TRANSCRIBER_POOL_SIZE (по потоку
+        на экземпляр Whisper).
+        По умолчанию: None.
+    PIPELINE_LLM_WORKERS : int
+        Потоков этапа LLM. Генерация идёт под gpu_lock, поэтому больше 1
+        имеет смысл только без общей блокировки.
+        По умолчанию: 1.
+    PIPELINE_PREDICT_WORKERS : int
+        Потоков этапа CatBoost и записи в БД.
+        По умолчанию: 2.
+    PIPELINE_QUEUE_SIZE : int
+        Сколько задач может ждать свободный поток каждого этапа; сверх этого
+        предыдущий этап ждёт (обратное давление).
+        По умолчанию: 32.
+    PIPELINE_MAX_IN_FLIGHT : int
+        Максимум запросов анализа в конвейере одновременно; сверх — 503 с
+        Retry-After.
+        По умолчанию: 64.
+    STARTUP_RETRY_AFTER_SECONDS : int
+        Значение заголовка Retry-After в ответах 503, пока модели загружаются
+        в фоне после старта сервера.
+        По умолчанию: 10.
     """
 
     OPENAI_API_KEY: str = "not-set"
     DATABASE_URL: str = "sqlite:///./Worker_Selection_App.db"
     UPLOAD_DIR: str = "/tmp/Worker_Selection_App_uploads"
 
+    PREDICTOR_CACHE_SIZE: int = 4096
+    PREDICTOR_CACHE_TTL_SECONDS: Optional[float] = None
+    PREDICTOR_LOOKUP_RESOLUTION: Optional[int] = None
+
+    EXTRACTION_MAX_BATCH_SIZE: int = 4
+    EXTRACTION_BATCH_WINDOW_MS: float = 25.0
+
+    EXTRACTOR_MODEL_NAME: str = "Qwen/Qwen3-4B-Instruct-2507"
+    EXTRACTOR_BACKEND: Literal["auto", "cpu", "cpu-int8", "onnx"] = "auto"
+    EXTRACTOR_NUM_THREADS: Optional[int] = None
+    EXTRACTOR_DRAFT_MODEL_NAME: Optional[str] = None
+    EXTRACTOR_SMALL_MODEL_NAME: Optional[str] = None
+    ROUTER_SMALL_MAX_TOKENS: int = 512
+    ROUTER_SMALL_MAX_COMPLEXITY: float = 0.5
+    ROUTER_MIN_CONFIDENCE: float = 0.75
+    TRANSCRIBER_MODEL_SIZE: str = "medium"
+    TRANSCRIBER_DEVICE: str = "auto"
+    TRANSCRIBER_COMPUTE_TYPE: str = "int8"
+    TRANSCRIBER_CPU_THREADS: int = 0
+    TRANSCRIBER_NUM_WORKERS: int = 1
+    TRANSCRIBER_POOL_SIZE: int = 1
+    TRANSCRIBER_VAD_FILTER: bool = True
+    TRANSCRIBER_BATCH_SIZE: int = 8
+    BULK_MAX_FILES: int = 100
+
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MAX_ENTRIES: Optional[int] = 10000
+    EXTRACTION_CACHE_MAX_BYTES: Optional[int] = 64 * 1024 * 1024
+    TRANSCRIPT_CACHE_ENABLED: bool = True
+    TRANSCRIPT_CACHE_MAX_BYTES: Optional[int] = 64 * 1024 * 1024
+
+    FAST_PATH_ENABLED: bool = True
+    FAST_PATH_MIN_CONFIDENCE: float = 0.9
+
+    PIPELINE_IO_WORKERS: int = 4
+    PIPELINE_TRANSCRIPTION_WORKERS: Optional[int] = None
+    PIPELINE_LLM_WORKERS: int = 1
+    PIPELINE_PREDICT_WORKERS: int = 2
+    PIPELINE_QUEUE_SIZE: int = 32
+    PIPELINE_MAX_IN_FLIGHT: int = 64
+
+    STARTUP_RETRY_AFTER_SECONDS: int = 10
+
     model_config = ConfigDict(env_file=".env")
 
 
@@ -1,7 +1,12 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.core.enums import ShiftPreference
 
+# Ограничения длины строк в ответе LLM. Входят в JSON-схему CandidateSummary,
+# поэтому их соблюдает lm-format-enforcer и по ним считается бюджет токенов.
+FULL_NAME_MAX_LENGTH = 100
+RAW_SUMMARY_MAX_LENGTH = 150
+
 
 class CandidateVector(BaseModel):
     """
@@ -49,8 +54,14 @@ class CandidateSummary(BaseModel):
         Краткое резюме, сгенерированное LLM.
     """
 
-    full_name: str = Field(..., description="ФИО кандидата")
-    raw_summary: str = Field(..., description="Краткое резюме, сгенерированное LLM")
+    full_name: str = Field(
+        ..., max_length=FULL_NAME_MAX_LENGTH, description="ФИО кандидата"
+    )
+    raw_summary: str = Field(
+        ...,
+        max_length=RAW_SUMMARY_MAX_LENGTH,
+        description="Краткое резюме, сгенерированное LLM",
+    )
     vector: CandidateVector
 
 
@@ -89,3 +100,22 @@ class CandidateResult(BaseModel):
     risk_factors: List[str] = Field(
         default_factory=list, description="Список текстовых пояснений рисков"
     )
+
+
+class BulkAnalyzeItem(BaseModel):
+    """
+    Результат массовой загрузки по одному файлу.
+
+    Attributes
+    ----------
+    filename : str
+        Имя загруженного файла.
+    result : Optional[CandidateResult]
+        Результат анализа; None, если файл не обработан.
+    error : Optional[str]
+        Причина ошибки; None при успехе.
+    """
+
+    filename: str
+    result: Optional[CandidateResult] = None
+    error: Optional[str] = None
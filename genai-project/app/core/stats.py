@@ -0,0 +1,24 @@
+from typing import Iterable, Optional
+
+
+def percentile_ms(values: Iterable[float], q: float) -> Optional[float]:
+    """
+    Перцентиль q (0..1) по выборке длительностей в секундах, в миллисекундах.
+
+    Parameters
+    ----------
+    values : Iterable[float]
+        Длительности в секундах (обычно deque последних замеров).
+    q : float
+        Уровень перцентиля, например 0.5 или 0.99.
+
+    Returns
+    -------
+    Optional[float]
+        Значение в миллисекундах или None для пустой выборки.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
@@ -439,6 +439,80 @@ function renderUploadResult(result) {
   `;
 }
 
+const stageLabels = {
+  read: 'Чтение файла',
+  extract: 'Извлечение данных (LLM)',
+  predict: 'Прогноз удержания',
+  save: 'Сохранение результата',
+};
+
+function escapeHtml(text) {
+  return String(text)
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;');
+}
+
+function renderUploadProgress(stages, partialJson) {
+  const container = document.querySelector('#uploadResult');
+
+  container.classList.remove('hidden');
+
+  const items = Object.entries(stages)
+    .map(([stage, status]) => {
+      const mark = status === 'done' ? '✓' : '…';
+      return `<li>${mark} ${stageLabels[stage] || stage}</li>`;
+    })
+    .join('');
+
+  container.innerHTML = `
+    <ul class="stream-stages">${items}</ul>
+    ${partialJson ? `<pre class="stream-output">${escapeHtml(partialJson)}</pre>` : ''}
+  `;
+}
+
+async function streamAnalyze(data, onEvent) {
+  const response = await fetch('/api/analyze/stream', {
+    method: 'POST',
+    body: data,
+  });
+
+  if (!response.ok) {
+    const payload = await response.json().catch(() => ({}));
+    throw new Error(payload.detail || `HTTP ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+
+    if (done) {
+      break;
+    }
+
+    buffer += decoder.decode(value, { stream: true });
+
+    // События SSE разделены пустой строкой; данные — в строке "data: ".
+    let boundary = buffer.indexOf('\n\n');
+
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const dataLine = block.split('\n').find((line) => line.startsWith('data: '));
+
+      if (dataLine) {
+        onEvent(JSON.parse(dataLine.slice(6)));
+      }
+
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+}
+
 function setupUpload() {
   const uploadForm = document.querySelector('#uploadForm');
 
@@ -460,13 +534,35 @@ function setupUpload() {
     button.disabled = true;
     button.textContent = 'Анализ выполняется...';
 
+    const stages = {};
+    let partialJson = '';
+    let result = null;
+    let streamError = null;
+
     try {
-      const result = await apiFetch('/api/analyze', {
-        method: 'POST',
-        body: data,
+      await streamAnalyze(data, (event) => {
+        if (event.event === 'stage') {
+          stages[event.stage] = event.status;
+        } else if (event.event === 'token') {
+          partialJson += event.text;
+        } else if (event.event === 'result') {
+          result = event.data;
+        } else if (event.event === 'error') {
+          streamError = event.detail;
+        }
+
+        if (!result) {
+          renderUploadProgress(stages, partialJson);
+        }
       });
 
-      renderUploadResult(result);
+      if (streamError) {
+        throw new Error(streamError);
+      }
+
+      if (result) {
+        renderUploadResult(result);
+      }
     } catch (error) {
       showToast(error.message);
     } finally {
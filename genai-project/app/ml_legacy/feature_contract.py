@@ -45,4 +45,24 @@ HOUSING_LABELS = {
     3: "С родителями",
 }
 
-FAMILY_WITH_KIDS = {2, 3}
\ No newline at end of file
+FAMILY_WITH_KIDS = {2, 3}
+
+# Дискретные признаки и их допустимые значения (как в generator.py).
+DISCRETE_FEATURE_DOMAINS = {
+    "skills_verified_count": tuple(range(0, 11)),
+    "shift_preference": (0, 1, 2),
+    "has_certifications": (0, 1),
+    "education_level": tuple(EDUCATION_LABELS),
+    "previous_turnovers": tuple(range(0, 6)),
+    "family_status": tuple(FAMILY_LABELS),
+    "housing_type": tuple(HOUSING_LABELS),
+    "has_transport": (0, 1),
+}
+
+# Непрерывные признаки и типичный диапазон значений в данных.
+CONTINUOUS_FEATURE_RANGES = {
+    "years_experience": (0.0, 42.0),
+    "age": (18, 60),
+    "commute_time_minutes": (10, 180),
+    "salary_expectation": (30000, 150000),
+}
@@ -0,0 +1,150 @@
+"""
+Normalized feature record for the retention predictor
+Нормализованный набор признаков кандидата: создаётся один раз на запрос,
+неизменяем, хэшируем (служит ключом кэшей предиктора) и хранит значения
+кортежем в порядке FEATURE_COLS.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from app.ml_legacy.feature_contract import FEATURE_COLS, FEATURE_DEFAULTS
+
+_INDEX = {name: i for i, name in enumerate(FEATURE_COLS)}
+
+# Признак не передан и не имеет значения по умолчанию.
+_MISSING = object()
+
+
+class FeatureVector(Mapping):
+    """
+    Неизменяемый набор признаков кандидата в порядке FEATURE_COLS.
+
+    Ведёт себя как словарь только для чтения (features["age"], features.get,
+    dict(features)), поэтому принимается везде, где раньше ожидался Dict.
+    FEATURE_DEFAULTS подставляются один раз при создании через from_mapping,
+    признаки вне FEATURE_COLS отбрасываются.
+
+    Равенство и хэш определяются кортежем значений, поэтому сам вектор
+    используется как ключ LRU-кэшей предиктора.
+
+    Methods
+    -------
+    from_mapping(features)
+        Строит вектор из словаря (или возвращает уже готовый вектор).
+    replace(**changes)
+        Копия с изменёнными значениями признаков.
+    as_array(feature_names=None)
+        Значения в порядке колонок модели как float64-массив.
+    """
+
+    __slots__ = ("_values", "_hash")
+
+    def __init__(self, values: Iterable[Any]):
+        values = tuple(values)
+
+        if len(values) != len(FEATURE_COLS):
+            raise ValueError(
+                f"Ожидается {len(FEATURE_COLS)} значений признаков, получено {len(values)}"
+            )
+
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_hash", hash(values))
+
+    @classmethod
+    def from_mapping(cls, features: Mapping) -> "FeatureVector":
+        if isinstance(features, cls):
+            return features
+
+        return cls(
+            features.get(name, FEATURE_DEFAULTS.get(name, _MISSING))
+            for name in FEATURE_COLS
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("FeatureVector неизменяем")
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._values[_INDEX[name]]
+
+        if value is _MISSING:
+            raise KeyError(name)
+
+        return value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        index = _INDEX.get(name)
+
+        if index is None or self._values[index] is _MISSING:
+            return default
+
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            name
+            for name, value in zip(FEATURE_COLS, self._values)
+            if value is not _MISSING
+        )
+
+    def __len__(self) -> int:
+        return sum(value is not _MISSING for value in self._values)
+
+    def __contains__(self, name: object) -> bool:
+        index = _INDEX.get(name)
+        return index is not None and self._values[index] is not _MISSING
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FeatureVector):
+            return self._values == other._values
+
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        if _MISSING in self._values:
+            raise TypeError("Неполный FeatureVector нельзя сериализовать")
+
+        return (FeatureVector, (self._values,))
+
+    def __repr__(self) -> str:
+        return f"FeatureVector({dict(self)!r})"
+
+    def replace(self, **changes: Any) -> "FeatureVector":
+        values = list(self._values)
+
+        for name, value in changes.items():
+            values[_INDEX[name]] = value
+
+        return FeatureVector(values)
+
+    def as_array(self, feature_names: list[str] | None = None) -> np.ndarray:
+        """
+        Значения признаков в порядке feature_names (по умолчанию FEATURE_COLS).
+
+        Raises
+        ------
+        ValueError
+            Если какого-то из запрошенных признаков нет.
+        """
+
+        if feature_names is None or feature_names == FEATURE_COLS:
+            values = self._values
+            feature_names = FEATURE_COLS
+        else:
+            values = tuple(
+                self._values[_INDEX[name]] if name in _INDEX else _MISSING
+                for name in feature_names
+            )
+
+        if _MISSING in values:
+            missing = [
+                name for name, value in zip(feature_names, values) if value is _MISSING
+            ]
+            raise ValueError(f"Отсутствуют признаки для модели: {sorted(missing)}")
+
+        return np.array(values, dtype=np.float64)
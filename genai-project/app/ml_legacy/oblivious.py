@@ -0,0 +1,225 @@
+"""
+Pure-NumPy inference for CatBoost oblivious (symmetric) trees.
+
+Модуль не импортирует catboost на уровне модуля: экспорт из обученной модели
+выполняется один раз (from_catboost), а дальше ансамбль сохраняется в .npz
+и может оцениваться в воркерах, где установлен только NumPy.
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+def catboost_json_dump(model) -> dict:
+    """Выгружает обученную CatBoost-модель в её JSON-представление."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "model.json")
+        model.save_model(path, format="json")
+
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class ObliviousTreeEnsemble:
+    """
+    Ансамбль симметричных деревьев CatBoost, оцениваемый средствами NumPy.
+
+    В симметричном дереве глубины D на каждом уровне стоит одно и то же
+    условие "значение признака > граница", поэтому номер листа — это D бит,
+    по одному на уровень. Все уникальные условия ансамбля сначала
+    вычисляются один раз для всей пачки (битовая матрица n x U), затем номера
+    листов всех деревьев собираются одним матричным умножением на матрицу
+    весов битов (U x T, вес условия на уровне l равен 1 << l), и значения
+    листьев суммируются одной индексацией.
+
+    Attributes
+    ----------
+    feature_names : list[str]
+        Порядок колонок входной матрицы.
+    split_features : np.ndarray
+        Индексы признаков уникальных условий, форма (U,).
+    split_borders : np.ndarray
+        Границы уникальных условий, форма (U,).
+    tree_splits : np.ndarray
+        Номер уникального условия на каждом уровне каждого дерева, форма (T, D).
+    leaf_values : np.ndarray
+        Значения листьев, форма (T, 2**D).
+    scale : float
+        Множитель суммы деревьев (scale_and_bias CatBoost).
+    bias : float
+        Сдвиг сырого предсказания.
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        split_features: np.ndarray,
+        split_borders: np.ndarray,
+        tree_splits: np.ndarray,
+        leaf_values: np.ndarray,
+        scale: float = 1.0,
+        bias: float = 0.0,
+    ):
+        self.feature_names = list(feature_names)
+        self.split_features = np.asarray(split_features, dtype=np.intp)
+        # CatBoost хранит границы и сравнивает признаки во float32 — повторяем это,
+        # чтобы значения на самой границе попадали в тот же лист.
+        self.split_borders = np.asarray(split_borders, dtype=np.float32)
+        self.tree_splits = np.asarray(tree_splits, dtype=np.intp)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        self.scale = float(scale)
+        self.bias = float(bias)
+
+        n_trees, depth = self.tree_splits.shape
+
+        # Номер листа дерева t = сумма (условие на уровне l) << l, то есть скалярное
+        # произведение битов условий на столбец bit_weights. Значения малы (< 2**D)
+        # и точно представимы во float32, поэтому умножение делает BLAS.
+        self._bit_weights = np.zeros((len(self.split_borders), n_trees), dtype=np.float32)
+        for level in range(depth):
+            np.add.at(
+                self._bit_weights,
+                (self.tree_splits[:, level], np.arange(n_trees)),
+                float(1 << level),
+            )
+
+        self._leaf_offsets = (np.arange(n_trees, dtype=np.intp) * (1 << depth))[None, :]
+        self._flat_leaf_values = self.leaf_values.reshape(-1)
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.tree_splits.shape[0])
+
+    @property
+    def depth(self) -> int:
+        return int(self.tree_splits.shape[1])
+
+    @classmethod
+    def from_catboost(cls, model, feature_names: list[str] | None = None) -> "ObliviousTreeEnsemble":
+        """
+        Извлекает сплиты, границы и значения листьев из CatBoostClassifier.
+
+        Поддерживаются только числовые признаки и бинарная классификация,
+        чего достаточно для модели удержания.
+        """
+
+        dump = catboost_json_dump(model)
+
+        float_features = dump["features_info"].get("float_features", [])
+        if dump["features_info"].get("categorical_features"):
+            raise ValueError("Категориальные признаки не поддерживаются NumPy-движком")
+
+        if feature_names is None:
+            feature_names = [f["feature_id"] or str(f["feature_index"]) for f in float_features]
+
+        flat_index = {f["feature_index"]: f["flat_feature_index"] for f in float_features}
+        trees = dump["oblivious_trees"]
+        depth = max(len(tree["splits"]) for tree in trees)
+
+        unique_splits: dict[tuple[int, float], int] = {}
+        tree_splits = np.empty((len(trees), depth), dtype=np.intp)
+        leaf_values = np.zeros((len(trees), 1 << depth), dtype=np.float64)
+
+        for t, tree in enumerate(trees):
+            for level in range(depth):
+                if level < len(tree["splits"]):
+                    split = tree["splits"][level]
+
+                    if split.get("split_type", "FloatFeature") != "FloatFeature":
+                        raise ValueError(f"Тип сплита {split['split_type']} не поддерживается")
+
+                    key = (flat_index[split["float_feature_index"]], float(split["border"]))
+                else:
+                    # Неполное дерево: условие "> +inf" всегда ложно, старшие биты равны нулю.
+                    key = (0, float("inf"))
+
+                tree_splits[t, level] = unique_splits.setdefault(key, len(unique_splits))
+
+            values = np.asarray(tree["leaf_values"], dtype=np.float64)
+            leaf_values[t, : len(values)] = values
+
+        split_features = np.array([feature for feature, _ in unique_splits], dtype=np.intp)
+        split_borders = np.array([border for _, border in unique_splits], dtype=np.float32)
+
+        scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+        bias = bias[0] if isinstance(bias, list) else bias
+
+        return cls(
+            feature_names=feature_names,
+            split_features=split_features,
+            split_borders=split_borders,
+            tree_splits=tree_splits,
+            leaf_values=leaf_values,
+            scale=scale,
+            bias=bias,
+        )
+
+    def _as_matrix(self, features) -> np.ndarray:
+        if isinstance(features, pd.DataFrame):
+            features = features[self.feature_names]
+
+        matrix = np.asarray(features, dtype=np.float32)
+
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Ожидается матрица формы (n, {len(self.feature_names)}), получено {matrix.shape}"
+            )
+
+        return matrix
+
+    def predict_raw(self, features, chunk_size: int = 2048) -> np.ndarray:
+        """Сырое предсказание (логит) для каждой строки."""
+
+        matrix = self._as_matrix(features)
+        raw = np.empty(len(matrix), dtype=np.float64)
+
+        # Небольшие порции держат промежуточные матрицы в кэше процессора.
+        for start in range(0, len(matrix), chunk_size):
+            chunk = matrix[start : start + chunk_size]
+
+            # Все уникальные условия ансамбля вычисляются один раз на порцию.
+            conditions = np.greater(chunk[:, self.split_features], self.split_borders)
+
+            leaf_index = np.matmul(conditions.astype(np.float32), self._bit_weights).astype(np.intp)
+            leaf_index += self._leaf_offsets
+
+            np.take(self._flat_leaf_values, leaf_index).sum(axis=1, out=raw[start : start + len(chunk)])
+
+        return raw * self.scale + self.bias
+
+    def predict_proba(self, features, chunk_size: int = 2048) -> np.ndarray:
+        """Вероятности классов в формате CatBoostClassifier.predict_proba: (n, 2)."""
+
+        positive = 1.0 / (1.0 + np.exp(-self.predict_raw(features, chunk_size=chunk_size)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            feature_names=np.array(self.feature_names),
+            split_features=self.split_features,
+            split_borders=self.split_borders,
+            tree_splits=self.tree_splits,
+            leaf_values=self.leaf_values,
+            scale_and_bias=np.array([self.scale, self.bias]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ObliviousTreeEnsemble":
+        with np.load(path, allow_pickle=False) as data:
+            scale, bias = data["scale_and_bias"]
+
+            return cls(
+                feature_names=[str(name) for name in data["feature_names"]],
+                split_features=data["split_features"],
+                split_borders=data["split_borders"],
+                tree_splits=data["tree_splits"],
+                leaf_values=data["leaf_values"],
+                scale=scale,
+                bias=bias,
+            )
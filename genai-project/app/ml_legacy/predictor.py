@@ -7,35 +7,393 @@ ML Model & Interpretability
 
 from sklearn.metrics import accuracy_score, roc_auc_score
 from sklearn.model_selection import train_test_split
-from typing import Dict, List
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List
 import catboost as cb
+import numpy as np
 import pandas as pd
 import pickle
+import threading
 import os
 
-from app.ml_legacy.feature_contract import FEATURE_COLS, FEATURE_DEFAULTS, FAMILY_WITH_KIDS
-from app.core.enums import ShiftPreference
+from app.ml_legacy.feature_contract import (
+    FEATURE_COLS,
+    FEATURE_DEFAULTS,
+    DISCRETE_FEATURE_DOMAINS,
+    CONTINUOUS_FEATURE_RANGES,
+)
+from app.ml_legacy.oblivious import ObliviousTreeEnsemble, catboost_json_dump
+from app.ml_legacy import rules
+from app.ml_legacy.rules import FeatureColumns
+from app.ml_legacy.feature_vector import FeatureVector
+from app.core.cache import LRUCache
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_MODEL_PATH = os.path.join(CURRENT_DIR, "model.pkl")
 PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
 DEFAULT_DATA_PATH = os.path.join(PROJECT_ROOT, "data", "train_dataset.csv")
 
+# Пороги зон риска по вероятности удержания.
+LOW_RISK_THRESHOLD = 0.7
+MEDIUM_RISK_THRESHOLD = 0.4
+
+# Полуширина UX-коридора неопределённости для каждой зоны.
+REVIEW_MARGIN = 0.12
+MEDIUM_MARGIN = 0.08
+HIGH_MARGIN = 0.06
+LOW_MARGIN = 0.05
+
+# Размер кэшей мемоизации по умолчанию (на каждый из трёх кэшей предиктора).
+DEFAULT_CACHE_SIZE = 4096
+
+# Число корзин на каждый непрерывный признак в табличном режиме по умолчанию.
+DEFAULT_LOOKUP_RESOLUTION = 4
+
+UNCERTAINTY_NOTE = (
+    "Ориентировочный коридор неопределённости. "
+    "Это не строгий статистический доверительный интервал, "
+    "а UX-подсказка для HR-интерпретации результата."
+)
+
+
+def _split_border_usage(model: cb.CatBoostClassifier) -> dict[int, Counter]:
+    """Сколько раз каждая граница каждого признака используется в сплитах деревьев."""
+
+    usage: dict[int, Counter] = {}
+
+    for tree in catboost_json_dump(model)["oblivious_trees"]:
+        for split in tree["splits"]:
+            usage.setdefault(split["float_feature_index"], Counter())[split["border"]] += 1
+
+    return usage
+
+
+class PredictionGrid:
+    """
+    Предрасчитанная таблица вероятностей удержания по сетке признаков.
+
+    Дискретные признаки входят в сетку всеми значениями из
+    DISCRETE_FEATURE_DOMAINS. Непрерывные признаки (опыт, возраст, дорога,
+    зарплата) режутся на корзины по самым часто используемым в деревьях
+    границам сплитов. Модель прогоняется по всем узлам сетки один раз,
+    а дальше оценка кандидата — это индексация в компактный float16-массив.
+
+    Attributes
+    ----------
+    feature_names : list[str]
+        Порядок признаков (совпадает с порядком осей таблицы).
+    edges : dict[str, np.ndarray]
+        Границы корзин непрерывных признаков (значение > границы — правее).
+    table : np.ndarray
+        Вероятности удержания, по оси на каждый признак.
+    error_bound : dict | None
+        Измеренная ошибка относительно точной модели (см. measure_error).
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        edges: dict[str, np.ndarray],
+        table: np.ndarray,
+    ):
+        self.feature_names = list(feature_names)
+        self.edges = edges
+        self.table = table
+        self.error_bound = None
+
+        strides = np.array(table.strides, dtype=np.intp) // table.itemsize
+        discrete = [i for i, name in enumerate(self.feature_names) if name not in edges]
+
+        self._flat_table = table.reshape(-1)
+        self._discrete_columns = np.array(discrete, dtype=np.intp)
+        self._discrete_offsets = np.array(
+            [DISCRETE_FEATURE_DOMAINS[self.feature_names[i]][0] for i in discrete], dtype=np.intp
+        )
+        self._discrete_limits = np.array([table.shape[i] - 1 for i in discrete], dtype=np.intp)
+        self._discrete_strides = strides[discrete]
+        self._continuous_columns = [
+            (i, name) for i, name in enumerate(self.feature_names) if name in edges
+        ]
+        self._continuous_axes = [
+            (i, edges[name], strides[i])
+            for i, name in enumerate(self.feature_names)
+            if name in edges
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    @staticmethod
+    def _bucket_values(edges: np.ndarray, low: float, high: float) -> np.ndarray:
+        """Представитель каждой корзины: середина между соседними границами."""
+
+        if len(edges) == 0:
+            return np.array([(low + high) / 2.0])
+
+        first = (low + edges[0]) / 2.0 if low < edges[0] else edges[0] - 1.0
+        last = (edges[-1] + high) / 2.0 if high > edges[-1] else edges[-1] + 1.0
+        middle = (edges[:-1] + edges[1:]) / 2.0
+
+        return np.concatenate([[first], middle, [last]])
+
+    @classmethod
+    def build(
+        cls,
+        model: cb.CatBoostClassifier,
+        feature_names: list[str],
+        resolution: int | dict[str, int] = DEFAULT_LOOKUP_RESOLUTION,
+        chunk_size: int = 1_000_000,
+    ) -> "PredictionGrid":
+        """
+        Строит таблицу, прогоняя модель по всем узлам сетки порциями.
+
+        Parameters
+        ----------
+        model : cb.CatBoostClassifier
+            Обученная модель.
+        feature_names : list[str]
+            Порядок признаков модели.
+        resolution : int | dict[str, int]
+            Число корзин на непрерывный признак (одно на все или по имени).
+            Размер таблицы: 50688 * произведение корзин (float16).
+        chunk_size : int
+            Сколько узлов сетки оценивать за один вызов predict_proba.
+        """
+
+        if isinstance(resolution, int):
+            resolution = {name: resolution for name in CONTINUOUS_FEATURE_RANGES}
+
+        usage = _split_border_usage(model)
+        axes = []
+        edges = {}
+
+        for feature_idx, name in enumerate(feature_names):
+            if name in DISCRETE_FEATURE_DOMAINS:
+                axes.append(np.asarray(DISCRETE_FEATURE_DOMAINS[name], dtype=float))
+                continue
+
+            if name not in CONTINUOUS_FEATURE_RANGES:
+                raise ValueError(f"Признак {name} не поддерживается табличным режимом")
+
+            n_buckets = max(1, int(resolution.get(name, DEFAULT_LOOKUP_RESOLUTION)))
+            top_borders = usage.get(feature_idx, Counter()).most_common(n_buckets - 1)
+
+            feature_edges = np.sort(np.array([border for border, _ in top_borders], dtype=float))
+            low, high = CONTINUOUS_FEATURE_RANGES[name]
+
+            edges[name] = feature_edges
+            axes.append(cls._bucket_values(feature_edges, low, high))
+
+        shape = tuple(len(axis) for axis in axes)
+        total = int(np.prod(shape))
+        table = np.empty(total, dtype=np.float16)
+
+        for start in range(0, total, chunk_size):
+            flat_idx = np.arange(start, min(start + chunk_size, total))
+            axis_idx = np.unravel_index(flat_idx, shape)
+            grid_points = np.column_stack([axis[idx] for axis, idx in zip(axes, axis_idx)])
+            table[start:start + len(flat_idx)] = model.predict_proba(grid_points)[:, 1]
+
+        return cls(feature_names, edges, table.reshape(shape))
+
+    def _as_matrix(self, features: pd.DataFrame | np.ndarray) -> np.ndarray:
+        if isinstance(features, pd.DataFrame):
+            return features[self.feature_names].to_numpy(dtype=float)
+        return np.asarray(features, dtype=float)
+
+    def covers(self, features: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Маска строк внутри области таблицы: дискретные признаки — целые
+        значения из DISCRETE_FEATURE_DOMAINS, непрерывные — в пределах
+        CONTINUOUS_FEATURE_RANGES (там измеряется error_bound).
+        """
+
+        features = self._as_matrix(features)
+        discrete = features[:, self._discrete_columns]
+        positions = discrete - self._discrete_offsets
+
+        mask = (
+            (discrete == np.rint(discrete))
+            & (positions >= 0)
+            & (positions <= self._discrete_limits)
+        ).all(axis=1)
+
+        for column, name in self._continuous_columns:
+            low, high = CONTINUOUS_FEATURE_RANGES[name]
+            mask &= (features[:, column] >= low) & (features[:, column] <= high)
+
+        return mask
+
+    def lookup(self, features: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Вероятности удержания для строк (DataFrame или матрица в порядке feature_names).
+
+        Raises
+        ------
+        ValueError
+            Есть строки вне области таблицы (см. covers) — их нужно оценивать моделью.
+        """
+
+        features = self._as_matrix(features)
+        outside = np.flatnonzero(~self.covers(features))
+
+        if len(outside):
+            raise ValueError(f"Строки вне области таблицы: {outside[:10].tolist()}")
+
+        # Дискретные оси индексируются одной векторной операцией,
+        # непрерывные — бинарным поиском по границам корзин.
+        positions = np.rint(features[:, self._discrete_columns]).astype(np.intp)
+        positions -= self._discrete_offsets
+
+        flat_index = positions @ self._discrete_strides
+
+        for column, feature_edges, stride in self._continuous_axes:
+            flat_index += np.searchsorted(feature_edges, features[:, column], side="left") * stride
+
+        return self._flat_table[flat_index].astype(float)
+
+    def measure_error(self, model: cb.CatBoostClassifier, feature_df: pd.DataFrame) -> dict:
+        """Сравнивает табличные вероятности с точной моделью на выборке."""
+
+        feature_df = feature_df[self.covers(feature_df)]
+        exact = model.predict_proba(feature_df[self.feature_names])[:, 1]
+        abs_error = np.abs(self.lookup(feature_df) - exact)
+
+        return {
+            "rows": int(len(abs_error)),
+            "max_abs_error": float(abs_error.max()) if len(abs_error) else 0.0,
+            "mean_abs_error": float(abs_error.mean()) if len(abs_error) else 0.0,
+            "p99_abs_error": float(np.quantile(abs_error, 0.99)) if len(abs_error) else 0.0,
+        }
+
 
 class RetentionPredictor:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_factory: Callable[[], LRUCache] | None = None,
+        lookup_resolution: int | dict[str, int] | None = None,
+    ):
         self.model = None
         self.feature_names = None
-        self._prediction_cache = {}
-        self._explain_cache = {}
-        self._positive_cache = {}
+
+        # Табличный режим (PredictionGrid) включается, если задано разрешение сетки.
+        self.lookup_resolution = lookup_resolution
+        self.lookup: PredictionGrid | None = None
+
+        # NumPy-копия деревьев для пакетной оценки без CatBoost (строится лениво).
+        self._numpy_engine: ObliviousTreeEnsemble | None = None
+
+        # Кэши ограничены по размеру и сбрасываются при загрузке/обучении модели.
+        cache_factory = cache_factory or (lambda: LRUCache(max_size=DEFAULT_CACHE_SIZE))
+        self._prediction_cache = cache_factory()
+        self._explain_cache = cache_factory()
+        self._positive_cache = cache_factory()
+
+    def build_lookup(self, data_path=DEFAULT_DATA_PATH) -> PredictionGrid:
+        """
+        Предрасчитывает PredictionGrid для текущей модели и включает табличный режим.
+
+        Ошибка таблицы измеряется на строках датасета data_path (если он задан
+        и существует) и сохраняется в self.lookup.error_bound.
+        """
+
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
+
+        started = perf_counter()
+        grid = PredictionGrid.build(
+            self.model,
+            self.feature_names,
+            resolution=self.lookup_resolution or DEFAULT_LOOKUP_RESOLUTION,
+        )
+        build_time = perf_counter() - started
+
+        if data_path is not None and os.path.exists(data_path):
+            sample = pd.read_csv(data_path)
+            grid.error_bound = grid.measure_error(self.model, sample)
+
+        print(
+            f"Lookup table built in {build_time:.1f} sec "
+            f"({grid.table.size} cells, {grid.nbytes / 1024**2:.1f} MiB), "
+            f"error bound: {grid.error_bound}"
+        )
+
+        self.lookup = grid
+        self.invalidate_caches()
+        return grid
+
+    def numpy_engine(self) -> ObliviousTreeEnsemble:
+        """NumPy-движок для текущей модели (см. app.ml_legacy.oblivious)."""
+
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
+
+        if self._numpy_engine is None:
+            self._numpy_engine = ObliviousTreeEnsemble.from_catboost(
+                self.model, self.feature_names
+            )
+
+        return self._numpy_engine
+
+    def _predict_proba(self, feature_df: pd.DataFrame | np.ndarray, engine: str = "catboost") -> np.ndarray:
+        if self.lookup is None:
+            return self._predict_exact(feature_df, engine)
+
+        # Строки вне области таблицы (например, навыков больше 10) — точной моделью.
+        covered = self.lookup.covers(feature_df)
+        if covered.all():
+            return self.lookup.lookup(feature_df)
+
+        rows = feature_df.iloc if isinstance(feature_df, pd.DataFrame) else feature_df
+        proba = np.empty(len(covered), dtype=float)
+        if covered.any():
+            proba[covered] = self.lookup.lookup(rows[covered])
+        proba[~covered] = self._predict_exact(rows[~covered], engine)
+        return proba
+
+    def _predict_exact(self, feature_df: pd.DataFrame | np.ndarray, engine: str = "catboost") -> np.ndarray:
+        if engine == "numpy":
+            return self.numpy_engine().predict_proba(feature_df)[:, 1]
+
+        if engine != "catboost":
+            raise ValueError(f"Неизвестный движок оценки: {engine}")
+
+        return self.model.predict_proba(feature_df)[:, 1].astype(float)
+
+    def invalidate_caches(self) -> None:
+        self._prediction_cache.clear()
+        self._explain_cache.clear()
+        self._positive_cache.clear()
+
+    def cache_stats(self) -> dict:
+        return {
+            "prediction": self._prediction_cache.stats(),
+            "explain": self._explain_cache.stats(),
+            "positive": self._positive_cache.stats(),
+        }
 
     def _map_risk_level(self, retention_probability: float) -> str:
-        if retention_probability >= 0.7:
+        if retention_probability >= LOW_RISK_THRESHOLD:
             return "LOW"
-        if retention_probability >= 0.4:
+        if retention_probability >= MEDIUM_RISK_THRESHOLD:
             return "MEDIUM"
         return "HIGH"
+
+    def _map_risk_levels(
+        self, retention_probability: np.ndarray, requires_review: np.ndarray
+    ) -> np.ndarray:
+        """Векторная версия _map_risk_level с учётом Yellow Zone для requires_review."""
+        return np.select(
+            [
+                requires_review,
+                retention_probability >= LOW_RISK_THRESHOLD,
+                retention_probability >= MEDIUM_RISK_THRESHOLD,
+            ],
+            ["MEDIUM", "LOW", "MEDIUM"],
+            default="HIGH",
+        ).astype(object)
     
     def _detect_requires_review(self, features: Dict) -> bool:
         return features.get("years_experience", 0) <= 0
@@ -55,262 +413,95 @@ class RetentionPredictor:
         """
 
         if requires_review:
-            margin = 0.12
-        elif 0.4 <= retention_probability < 0.7:
-            margin = 0.08
-        elif retention_probability < 0.4:
-            margin = 0.06
+            margin = REVIEW_MARGIN
+        elif MEDIUM_RISK_THRESHOLD <= retention_probability < LOW_RISK_THRESHOLD:
+            margin = MEDIUM_MARGIN
+        elif retention_probability < MEDIUM_RISK_THRESHOLD:
+            margin = HIGH_MARGIN
         else:
-            margin = 0.05
+            margin = LOW_MARGIN
 
         return {
             "uncertainty_low": max(0.0, retention_probability - margin),
             "uncertainty_high": min(1.0, retention_probability + margin),
             "uncertainty_margin": margin,
-            "uncertainty_note": (
-                "Ориентировочный коридор неопределённости. "
-                "Это не строгий статистический доверительный интервал, "
-                "а UX-подсказка для HR-интерпретации результата."
-            ),
-        }
-
-    def _prepare_feature_df(self, features: Dict) -> pd.DataFrame:
-        features = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
-        }
-
-        required_features = set(self.feature_names or [])
-        missing = required_features - set(features.keys())
-
-        if missing:
-            raise ValueError(f"Отсутствуют признаки для модели: {sorted(missing)}")
-
-        return pd.DataFrame([features])[self.feature_names]
-
-    def _rule_based_weighted_risks(self, features: Dict) -> List[str]:
-        features = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
+            "uncertainty_note": UNCERTAINTY_NOTE,
         }
 
-        scored_risks = []
-
-        def add(condition: bool, weight: float, text: str):
-            if condition:
-                scored_risks.append((weight, text))
-
-        add(
-            features.get("years_experience", 0) <= 0,
-            3.5,
-            "Требуется уточнение опыта",
+    def _estimate_uncertainty_bands(
+        self, retention_probability: np.ndarray, requires_review: np.ndarray
+    ) -> dict:
+        """Векторная версия _estimate_uncertainty_band: колонки вместо скаляров."""
+        margin = np.select(
+            [
+                requires_review,
+                retention_probability < MEDIUM_RISK_THRESHOLD,
+                retention_probability < LOW_RISK_THRESHOLD,
+            ],
+            [REVIEW_MARGIN, HIGH_MARGIN, MEDIUM_MARGIN],
+            default=LOW_MARGIN,
         )
 
-        add(
-            features.get("commute_time_minutes", 0) > 120,
-            3.0,
-            "Очень длинная дорога до работы",
-        )
-        add(
-            90 < features.get("commute_time_minutes", 0) <= 120,
-            2.2,
-            "Дорога на работу занимает больше 90 минут",
-        )
-        add(
-            60 < features.get("commute_time_minutes", 0) <= 90,
-            1.0,
-            "Длительное время в пути до работы",
-        )
+        return {
+            "uncertainty_low": np.maximum(0.0, retention_probability - margin),
+            "uncertainty_high": np.minimum(1.0, retention_probability + margin),
+            "uncertainty_margin": margin,
+            "uncertainty_note": UNCERTAINTY_NOTE,
+        }
 
-        add(
-            features.get("skills_verified_count", 0) < 3,
-            2.6,
-            "Мало проверенных навыков (меньше 3)",
-        )
-        add(
-            3 <= features.get("skills_verified_count", 0) < 5,
-            1.1,
-            "Недостаточно подтвержденных навыков",
-        )
+    def _prepare_feature_row(self, features: FeatureVector) -> np.ndarray:
+        """Одна строка (1, n) в порядке self.feature_names без построения DataFrame."""
 
-        add(
-            features.get("shift_preference") == ShiftPreference.NIGHT_ONLY.value
-            and features.get("age", 0) > 50,
-            2.0,
-            "Возраст 50+ при выборе только ночных смен",
-        )
+        return features.as_array(self.feature_names)[None, :]
 
-        add(
-            features.get("years_experience", 0) < 2
-            and features.get("salary_expectation", 0) > 100000,
-            1.8,
-            "Мало опыта при высоких зарплатных ожиданиях",
-        )
+    def _prepare_feature_matrix(
+        self, features: pd.DataFrame | np.ndarray | Iterable[Dict]
+    ) -> pd.DataFrame:
+        """
+        Приводит пачку кандидатов к DataFrame в порядке self.feature_names.
 
-        add(
-            not features.get("has_certifications", False)
-            and features.get("skills_verified_count", 0) > 5,
-            1.4,
-            "Много навыков без подтверждающих сертификатов",
-        )
+        Принимает DataFrame (недостающие поля заполняются FEATURE_DEFAULTS),
+        двумерную NumPy-матрицу с колонками в порядке feature_names
+        или последовательность словарей признаков.
+        """
 
-        add(
-            features.get("previous_turnovers", 0) > 3,
-            3.2,
-            "Частая смена прошлых мест работы",
-        )
+        feature_names = self.feature_names or FEATURE_COLS
 
-        add(
-            2 <= features.get("previous_turnovers", 0) <= 3,
-            1.6,
-            "Есть история частой смены работы",
-        )
+        if isinstance(features, np.ndarray):
+            if features.ndim != 2 or features.shape[1] != len(feature_names):
+                raise ValueError(
+                    "Матрица признаков должна иметь форму "
+                    f"(n, {len(feature_names)}), получено {features.shape}"
+                )
+            return pd.DataFrame(features, columns=feature_names)
 
-        add(
-            features.get("family_status") in FAMILY_WITH_KIDS
-            and features.get("shift_preference") == ShiftPreference.NIGHT_ONLY.value,
-            2.5,
-            "Семейная нагрузка при выборе ночных смен",
-        )
+        if isinstance(features, pd.DataFrame):
+            frame = features.copy()
+        else:
+            frame = pd.DataFrame(
+                [{**FEATURE_DEFAULTS, **dict(row)} for row in features]
+            )
 
-        add(
-            not features.get("has_transport", False)
-            and features.get("commute_time_minutes", 0) > 60,
-            2.0,
-            "Нет личного транспорта при долгой дороге",
-        )
+        for name, default in FEATURE_DEFAULTS.items():
+            if name not in frame.columns:
+                frame[name] = default
 
-        add(
-            features.get("housing_type") == 2,
-            1.2,
-            "Нестабильные жилищные условия",
-        )
+        missing = set(feature_names) - set(frame.columns)
 
-        add(
-            features.get("education_level") == 0
-            and features.get("skills_verified_count", 0) < 3,
-            1.0,
-            "Низкий уровень образования при малом числе подтверждённых навыков",
-        )
+        if missing:
+            raise ValueError(f"Отсутствуют признаки для модели: {sorted(missing)}")
 
-        scored_risks.sort(key=lambda x: x[0], reverse=True)
+        return frame[feature_names]
 
-        result = []
-        seen = set()
-        for _, text in scored_risks:
-            if text not in seen:
-                result.append(text)
-                seen.add(text)
-            if len(result) == 3:
-                break
-
-        return result
+    def _rule_based_weighted_risks(self, features: Dict | FeatureVector) -> List[str]:
+        return rules.weighted_risks(FeatureColumns.from_features(features))[0]
 
     def _format_feature_risk(
-        self, feature_name: str, value, features: Dict
+        self, feature_name: str, value, features: Dict | FeatureVector
     ) -> str | None:
-        features = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
-        }
-
-        if feature_name == "commute_time_minutes":
-            if value > 120:
-                return "Очень длинная дорога до работы"
-            if value > 90:
-                return "Дорога на работу занимает больше 90 минут"
-            if value > 60:
-                return "Длительное время в пути до работы"
-            return None
-
-        if feature_name == "skills_verified_count":
-            if value < 3:
-                return "Мало проверенных навыков (меньше 3)"
-            if value < 5:
-                return "Недостаточно подтвержденных навыков"
-            return None
-
-        if feature_name == "shift_preference":
-            if (
-                value == ShiftPreference.NIGHT_ONLY.value
-                and features.get("age", 0) > 50
-            ):
-                return "Возраст 50+ при выборе только ночных смен"
-            return None
-
-        if feature_name == "years_experience":
-            if value <= 0:
-                return "Требуется уточнение опыта"
-            if value < 2 and features.get("salary_expectation", 0) > 100000:
-                return "Мало опыта при высоких зарплатных ожиданиях"
-            if value < 3:
-                return "Невысокий релевантный опыт"
-            return None
-
-        if feature_name == "salary_expectation":
-            if features.get("years_experience", 0) < 2 and value > 100000:
-                return "Высокие зарплатные ожидания для текущего опыта"
-            return None
-
-        if feature_name == "has_certifications":
-            if not bool(value) and features.get("skills_verified_count", 0) > 5:
-                return "Много навыков без подтверждающих сертификатов"
-            if not bool(value):
-                return "Нет подтверждающих сертификатов"
-            return None
-
-        if feature_name == "age":
-            if (
-                features.get("shift_preference") == ShiftPreference.NIGHT_ONLY.value
-                and value > 50
-            ):
-                return "Возраст усиливает риск при ночном графике"
-            return None
-
-        if feature_name == "previous_turnovers":
-            if value > 3:
-                return "Частая смена прошлых мест работы"
-            if value >= 2:
-                return "Есть история частой смены работы"
-            return None
-
-        if feature_name == "family_status":
-            if (
-                value in FAMILY_WITH_KIDS
-                and features.get("shift_preference") == ShiftPreference.NIGHT_ONLY.value
-            ):
-                return "Семейная нагрузка при выборе ночных смен"
-            return None
-
-        if feature_name == "housing_type":
-            if value == 2:
-                return "Нестабильные жилищные условия"
-            return None
-
-        if feature_name == "has_transport":
-            if (
-                not bool(value)
-                and features.get("commute_time_minutes", 0) > 60
-            ):
-                return "Нет личного транспорта при долгой дороге"
-            return None
-
-        if feature_name == "education_level":
-            if value == 0 and features.get("skills_verified_count", 0) < 3:
-                return "Низкий уровень образования при малом числе подтверждённых навыков"
-            return None
-
-        return None
-
-    def _feature_cache_key(self, features: Dict) -> tuple:
-        prepared = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
-        }
-
-        names = self.feature_names or FEATURE_COLS
-
-        return tuple((name, prepared.get(name)) for name in names)
+        features = FeatureVector.from_mapping(features).replace(**{feature_name: value})
+        columns = FeatureColumns.from_features(features)
+        return rules.feature_risk_messages(columns, [feature_name])[feature_name][0]
     
     def train_model(self, data_path=DEFAULT_DATA_PATH):
 
@@ -360,6 +551,9 @@ class RetentionPredictor:
         )
 
         self.model.fit(X_train, y_train, eval_set=(X_test, y_test))
+        self.invalidate_caches()
+        self.lookup = None
+        self._numpy_engine = None
 
         y_pred = self.model.predict(X_test)
         y_pred_proba = self.model.predict_proba(X_test)[:, 1]
@@ -370,19 +564,12 @@ class RetentionPredictor:
         print(f"Точность модели: {accuracy:.3f}")
         print(f"ROC-AUC: {roc_auc:.3f}")
 
-        return self.model
+        if self.lookup_resolution:
+            self.build_lookup(data_path)
 
-    def predict_retention(self, features: Dict):
-        if self.model is None:
-            raise ValueError("Model is not loaded or trained.")
-
-        cache_key = self._feature_cache_key(features)
-
-        if cache_key in self._prediction_cache:
-            return dict(self._prediction_cache[cache_key])
+        return self.model
 
-        feature_df = self._prepare_feature_df(features)
-        retention_prob = float(self.model.predict_proba(feature_df)[0, 1])
+    def _build_prediction(self, retention_prob: float, features: Dict) -> dict:
         requires_review = self._detect_requires_review(features)
 
         # Edge Case вшит в бизнес-логику:
@@ -398,7 +585,7 @@ class RetentionPredictor:
             requires_review=requires_review,
         )
 
-        result = {
+        return {
             "retention_probability": retention_prob,
             "will_stay": bool(retention_prob > 0.5),
             "risk_level": risk_level,
@@ -406,87 +593,276 @@ class RetentionPredictor:
             **uncertainty,
         }
 
-        self._prediction_cache[cache_key] = dict(result)
+    def predict_retention(self, features: Dict | FeatureVector):
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
+
+        features = FeatureVector.from_mapping(features)
+
+        cached = self._prediction_cache.get(features)
+
+        if cached is not None:
+            return dict(cached)
+
+        retention_prob = float(self._predict_proba(self._prepare_feature_row(features))[0])
+
+        result = self._build_prediction(retention_prob, features)
+
+        self._prediction_cache.put(features, dict(result))
 
         return result
 
-    def explain_prediction(self, features: Dict) -> List[str]:
-        features = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
+    def score(self, features: Dict | FeatureVector) -> dict:
+        """
+        Оценка удержания и объяснение рисков за один проход модели.
+
+        Для Logloss сумма SHAP-вкладов строки вместе с bias равна сырому логиту,
+        поэтому вероятность удержания берётся из того же вызова ShapValues,
+        что и факторы риска, без отдельного predict_proba. В табличном режиме
+        вероятность берётся из PredictionGrid, как в predict_retention.
+
+        Parameters
+        ----------
+        features : Dict | FeatureVector
+            Признаки кандидата (недостающие берутся из FEATURE_DEFAULTS).
+
+        Returns
+        -------
+        dict
+            Поля predict_retention плюс "risk_factors" из explain_prediction.
+        """
+
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
+
+        features = FeatureVector.from_mapping(features)
+
+        cached_prediction = self._prediction_cache.get(features)
+        cached_risks = self._explain_cache.get(features)
+
+        if cached_prediction is not None and cached_risks is not None:
+            return {**cached_prediction, "risk_factors": list(cached_risks)}
+
+        try:
+            pool = cb.Pool(self._prepare_feature_row(features))
+            shap_row = self.model.get_feature_importance(pool, type="ShapValues")[0]
+
+        # Если SHAP недоступен, остаёмся на двух отдельных (но устойчивых) вызовах.
+        except (
+            ValueError,
+            KeyError,
+            TypeError,
+            IndexError,
+            AttributeError,
+            cb.CatBoostError,
+        ) as e:
+            print(f"Single-pass scoring fallback activated: {e}")
+            return {
+                **self.predict_retention(features),
+                "risk_factors": self.explain_prediction(features),
+            }
+
+        if self.lookup is not None:
+            retention_prob = float(self._predict_proba(self._prepare_feature_row(features))[0])
+        else:
+            retention_prob = float(1.0 / (1.0 + np.exp(-shap_row.sum())))
+        prediction = self._build_prediction(retention_prob, features)
+
+        columns = FeatureColumns.from_features(features)
+        contributions = self._shap_contributions(
+            shap_row[:-1], rules.feature_risk_messages(columns, self.feature_names), 0
+        )
+        risk_factors = self._merge_risks(
+            contributions,
+            rules.weighted_risks(columns)[0],
+            prediction["requires_review"],
+        )
+
+        self._prediction_cache.put(features, dict(prediction))
+        self._explain_cache.put(features, list(risk_factors))
+
+        return {**prediction, "risk_factors": risk_factors}
+
+    def predict_retention_batch(
+        self,
+        features: pd.DataFrame | np.ndarray | Iterable[Dict],
+        engine: str = "catboost",
+    ) -> dict:
+        """
+        Векторный аналог predict_retention для пачки кандидатов.
+
+        Вся пачка оценивается одним вызовом predict_proba, а бизнес-правила
+        (зоны риска, requires_review, коридор неопределённости) считаются
+        над NumPy-колонками. Результат построчно совпадает со скалярным путём.
+
+        Parameters
+        ----------
+        features : pd.DataFrame | np.ndarray | Iterable[Dict]
+            Кандидаты: DataFrame с колонками признаков, матрица в порядке
+            feature_names или последовательность словарей признаков.
+        engine : str
+            "catboost" — вызов model.predict_proba, "numpy" — ObliviousTreeEnsemble
+            (без накладных расходов CatBoost на больших матрицах).
+
+        Returns
+        -------
+        dict
+            Те же ключи, что и у predict_retention, но значениями являются
+            NumPy-массивы длины n (кроме строки uncertainty_note).
+        """
+
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
+
+        feature_df = self._prepare_feature_matrix(features)
+
+        if feature_df.empty:
+            retention_prob = np.empty(0, dtype=float)
+        else:
+            retention_prob = self._predict_proba(feature_df, engine=engine)
+
+        requires_review = feature_df["years_experience"].to_numpy(dtype=float) <= 0
+
+        return self._build_predictions(retention_prob, requires_review)
+
+    def _build_predictions(
+        self, retention_prob: np.ndarray, requires_review: np.ndarray
+    ) -> dict:
+        """Векторная версия _build_prediction: колонки вместо скаляров."""
+
+        return {
+            "retention_probability": retention_prob,
+            "will_stay": retention_prob > 0.5,
+            "risk_level": self._map_risk_levels(retention_prob, requires_review),
+            "requires_review": requires_review,
+            **self._estimate_uncertainty_bands(retention_prob, requires_review),
         }
 
-        requires_review = self._detect_requires_review(features)
-        cache_key = self._feature_cache_key(features)
+    def score_batch(
+        self, features: pd.DataFrame | np.ndarray | Iterable[Dict]
+    ) -> dict:
+        """
+        Пакетный аналог score: оценка и факторы риска за один вызов ShapValues.
+
+        Parameters
+        ----------
+        features : pd.DataFrame | np.ndarray | Iterable[Dict]
+            Кандидаты в любом формате, который принимает predict_retention_batch.
+
+        Returns
+        -------
+        dict
+            Колонки predict_retention_batch плюс "risk_factors" —
+            список топ-3 рисков для каждой строки.
+        """
 
-        if cache_key in self._explain_cache:
-            return list(self._explain_cache[cache_key])
+        if self.model is None:
+            raise ValueError("Model is not loaded or trained.")
 
-        if self.model is None or not self.feature_names:
-            result = self._rule_based_weighted_risks(features)
+        feature_df = self._prepare_feature_matrix(features)
+        shap_matrix = self._shap_matrix(feature_df)
 
-            if requires_review and "Требуется уточнение опыта" not in result:
-                result.insert(0, "Требуется уточнение опыта")
+        # Если SHAP недоступен, остаёмся на двух отдельных пакетных вызовах.
+        if shap_matrix is None:
+            return {
+                **self.predict_retention_batch(feature_df),
+                "risk_factors": self.explain_prediction_batch(feature_df),
+            }
 
-            final_result = result[:3]
-            self._explain_cache[cache_key] = list(final_result)
-            return final_result
+        if self.lookup is not None:
+            retention_prob = self._predict_proba(feature_df)
+        else:
+            retention_prob = 1.0 / (1.0 + np.exp(-shap_matrix.sum(axis=1)))
+        requires_review = feature_df["years_experience"].to_numpy(dtype=float) <= 0
 
-        try:
-            feature_df = self._prepare_feature_df(features)
-            pool = cb.Pool(feature_df)
+        return {
+            **self._build_predictions(retention_prob, requires_review),
+            "risk_factors": self._risks_from_shap(feature_df, shap_matrix[:, :-1]),
+        }
 
-            shap_values = self.model.get_feature_importance(pool, type="ShapValues")
-            shap_row = shap_values[0][:-1]  # последний элемент — bias
+    def _shap_contributions(
+        self, shap_row: np.ndarray, messages: Dict[str, np.ndarray], row: int
+    ) -> list[tuple[float, str]]:
+        """
+        Переводит негативные SHAP-вклады строки row в (вес, текст риска).
 
-            contributions = []
+        messages — тексты рисков по признакам для всей пачки
+        (rules.feature_risk_messages), поэтому здесь только индексация.
+        """
 
-            for feature_name, shap_value in zip(self.feature_names, shap_row):
-                # Берем только негативные вклады в класс "удержится"
-                if shap_value >= -1e-6:
-                    continue
+        contributions = []
 
-                message = self._format_feature_risk(
-                    feature_name=feature_name,
-                    value=feature_df.iloc[0][feature_name],
-                    features=features,
-                )
+        # Берем только негативные вклады в класс "удержится"
+        for idx in np.flatnonzero(shap_row < -1e-6):
+            message = messages[self.feature_names[idx]][row]
+
+            if message:
+                contributions.append((abs(float(shap_row[idx])), message))
+
+        return contributions
+
+    def _merge_risks(
+        self,
+        contributions: list[tuple[float, str]],
+        fallback_risks: List[str],
+        requires_review: bool,
+    ) -> List[str]:
+        """Топ-3 модельных риска, дополненные rule-based рисками до трёх."""
+
+        contributions = sorted(contributions, key=lambda x: x[0], reverse=True)
+
+        model_risks = []
+        seen = set()
+
+        for _, message in contributions:
+            if message not in seen:
+                model_risks.append(message)
+                seen.add(message)
 
-                if message:
-                    contributions.append((abs(float(shap_value)), message))
+            if len(model_risks) == 3:
+                break
+
+        result = []
 
-            if contributions:
-                contributions.sort(key=lambda x: x[0], reverse=True)
+        for risk in model_risks + fallback_risks:
+            if risk not in result:
+                result.append(risk)
+
+            if len(result) == 3:
+                break
 
-                model_risks = []
-                seen = set()
+        if requires_review and rules.REVIEW_RISK not in result:
+            result.insert(0, rules.REVIEW_RISK)
 
-                for _, message in contributions:
-                    if message not in seen:
-                        model_risks.append(message)
-                        seen.add(message)
+        return result[:3]
 
-                    if len(model_risks) == 3:
-                        break
+    def explain_prediction(self, features: Dict | FeatureVector) -> List[str]:
+        features = FeatureVector.from_mapping(features)
 
-                fallback_risks = self._rule_based_weighted_risks(features)
+        requires_review = self._detect_requires_review(features)
 
-                result = []
+        cached = self._explain_cache.get(features)
 
-                for risk in model_risks + fallback_risks:
-                    if risk not in result:
-                        result.append(risk)
+        if cached is not None:
+            return list(cached)
 
-                    if len(result) == 3:
-                        break
+        columns = FeatureColumns.from_features(features)
+        fallback_risks = rules.weighted_risks(columns)[0]
 
-                if requires_review and "Требуется уточнение опыта" not in result:
-                    result.insert(0, "Требуется уточнение опыта")
+        if self.model is None or not self.feature_names:
+            final_result = self._merge_risks([], fallback_risks, requires_review)
+            self._explain_cache.put(features, list(final_result))
+            return final_result
 
-                if result:
-                    final_result = result[:3]
-                    self._explain_cache[cache_key] = list(final_result)
-                    return final_result
+        try:
+            pool = cb.Pool(self._prepare_feature_row(features))
+
+            shap_values = self.model.get_feature_importance(pool, type="ShapValues")
+            shap_row = shap_values[0][:-1]  # последний элемент — bias
+
+            contributions = self._shap_contributions(
+                shap_row, rules.feature_risk_messages(columns, self.feature_names), 0
+            )
 
         # SHAP-объяснение — best effort.
         # Если модельная интерпретация не сработала из-за проблем с признаками
@@ -500,56 +876,113 @@ class RetentionPredictor:
             cb.CatBoostError,
         ) as e:
             print(f"Explain fallback activated: {e}")
+            contributions = []
 
-        result = self._rule_based_weighted_risks(features)
+        final_result = self._merge_risks(contributions, fallback_risks, requires_review)
+        self._explain_cache.put(features, list(final_result))
 
-        if requires_review and "Требуется уточнение опыта" not in result:
-            result.insert(0, "Требуется уточнение опыта")
+        return final_result
 
-        final_result = result[:3]
-        self._explain_cache[cache_key] = list(final_result)
+    def explain_prediction_batch(
+        self, features: pd.DataFrame | np.ndarray | Iterable[Dict]
+    ) -> List[List[str]]:
+        """
+        Пакетный аналог explain_prediction.
+
+        ShapValues для всех строк считаются одним проходом по одному cb.Pool,
+        тексты рисков по признакам и rule-based риски — булевыми масками
+        над всей пачкой (app.ml_legacy.rules). Для каждой строки результат
+        совпадает со скалярным explain_prediction.
+
+        Parameters
+        ----------
+        features : pd.DataFrame | np.ndarray | Iterable[Dict]
+            Кандидаты в любом формате, который принимает predict_retention_batch.
+
+        Returns
+        -------
+        List[List[str]]
+            Топ-3 факторов риска для каждой строки в исходном порядке.
+        """
 
-        return final_result
+        feature_df = self._prepare_feature_matrix(features)
+        shap_matrix = self._shap_matrix(feature_df)
 
-    def explain_positive_factors(self, features: Dict) -> List[str]:
-        features = {
-            **FEATURE_DEFAULTS,
-            **dict(features),
-        }
+        return self._risks_from_shap(
+            feature_df, shap_matrix[:, :-1] if shap_matrix is not None else None
+        )
 
-        cache_key = self._feature_cache_key(features)
+    def _shap_matrix(self, feature_df: pd.DataFrame) -> np.ndarray | None:
+        """ShapValues пачки одним cb.Pool (последняя колонка — bias) или None."""
 
-        if cache_key in self._positive_cache:
-            return list(self._positive_cache[cache_key])
+        if self.model is None or not self.feature_names or not len(feature_df):
+            return None
 
-        positives = []
+        try:
+            pool = cb.Pool(feature_df)
+            return self.model.get_feature_importance(pool, type="ShapValues")
 
-        if features.get("skills_verified_count", 0) >= 7:
-            positives.append("Много подтверждённых навыков")
+        except (
+            ValueError,
+            KeyError,
+            TypeError,
+            IndexError,
+            AttributeError,
+            cb.CatBoostError,
+        ) as e:
+            print(f"Explain fallback activated: {e}")
+            return None
 
-        if features.get("years_experience", 0) >= 5:
-            positives.append("Хороший релевантный опыт")
+    def _risks_from_shap(
+        self, feature_df: pd.DataFrame, shap_matrix: np.ndarray | None
+    ) -> List[List[str]]:
+        """Топ-3 рисков каждой строки по SHAP-вкладам (без bias) и таблице правил."""
 
-        if features.get("commute_time_minutes", 999) <= 40:
-            positives.append("Короткая дорога до работы")
+        columns = FeatureColumns.from_frame(feature_df)
 
-        if features.get("has_certifications", False):
-            positives.append("Есть подтверждающие сертификаты")
+        fallback_risks = rules.weighted_risks(columns)
+        requires_review = columns.get("years_experience") <= 0
+        messages = (
+            rules.feature_risk_messages(columns, self.feature_names)
+            if shap_matrix is not None
+            else None
+        )
 
-        if features.get("has_transport", False):
-            positives.append("Есть личный транспорт")
+        results = []
 
-        if features.get("previous_turnovers", 99) <= 1:
-            positives.append("Нет частой смены рабочих мест")
+        for i in range(len(feature_df)):
+            contributions = (
+                self._shap_contributions(shap_matrix[i], messages, i)
+                if shap_matrix is not None
+                else []
+            )
+            results.append(
+                self._merge_risks(contributions, fallback_risks[i], bool(requires_review[i]))
+            )
 
-        if features.get("housing_type") == 0:
-            positives.append("Стабильные жилищные условия")
+        return results
 
-        result = positives[:3]
-        self._positive_cache[cache_key] = list(result)
+    def explain_positive_factors(self, features: Dict | FeatureVector) -> List[str]:
+        features = FeatureVector.from_mapping(features)
+
+        cached = self._positive_cache.get(features)
+
+        if cached is not None:
+            return list(cached)
+
+        result = rules.positive_factors(FeatureColumns.from_features(features))[0]
+        self._positive_cache.put(features, list(result))
 
         return result
 
+    def explain_positive_factors_batch(
+        self, features: pd.DataFrame | np.ndarray | Iterable[Dict]
+    ) -> List[List[str]]:
+        """Пакетный аналог explain_positive_factors (одна маска на правило)."""
+
+        feature_df = self._prepare_feature_matrix(features)
+        return rules.positive_factors(FeatureColumns.from_frame(feature_df))
+
     def save_model(self, path=DEFAULT_MODEL_PATH):
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
@@ -557,8 +990,19 @@ class RetentionPredictor:
             pickle.dump({"model": self.model, "feature_names": self.feature_names}, f)
         print(f"Model saved explicitly to: {path}")
 
-    def load_model(self, path=DEFAULT_MODEL_PATH):
-        """Загрузка обученной модели. Возвращает False, если файл отсутствует или поврежден."""
+    def load_model(self, path=DEFAULT_MODEL_PATH, data_path=None):
+        """
+        Загрузка обученной модели. Возвращает False, если файл отсутствует или поврежден.
+
+        data_path — датасет этой модели для измерения ошибки PredictionGrid;
+        по умолчанию DEFAULT_DATA_PATH только для DEFAULT_MODEL_PATH, для
+        остальных моделей ошибка таблицы не измеряется.
+        """
+        # Закэшированные ответы и таблица относятся к предыдущей модели.
+        self.invalidate_caches()
+        self.lookup = None
+        self._numpy_engine = None
+
         if not os.path.exists(path):
             print(f"Model file not found at {path}")
             self.model = None
@@ -579,13 +1023,59 @@ class RetentionPredictor:
             
             self.model = model
             self.feature_names = feature_names
-            return True
         except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError) as e:
             print(f"Failed to load model from {path}: {e}")
             self.model = None
             self.feature_names = None
             return False
 
+        if self.lookup_resolution:
+            if data_path is None and os.path.abspath(path) == os.path.abspath(DEFAULT_MODEL_PATH):
+                data_path = DEFAULT_DATA_PATH
+            self.build_lookup(data_path)
+
+        return True
+
+
+class SharedPredictor:
+    """
+    Общий на процесс владелец обученного RetentionPredictor.
+
+    Модель загружается один раз (при старте приложения), а запросы получают
+    готовый экземпляр через get(). Перезагрузка собирает новый предиктор
+    целиком и только потом подменяет ссылку, поэтому конкурентные запросы
+    всегда видят либо старую, либо новую модель, но не полузагруженную.
+    """
+
+    def __init__(
+        self,
+        predictor: RetentionPredictor | None = None,
+        predictor_factory: Callable[[], RetentionPredictor] = RetentionPredictor,
+    ):
+        self._predictor = predictor
+        self._predictor_factory = predictor_factory
+        self._swap_lock = threading.Lock()
+
+    def get(self) -> RetentionPredictor | None:
+        return self._predictor
+
+    def swap(self, predictor: RetentionPredictor) -> RetentionPredictor | None:
+        """Атомарно подменяет текущий предиктор. Возвращает предыдущий."""
+        with self._swap_lock:
+            previous = self._predictor
+            self._predictor = predictor
+        return previous
+
+    def load(self, path=DEFAULT_MODEL_PATH) -> bool:
+        """Загружает модель в новый предиктор и подменяет текущий при успехе."""
+        predictor = self._predictor_factory()
+
+        if not predictor.load_model(path):
+            return False
+
+        self.swap(predictor)
+        return True
+
 
 def train_if_needed():
     model_path = DEFAULT_MODEL_PATH
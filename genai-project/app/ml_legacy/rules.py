@@ -0,0 +1,303 @@
+"""
+Rule Engine for risk and positive factors
+Декларативные таблицы правил (условие, вес, текст) и их векторная оценка
+над пачкой кандидатов через булевы маски NumPy.
+"""
+
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app.ml_legacy.feature_contract import FEATURE_DEFAULTS, FAMILY_WITH_KIDS
+from app.ml_legacy.feature_vector import FeatureVector
+from app.core.enums import ShiftPreference
+
+NIGHT_ONLY = ShiftPreference.NIGHT_ONLY.value
+REVIEW_RISK = "Требуется уточнение опыта"
+
+
+class FeatureColumns:
+    """
+    Признаки пачки кандидатов в виде колонок NumPy.
+
+    get(name, default) возвращает колонку или, если признака нет ни у одного
+    кандидата, колонку из значения по умолчанию — так же, как dict.get
+    в скалярных правилах.
+    """
+
+    __slots__ = ("columns", "size")
+
+    def __init__(self, columns: Dict[str, np.ndarray], size: int):
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "FeatureColumns":
+        return cls({name: frame[name].to_numpy() for name in frame.columns}, len(frame))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "FeatureColumns":
+        records = [{**FEATURE_DEFAULTS, **dict(record)} for record in records]
+        return cls.from_frame(pd.DataFrame.from_records(records))
+
+    @classmethod
+    def from_features(cls, features: Dict | FeatureVector) -> "FeatureColumns":
+        """Одна строка без построения DataFrame (скалярный путь)."""
+        features = FeatureVector.from_mapping(features)
+        return cls({name: np.array([value]) for name, value in features.items()}, 1)
+
+    def get(self, name: str, default=0) -> np.ndarray:
+        column = self.columns.get(name)
+
+        if column is None:
+            return np.full(self.size, default)
+
+        return column
+
+    def flag(self, name: str) -> np.ndarray:
+        """Булев признак; отсутствующий считается False."""
+        return self.get(name, False).astype(bool)
+
+
+Condition = Callable[[FeatureColumns], np.ndarray]
+
+
+class WeightedRule(NamedTuple):
+    condition: Condition
+    weight: float
+    message: str
+
+
+class FactorRule(NamedTuple):
+    condition: Condition
+    message: str
+
+
+# Правила риска: чем больше вес, тем выше фактор в итоговом списке.
+RISK_RULES: List[WeightedRule] = [
+    WeightedRule(
+        lambda f: f.get("years_experience") <= 0,
+        3.5,
+        REVIEW_RISK,
+    ),
+    WeightedRule(
+        lambda f: f.get("commute_time_minutes") > 120,
+        3.0,
+        "Очень длинная дорога до работы",
+    ),
+    WeightedRule(
+        lambda f: (90 < f.get("commute_time_minutes")) & (f.get("commute_time_minutes") <= 120),
+        2.2,
+        "Дорога на работу занимает больше 90 минут",
+    ),
+    WeightedRule(
+        lambda f: (60 < f.get("commute_time_minutes")) & (f.get("commute_time_minutes") <= 90),
+        1.0,
+        "Длительное время в пути до работы",
+    ),
+    WeightedRule(
+        lambda f: f.get("skills_verified_count") < 3,
+        2.6,
+        "Мало проверенных навыков (меньше 3)",
+    ),
+    WeightedRule(
+        lambda f: (3 <= f.get("skills_verified_count")) & (f.get("skills_verified_count") < 5),
+        1.1,
+        "Недостаточно подтвержденных навыков",
+    ),
+    WeightedRule(
+        lambda f: (f.get("shift_preference", -1) == NIGHT_ONLY) & (f.get("age") > 50),
+        2.0,
+        "Возраст 50+ при выборе только ночных смен",
+    ),
+    WeightedRule(
+        lambda f: (f.get("years_experience") < 2) & (f.get("salary_expectation") > 100000),
+        1.8,
+        "Мало опыта при высоких зарплатных ожиданиях",
+    ),
+    WeightedRule(
+        lambda f: ~f.flag("has_certifications") & (f.get("skills_verified_count") > 5),
+        1.4,
+        "Много навыков без подтверждающих сертификатов",
+    ),
+    WeightedRule(
+        lambda f: f.get("previous_turnovers") > 3,
+        3.2,
+        "Частая смена прошлых мест работы",
+    ),
+    WeightedRule(
+        lambda f: (2 <= f.get("previous_turnovers")) & (f.get("previous_turnovers") <= 3),
+        1.6,
+        "Есть история частой смены работы",
+    ),
+    WeightedRule(
+        lambda f: np.isin(f.get("family_status", -1), list(FAMILY_WITH_KIDS))
+        & (f.get("shift_preference", -1) == NIGHT_ONLY),
+        2.5,
+        "Семейная нагрузка при выборе ночных смен",
+    ),
+    WeightedRule(
+        lambda f: ~f.flag("has_transport") & (f.get("commute_time_minutes") > 60),
+        2.0,
+        "Нет личного транспорта при долгой дороге",
+    ),
+    WeightedRule(
+        lambda f: f.get("housing_type", -1) == 2,
+        1.2,
+        "Нестабильные жилищные условия",
+    ),
+    WeightedRule(
+        lambda f: (f.get("education_level", -1) == 0) & (f.get("skills_verified_count") < 3),
+        1.0,
+        "Низкий уровень образования при малом числе подтверждённых навыков",
+    ),
+]
+
+# Тексты риска для отдельного признака (для перевода SHAP-вкладов в сообщения).
+# Внутри признака срабатывает первое подходящее правило.
+FEATURE_RISK_RULES: Dict[str, List[FactorRule]] = {
+    "commute_time_minutes": [
+        FactorRule(lambda f: f.get("commute_time_minutes") > 120, "Очень длинная дорога до работы"),
+        FactorRule(lambda f: f.get("commute_time_minutes") > 90, "Дорога на работу занимает больше 90 минут"),
+        FactorRule(lambda f: f.get("commute_time_minutes") > 60, "Длительное время в пути до работы"),
+    ],
+    "skills_verified_count": [
+        FactorRule(lambda f: f.get("skills_verified_count") < 3, "Мало проверенных навыков (меньше 3)"),
+        FactorRule(lambda f: f.get("skills_verified_count") < 5, "Недостаточно подтвержденных навыков"),
+    ],
+    "shift_preference": [
+        FactorRule(
+            lambda f: (f.get("shift_preference", -1) == NIGHT_ONLY) & (f.get("age") > 50),
+            "Возраст 50+ при выборе только ночных смен",
+        ),
+    ],
+    "years_experience": [
+        FactorRule(lambda f: f.get("years_experience") <= 0, REVIEW_RISK),
+        FactorRule(
+            lambda f: (f.get("years_experience") < 2) & (f.get("salary_expectation") > 100000),
+            "Мало опыта при высоких зарплатных ожиданиях",
+        ),
+        FactorRule(lambda f: f.get("years_experience") < 3, "Невысокий релевантный опыт"),
+    ],
+    "salary_expectation": [
+        FactorRule(
+            lambda f: (f.get("years_experience") < 2) & (f.get("salary_expectation") > 100000),
+            "Высокие зарплатные ожидания для текущего опыта",
+        ),
+    ],
+    "has_certifications": [
+        FactorRule(
+            lambda f: ~f.flag("has_certifications") & (f.get("skills_verified_count") > 5),
+            "Много навыков без подтверждающих сертификатов",
+        ),
+        FactorRule(lambda f: ~f.flag("has_certifications"), "Нет подтверждающих сертификатов"),
+    ],
+    "age": [
+        FactorRule(
+            lambda f: (f.get("shift_preference", -1) == NIGHT_ONLY) & (f.get("age") > 50),
+            "Возраст усиливает риск при ночном графике",
+        ),
+    ],
+    "previous_turnovers": [
+        FactorRule(lambda f: f.get("previous_turnovers") > 3, "Частая смена прошлых мест работы"),
+        FactorRule(lambda f: f.get("previous_turnovers") >= 2, "Есть история частой смены работы"),
+    ],
+    "family_status": [
+        FactorRule(
+            lambda f: np.isin(f.get("family_status", -1), list(FAMILY_WITH_KIDS))
+            & (f.get("shift_preference", -1) == NIGHT_ONLY),
+            "Семейная нагрузка при выборе ночных смен",
+        ),
+    ],
+    "housing_type": [
+        FactorRule(lambda f: f.get("housing_type", -1) == 2, "Нестабильные жилищные условия"),
+    ],
+    "has_transport": [
+        FactorRule(
+            lambda f: ~f.flag("has_transport") & (f.get("commute_time_minutes") > 60),
+            "Нет личного транспорта при долгой дороге",
+        ),
+    ],
+    "education_level": [
+        FactorRule(
+            lambda f: (f.get("education_level", -1) == 0) & (f.get("skills_verified_count") < 3),
+            "Низкий уровень образования при малом числе подтверждённых навыков",
+        ),
+    ],
+}
+
+# Положительные факторы в порядке приоритета.
+POSITIVE_RULES: List[FactorRule] = [
+    FactorRule(lambda f: f.get("skills_verified_count") >= 7, "Много подтверждённых навыков"),
+    FactorRule(lambda f: f.get("years_experience") >= 5, "Хороший релевантный опыт"),
+    FactorRule(lambda f: f.get("commute_time_minutes", 999) <= 40, "Короткая дорога до работы"),
+    FactorRule(lambda f: f.flag("has_certifications"), "Есть подтверждающие сертификаты"),
+    FactorRule(lambda f: f.flag("has_transport"), "Есть личный транспорт"),
+    FactorRule(lambda f: f.get("previous_turnovers", 99) <= 1, "Нет частой смены рабочих мест"),
+    FactorRule(lambda f: f.get("housing_type", -1) == 0, "Стабильные жилищные условия"),
+]
+
+# Правила риска, заранее упорядоченные по убыванию веса (сортировка устойчива).
+_RISK_RULES_BY_WEIGHT = sorted(RISK_RULES, key=lambda rule: rule.weight, reverse=True)
+
+
+def _evaluate(rules: List, features: FeatureColumns) -> np.ndarray:
+    """Матрица срабатываний (n x число правил)."""
+
+    masks = np.zeros((features.size, len(rules)), dtype=bool)
+
+    for j, rule in enumerate(rules):
+        masks[:, j] = rule.condition(features)
+
+    return masks
+
+
+def _top_messages(masks: np.ndarray, messages: List[str], limit: int) -> List[List[str]]:
+    """Первые limit сработавших правил каждой строки (по порядку колонок)."""
+
+    selected = masks & (np.cumsum(masks, axis=1) <= limit)
+    rows, cols = np.nonzero(selected)
+
+    result = [[] for _ in range(masks.shape[0])]
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        result[row].append(messages[col])
+
+    return result
+
+
+def weighted_risks(features: FeatureColumns, limit: int = 3) -> List[List[str]]:
+    """Топ rule-based рисков по весу для каждой строки."""
+
+    masks = _evaluate(_RISK_RULES_BY_WEIGHT, features)
+    return _top_messages(masks, [rule.message for rule in _RISK_RULES_BY_WEIGHT], limit)
+
+
+def positive_factors(features: FeatureColumns, limit: int = 3) -> List[List[str]]:
+    """Первые положительные факторы для каждой строки."""
+
+    masks = _evaluate(POSITIVE_RULES, features)
+    return _top_messages(masks, [rule.message for rule in POSITIVE_RULES], limit)
+
+
+def feature_risk_messages(
+    features: FeatureColumns, feature_names: Iterable[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Текст риска каждого признака для каждой строки (None, если правило не сработало).
+
+    Возвращает колонки object-массивов: messages[feature][row].
+    """
+
+    messages = {}
+
+    for name in feature_names:
+        column = np.full(features.size, None, dtype=object)
+
+        # Обратный порядок присваивания сохраняет приоритет первого правила.
+        for rule in reversed(FEATURE_RISK_RULES.get(name, [])):
+            column[rule.condition(features)] = rule.message
+
+        messages[name] = column
+
+    return messages
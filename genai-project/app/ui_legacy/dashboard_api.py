@@ -4,11 +4,12 @@ import random
 from typing import Any
 
 import pandas as pd
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 
 from app.core.enums import ShiftPreference
 from app.ml_legacy.generator import generate_if_needed
 from app.ml_legacy.predictor import RetentionPredictor
+from app.ml_legacy.feature_vector import FeatureVector
 from app.ml_legacy.feature_contract import (
     FEATURE_COLS,
     EDUCATION_LABELS,
@@ -44,6 +45,26 @@ SHIFT_LABELS = {
 REQUIRED_CANDIDATE_FIELDS = set(FEATURE_COLS)
 
 
+# Ограничение пакетного what-if запроса: один вызов ShapValues на всю пачку.
+MAX_BATCH_CANDIDATES = 2000
+
+
+CANDIDATE_FIELD_TYPES = {
+    "skills_verified_count": int,
+    "years_experience": float,
+    "age": int,
+    "commute_time_minutes": int,
+    "shift_preference": int,
+    "salary_expectation": int,
+    "has_certifications": bool,
+    "education_level": int,
+    "previous_turnovers": int,
+    "family_status": int,
+    "housing_type": int,
+    "has_transport": bool,
+}
+
+
 def project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
@@ -114,43 +135,63 @@ def build_edge_case_candidate() -> dict[str, Any]:
 
 
 @lru_cache(maxsize=1)
-def get_dashboard_runtime():
-    root = project_root()
-
-    model_path = root / "app" / "ml_legacy" / "model.pkl"
-    data_path = root / "data" / "train_dataset.csv"
+def get_dashboard_dataset():
+    data_path = project_root() / "data" / "train_dataset.csv"
 
     dataset_existed = data_path.exists()
 
     generate_if_needed()
 
-    dataset = load_dataset(data_path)
+    return load_dataset(data_path), not dataset_existed
 
-    predictor = RetentionPredictor()
-    model_loaded = predictor.load_model(model_path)
 
+@lru_cache(maxsize=1)
+def get_fallback_predictor():
+    """Собственный предиктор дашборда, если приложение не загрузило общий."""
+
+    root = project_root()
+
+    model_path = root / "app" / "ml_legacy" / "model.pkl"
+    data_path = root / "data" / "train_dataset.csv"
+
+    get_dashboard_dataset()
+
+    predictor = RetentionPredictor()
     model_trained = False
 
-    if not model_loaded:
+    if not predictor.load_model(model_path):
         predictor.train_model(data_path)
         predictor.save_model(model_path)
-        model_loaded = True
         model_trained = True
 
-    boot_info = {
-        "dataset_created": not dataset_existed,
-        "model_trained": model_trained,
-        "model_loaded": model_loaded,
-    }
+    return predictor, model_trained
+
+
+def dashboard_predictor(request: Request) -> RetentionPredictor:
+    """
+    Предиктор для what-if запросов: общий app.state.predictor (с табличным
+    режимом PREDICTOR_LOOKUP_RESOLUTION и кэшами приложения), а если его нет —
+    собственный (get_fallback_predictor).
+    """
+
+    shared = getattr(request.app.state, "predictor", None)
+    predictor = shared.get() if shared is not None else None
+
+    if predictor is not None and predictor.model is not None:
+        return predictor
 
-    return predictor, dataset, boot_info
+    return get_fallback_predictor()[0]
 
 
-def get_status_payload() -> dict[str, Any]:
-    _, dataset, boot_info = get_dashboard_runtime()
+def get_status_payload(predictor: RetentionPredictor) -> dict[str, Any]:
+    dataset, dataset_created = get_dashboard_dataset()
+    # Обучал модель только собственный предиктор дашборда (общий обучается при старте).
+    model_trained = bool(get_fallback_predictor.cache_info().currsize and get_fallback_predictor()[1])
 
     return {
-        **boot_info,
+        "dataset_created": dataset_created,
+        "model_trained": model_trained,
+        "model_loaded": predictor.model is not None,
         "dataset_rows": int(len(dataset)),
         "available_presets": [
             "green",
@@ -161,7 +202,7 @@ def get_status_payload() -> dict[str, Any]:
     }
 
 
-def sample_candidate(category: str) -> dict[str, Any]:
+def sample_candidate(category: str, predictor: RetentionPredictor) -> dict[str, Any]:
     category_aliases = {
         "green": "ideal",
         "yellow": "borderline",
@@ -170,7 +211,7 @@ def sample_candidate(category: str) -> dict[str, Any]:
 
     category = category_aliases.get(category, category)
 
-    predictor, dataset, _ = get_dashboard_runtime()
+    dataset, _ = get_dashboard_dataset()
 
     if category == "edge":
         return build_edge_case_candidate()
@@ -242,26 +283,17 @@ def sample_candidate(category: str) -> dict[str, Any]:
     return row_to_candidate(row)
 
 
-def normalize_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
+def normalize_candidate(candidate: dict[str, Any]) -> FeatureVector:
     missing = REQUIRED_CANDIDATE_FIELDS - set(candidate.keys())
 
     if missing:
         raise ValueError(f"Отсутствуют поля кандидата: {sorted(missing)}")
 
-    normalized = {
-        "skills_verified_count": int(candidate["skills_verified_count"]),
-        "years_experience": float(candidate["years_experience"]),
-        "age": int(candidate["age"]),
-        "commute_time_minutes": int(candidate["commute_time_minutes"]),
-        "shift_preference": int(candidate["shift_preference"]),
-        "salary_expectation": int(candidate["salary_expectation"]),
-        "has_certifications": bool(candidate["has_certifications"]),
-        "education_level": int(candidate["education_level"]),
-        "previous_turnovers": int(candidate["previous_turnovers"]),
-        "family_status": int(candidate["family_status"]),
-        "housing_type": int(candidate["housing_type"]),
-        "has_transport": bool(candidate["has_transport"]),
-    }
+    # Признаки приводятся к типам один раз и дальше живут в FeatureVector,
+    # который предиктор использует без копирования и как ключ кэша.
+    normalized = FeatureVector(
+        CANDIDATE_FIELD_TYPES[name](candidate[name]) for name in FEATURE_COLS
+    )
 
     if normalized["age"] < 18:
         raise ValueError("Возраст кандидата должен быть не меньше 18 лет")
@@ -294,13 +326,115 @@ def normalize_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
     return normalized
 
 
-def predict_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
-    predictor, _, _ = get_dashboard_runtime()
+def _format_rows(mask: pd.Series, limit: int = 10) -> str:
+    rows = mask[mask].index.tolist()
+    suffix = ", ..." if len(rows) > limit else ""
+    return ", ".join(str(row) for row in rows[:limit]) + suffix
+
+
+def normalize_candidates_batch(candidates: list[dict[str, Any]]) -> pd.DataFrame:
+    """
+    Пакетный аналог normalize_candidate: те же приведения типов и проверки,
+    но над колонками DataFrame. В сообщении об ошибке перечислены номера строк.
+    """
+
+    if not candidates:
+        raise ValueError("Список кандидатов пуст")
+
+    if len(candidates) > MAX_BATCH_CANDIDATES:
+        raise ValueError(
+            f"Слишком много кандидатов: {len(candidates)} (максимум {MAX_BATCH_CANDIDATES})"
+        )
+
+    if not all(isinstance(candidate, dict) for candidate in candidates):
+        raise ValueError("Каждый кандидат должен быть объектом с полями признаков")
+
+    frame = pd.DataFrame.from_records(candidates)
+
+    missing = REQUIRED_CANDIDATE_FIELDS - set(frame.columns)
+
+    if missing:
+        raise ValueError(f"Отсутствуют поля кандидата: {sorted(missing)}")
+
+    frame = frame[FEATURE_COLS]
+    incomplete = frame.isna().any(axis=1)
+
+    if incomplete.any():
+        raise ValueError(f"Кандидаты {_format_rows(incomplete)}: не заполнены поля признаков")
+
+    for name, cast in CANDIDATE_FIELD_TYPES.items():
+        try:
+            frame[name] = frame[name].astype(cast)
+        except (TypeError, ValueError):
+            raise ValueError(f"Некорректное значение {name}")
+
+    checks = [
+        (frame["age"] < 18, "Возраст кандидата должен быть не меньше 18 лет"),
+        (
+            frame["years_experience"] > (frame["age"] - 18).clip(lower=0),
+            "Опыт работы не может быть больше возраста минус 18 лет",
+        ),
+        (~frame["shift_preference"].isin(SHIFT_LABELS), "Некорректное значение shift_preference"),
+        (~frame["education_level"].isin(EDUCATION_LABELS), "Некорректное значение education_level"),
+        (~frame["family_status"].isin(FAMILY_LABELS), "Некорректное значение family_status"),
+        (~frame["housing_type"].isin(HOUSING_LABELS), "Некорректное значение housing_type"),
+    ]
+
+    for key in (
+        "skills_verified_count",
+        "years_experience",
+        "commute_time_minutes",
+        "salary_expectation",
+        "previous_turnovers",
+    ):
+        checks.append((frame[key] < 0, f"Поле {key} не может быть отрицательным"))
+
+    for mask, message in checks:
+        if mask.any():
+            raise ValueError(f"Кандидаты {_format_rows(mask)}: {message}")
+
+    return frame
+
+
+def predict_candidates_batch(
+    candidates: list[dict[str, Any]], predictor: RetentionPredictor
+) -> dict[str, Any]:
+    """
+    What-if оценка пачки кандидатов одним вызовом модели.
+
+    Ответ колоночный: columns[поле][i] относится к i-му кандидату запроса.
+    """
+
+    frame = normalize_candidates_batch(candidates)
+
+    scored = predictor.score_batch(frame)
+    positive_factors = predictor.explain_positive_factors_batch(frame)
 
+    risk_level = scored["risk_level"].tolist()
+
+    return {
+        "count": int(len(frame)),
+        "columns": {
+            "retention_probability": scored["retention_probability"].tolist(),
+            "will_stay": scored["will_stay"].tolist(),
+            "risk_level": risk_level,
+            "risk_label": [RISK_LEVEL_LABELS.get(level, level) for level in risk_level],
+            "requires_review": scored["requires_review"].tolist(),
+            "uncertainty_low": scored["uncertainty_low"].tolist(),
+            "uncertainty_high": scored["uncertainty_high"].tolist(),
+            "uncertainty_margin": scored["uncertainty_margin"].tolist(),
+            "risk_factors": scored["risk_factors"],
+            "positive_factors": positive_factors,
+        },
+        "uncertainty_note": scored["uncertainty_note"],
+    }
+
+
+def predict_candidate(candidate: dict[str, Any], predictor: RetentionPredictor) -> dict[str, Any]:
     normalized = normalize_candidate(candidate)
 
-    prediction = predictor.predict_retention(normalized)
-    risk_factors = predictor.explain_prediction(normalized)
+    prediction = predictor.score(normalized)
+    risk_factors = prediction["risk_factors"]
     positive_factors = predictor.explain_positive_factors(normalized)
 
     display_risk_factors = [
@@ -327,7 +461,7 @@ def predict_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
         zone_text = "Красная зона: высокий риск"
 
     return {
-        "candidate": normalized,
+        "candidate": dict(normalized),
         "retention_probability": float(prediction["retention_probability"]),
         "will_stay": bool(prediction["will_stay"]),
         "risk_level": risk_level,
@@ -354,9 +488,9 @@ def predict_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
 
 
 @router.get("/demo/status")
-def demo_status() -> dict[str, Any]:
+def demo_status(request: Request) -> dict[str, Any]:
     try:
-        return get_status_payload()
+        return get_status_payload(dashboard_predictor(request))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -365,9 +499,9 @@ def demo_status() -> dict[str, Any]:
 
 
 @router.get("/demo/candidate/{category}")
-def get_demo_candidate(category: str) -> dict[str, Any]:
+def get_demo_candidate(category: str, request: Request) -> dict[str, Any]:
     try:
-        candidate = sample_candidate(category)
+        candidate = sample_candidate(category, dashboard_predictor(request))
 
         return {
             "category": category,
@@ -388,9 +522,9 @@ def get_demo_candidate(category: str) -> dict[str, Any]:
 
 
 @router.post("/demo/predict")
-def predict_demo_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
+def predict_demo_candidate(candidate: dict[str, Any], request: Request) -> dict[str, Any]:
     try:
-        return predict_candidate(candidate)
+        return predict_candidate(candidate, dashboard_predictor(request))
 
     except ValueError as e:
         raise HTTPException(
@@ -402,4 +536,22 @@ def predict_demo_candidate(candidate: dict[str, Any]) -> dict[str, Any]:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Could not predict candidate: {str(e)}",
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/demo/predict/batch")
+def predict_demo_candidates_batch(candidates: list[dict[str, Any]], request: Request) -> dict[str, Any]:
+    try:
+        return predict_candidates_batch(candidates, dashboard_predictor(request))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not predict candidates: {str(e)}",
+        )
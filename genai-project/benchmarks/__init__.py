@@ -0,0 +1 @@
+"""Benchmarks module for the genai-project."""
@@ -0,0 +1,185 @@
+"""
+Бенчмарк бэкендов LLM-экстрактора на CPU: время загрузки, задержка
+экстракции, прирост RSS после замеров и пиковый RSS, точность извлечённых
+признаков.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_backends --model Qwen/Qwen3-4B-Instruct-2507 \\
+        --backends cpu cpu-int8 onnx
+
+Каждый бэкенд запускается в отдельном процессе, иначе пиковый RSS
+(ru_maxrss) копился бы между замерами. Точность — доля совпавших проверок
+из EXPECTED (ручная разметка examples/candidate*.txt, для чисел — диапазон);
+«совпадение» — доля полей vector, равных выводу первого бэкенда в списке.
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+# Значения, однозначно следующие из текста интервью. Кортеж — допустимый диапазон.
+EXPECTED = {
+    "candidate1.txt": {
+        "years_experience": (4, 8),
+        "commute_time_minutes": (10, 30),
+        "shift_preference": 2,
+        "has_certifications": True,
+    },
+    "candidate2.txt": {
+        "years_experience": (1, 3),
+        "commute_time_minutes": (120, 180),
+        "shift_preference": 0,
+        "has_certifications": False,
+    },
+    "candidate3.txt": {
+        "years_experience": (4, 35),
+        "shift_preference": 2,
+        "has_certifications": False,
+    },
+}
+
+
+def load_examples() -> dict[str, str]:
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "candidate*.txt")))
+    examples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            examples[os.path.basename(path)] = f.read()
+    return examples
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss в Linux — килобайты.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mib() -> float:
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def check(vector: dict, expected: dict) -> tuple[int, int]:
+    passed = 0
+    for field, target in expected.items():
+        value = vector.get(field)
+        if isinstance(target, tuple):
+            passed += value is not None and target[0] <= value <= target[1]
+        else:
+            passed += value == target
+    return passed, len(expected)
+
+
+def run_worker(args) -> None:
+    """Замер одного бэкенда; результат — одна строка JSON в stdout."""
+    from app.ai.extractor import extractor
+
+    examples = load_examples()
+    rss_before = current_rss_mib()
+
+    start = perf_counter()
+    model_ext = extractor(args.model, backend=args.backend, num_threads=args.threads)
+    load_time = perf_counter() - start
+
+    outputs, latencies = {}, []
+    passed = total = 0
+
+    for name, text in examples.items():
+        start = perf_counter()
+        try:
+            _, _, vector = model_ext(text)
+            vector = vector.model_dump(mode="json")
+        except Exception:
+            vector = None
+        latencies.append(perf_counter() - start)
+
+        outputs[name] = vector
+        ok, count = check(vector or {}, EXPECTED.get(name, {}))
+        passed += ok
+        total += count
+
+    print(
+        json.dumps(
+            {
+                "backend": args.backend,
+                "load_s": load_time,
+                "latency_s": sum(latencies) / len(latencies),
+                "rss_mib": current_rss_mib() - rss_before,
+                "peak_rss_mib": peak_rss_mib() - rss_before,
+                "accuracy": passed / total if total else None,
+                "outputs": outputs,
+            }
+        )
+    )
+
+
+def agreement(outputs: dict, reference: dict):
+    same = count = 0
+    for name, vector in reference.items():
+        if vector is None:
+            continue
+        other = outputs.get(name) or {}
+        for field, value in vector.items():
+            same += other.get(field) == value
+            count += 1
+    return same / count if count else None
+
+
+def percent(value) -> str:
+    return "—" if value is None else f"{value:.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="Qwen/Qwen3-4B-Instruct-2507")
+    parser.add_argument("--backends", nargs="+", default=["cpu", "cpu-int8"])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        run_worker(args)
+        return
+
+    results = []
+    for backend in args.backends:
+        command = [sys.executable, "-m", "benchmarks.bench_backends", "--model", args.model, "--backend", backend]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+
+        completed = subprocess.run(command, capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            error = completed.stderr.strip().splitlines()
+            print(f"{backend}: ошибка — {error[-1] if error else completed.returncode}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    if not results:
+        return
+
+    reference = results[0]["outputs"]
+    print(f"\nМодель: {args.model}, примеров: {len(reference)}")
+    print(
+        f"{'бэкенд':<10}{'загрузка, с':>13}{'экстракция, с':>15}{'RSS, МиБ':>10}{'пик, МиБ':>10}"
+        f"{'точность':>10}{'совпадение':>12}"
+    )
+    for result in results:
+        print(
+            f"{result['backend']:<10}{result['load_s']:>13.1f}{result['latency_s']:>15.2f}"
+            f"{result['rss_mib']:>10.0f}{result['peak_rss_mib']:>10.0f}{percent(result['accuracy']):>10}"
+            f"{percent(agreement(result['outputs'], reference)):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
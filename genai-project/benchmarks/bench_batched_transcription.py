@@ -0,0 +1,68 @@
+"""
+Бенчмарк пакетной транскрибации для массовой загрузки записей интервью:
+пропускная способность (секунды аудио на секунду работы) в двух режимах:
+
+    по файлам  — TranscriberPool.transcribe для каждого файла по очереди
+                 (последовательное декодирование с VAD, как в /analyze);
+    пакетно    — TranscriberPool.transcribe_batch: окна речи всех файлов
+                 декодируются батчами BatchedInferencePipeline, батчи
+                 заполняются клипами разных файлов (/analyze/bulk).
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_batched_transcription --audio day/*.wav \\
+        --whisper medium --batch-size 8 --threads 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.ai.transcriber import TranscriberPool
+
+
+async def run_sequential(pool: TranscriberPool, paths) -> list:
+    return [await pool.transcribe(path) for path in paths]
+
+
+async def main_async(args):
+    pool = TranscriberPool(
+        args.whisper, device="cpu", compute_type=args.compute_type, cpu_threads=args.threads
+    )
+    pool.load()
+
+    modes = [
+        ("по файлам", lambda: run_sequential(pool, args.audio)),
+        (f"пакетно (batch={args.batch_size})", lambda: pool.transcribe_batch(args.audio, args.batch_size)),
+    ]
+
+    print(f"\nФайлов: {len(args.audio)}, Whisper: {args.whisper} ({args.compute_type}, {args.threads} потоков)")
+    print(f"{'режим':<22}{'аудио, с':>10}{'время, с':>10}{'аудио-с/с':>11}{'символов':>10}")
+
+    for name, run in modes:
+        audio_before = pool.audio_seconds
+        started = perf_counter()
+        texts = await run()
+        elapsed = perf_counter() - started
+        audio = pool.audio_seconds - audio_before
+        print(
+            f"{name:<22}{audio:>10.0f}{elapsed:>10.1f}{audio / elapsed:>11.1f}"
+            f"{sum(len(text) for text in texts):>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--audio", nargs="+", required=True)
+    parser.add_argument("--whisper", default="medium")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Бенчмарк LLM-экстрактора: время до первого токена (TTFT) и полное время
+извлечения без переиспользования KV-кэша системного промпта и с ним.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_extractor --model Qwen/Qwen3-4B-Instruct-2507
+
+Входные данные — examples/candidate*.txt. TTFT измеряется генерацией
+одного токена (префилл промпта + первый шаг декодирования).
+"""
+
+import argparse
+import glob
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.ai.extractor import extractor
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def load_examples() -> dict[str, str]:
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "candidate*.txt")))
+    examples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            examples[os.path.basename(path)] = f.read()
+    return examples
+
+
+def best_time(fn, repeats: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="Qwen/Qwen3-4B-Instruct-2507")
+    parser.add_argument("--repeats", type=int, default=3, help="Повторы TTFT-замера")
+    args = parser.parse_args()
+
+    examples = load_examples()
+    model_ext = extractor(args.model)
+
+    if model_ext._prefix_cache is None:
+        print("KV-кэш префикса недоступен для этого токенизатора, сравнение невозможно.")
+        return
+
+    print(f"Префикс в кэше: {len(model_ext._prefix_ids)} токенов\n")
+    print(f"{'файл':<18}{'режим':<10}{'TTFT, мс':>10}{'полное, с':>12}")
+
+    for name, text in examples.items():
+        for reuse in (False, True):
+            model_ext.reuse_prefix_cache = reuse
+
+            ttft = best_time(lambda: model_ext._generate(text, max_new_tokens=1), args.repeats)
+
+            start = perf_counter()
+            model_ext._generate(text)
+            total = perf_counter() - start
+
+            mode = "кэш" if reuse else "без кэша"
+            print(f"{name:<18}{mode:<10}{ttft * 1e3:>10.1f}{total:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
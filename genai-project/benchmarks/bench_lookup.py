@@ -0,0 +1,70 @@
+"""
+Бенчмарк табличного режима предиктора (PredictionGrid) против точной модели.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_lookup --resolution 2 4 6
+
+Для каждого разрешения печатает время построения, размер таблицы,
+задержку оценки (1 и 1000 строк) и измеренную ошибку на датасете.
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+
+from app.ml_legacy.generator import generate_if_needed
+from app.ml_legacy.predictor import DEFAULT_DATA_PATH, PredictionGrid, RetentionPredictor, train_if_needed
+
+
+def time_call(fn, repeats: int) -> float:
+    fn()
+    start = perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (perf_counter() - start) / repeats * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    generate_if_needed()
+    train_if_needed()
+
+    predictor = RetentionPredictor()
+    predictor.load_model()
+
+    df = pd.read_csv(DEFAULT_DATA_PATH)[predictor.feature_names]
+    one_row = df.head(1).to_numpy(dtype=float)
+    many_rows = df.sample(n=1000, replace=True, random_state=42).to_numpy(dtype=float)
+
+    exact_one = time_call(lambda: predictor.model.predict_proba(one_row), 200)
+    exact_many = time_call(lambda: predictor.model.predict_proba(many_rows), 50)
+    print(f"Точная модель: 1 строка {exact_one:.3f} мс, 1000 строк {exact_many:.3f} мс")
+
+    for resolution in args.resolution:
+        start = perf_counter()
+        grid = PredictionGrid.build(predictor.model, predictor.feature_names, resolution)
+        build_time = perf_counter() - start
+
+        error = grid.measure_error(predictor.model, df)
+        lookup_one = time_call(lambda: grid.lookup(one_row), 200)
+        lookup_many = time_call(lambda: grid.lookup(many_rows), 50)
+
+        print(
+            f"resolution={resolution}: построение {build_time:.1f} с, "
+            f"{grid.table.size} ячеек ({grid.nbytes / 1024**2:.1f} MiB); "
+            f"1 строка {lookup_one:.3f} мс, 1000 строк {lookup_many:.3f} мс; "
+            f"ошибка max={error['max_abs_error']:.3f} "
+            f"mean={error['mean_abs_error']:.3f} p99={error['p99_abs_error']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк NumPy-движка симметричных деревьев против CatBoost predict_proba.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_oblivious --rows 1 1000 1000000
+
+Строки семплируются из обучающего датасета с возвращением.
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pandas as pd
+
+from app.ml_legacy.generator import generate_if_needed
+from app.ml_legacy.oblivious import ObliviousTreeEnsemble
+from app.ml_legacy.predictor import DEFAULT_DATA_PATH, RetentionPredictor, train_if_needed
+
+
+def best_time(fn, repeats: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return min(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000, 1_000_000])
+    args = parser.parse_args()
+
+    generate_if_needed()
+    train_if_needed()
+
+    predictor = RetentionPredictor()
+    predictor.load_model()
+
+    ensemble = ObliviousTreeEnsemble.from_catboost(predictor.model, predictor.feature_names)
+    dataset = pd.read_csv(DEFAULT_DATA_PATH)[predictor.feature_names].to_numpy(dtype=float)
+
+    print(f"Деревьев: {ensemble.n_trees}, глубина: {ensemble.depth}, "
+          f"уникальных условий: {len(ensemble.split_borders)}")
+
+    rng = np.random.default_rng(42)
+
+    for n_rows in args.rows:
+        matrix = dataset[rng.integers(0, len(dataset), size=n_rows)]
+        repeats = 50 if n_rows <= 1000 else 3
+
+        catboost_ms = best_time(lambda: predictor.model.predict_proba(matrix), repeats)
+        numpy_ms = best_time(lambda: ensemble.predict_proba(matrix), repeats)
+        max_diff = np.abs(
+            ensemble.predict_proba(matrix) - predictor.model.predict_proba(matrix)
+        ).max()
+
+        print(
+            f"{n_rows:>9} строк: CatBoost {catboost_ms:10.3f} мс, "
+            f"NumPy {numpy_ms:10.3f} мс, max |diff| {max_diff:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Бенчмарк конвейера анализа (app.api.pipeline): пропускная способность при
+потоке аудиорезюме и загрузка этапов в трёх режимах:
+
+    последовательно  — запросы по одному: сохранение → транскрибация → LLM →
+                       CatBoost → БД, следующий начинается после предыдущего;
+    общий пул        — запросы одновременно, Whisper и LLM в run_in_threadpool,
+                       CatBoost и запись в БД прямо в цикле событий (как было
+                       до конвейера);
+    конвейер         — AnalysisPipeline: у каждого этапа свой пул потоков,
+                       пока запрос N в LLM, запрос N+1 транскрибируется.
+
+Работа этапов моделируется паузами (time.sleep, как нативный код Whisper,
+torch и CatBoost, отпускающий GIL); длительности задаются аргументами в
+секундах и масштабируются --scale. LLM во всех режимах под общим gpu_lock.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_pipeline --requests 20 --transcribe 6 --llm 3 \\
+        --transcription-workers 2 --scale 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.pipeline import IO, LLM, PREDICT, TRANSCRIPTION, AnalysisPipeline
+
+
+def work(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def run_sequential(costs: dict, requests: int, gpu_lock: asyncio.Lock) -> None:
+    for _ in range(requests):
+        await run_shared_pool_request(costs, gpu_lock, asyncio.Semaphore(1))
+
+
+async def run_shared_pool_request(costs: dict, gpu_lock: asyncio.Lock, whisper: asyncio.Semaphore) -> None:
+    work(costs["io"])
+    async with whisper:
+        await run_in_threadpool(work, costs["transcribe"])
+    async with gpu_lock:
+        await run_in_threadpool(work, costs["llm"])
+    work(costs["predict"])
+    work(costs["db"])
+
+
+async def run_pipeline_request(costs: dict, gpu_lock: asyncio.Lock, pipeline: AnalysisPipeline) -> None:
+    async with pipeline.admit():
+        await pipeline.run(IO, work, costs["io"])
+        await pipeline.run(TRANSCRIPTION, work, costs["transcribe"])
+        async with gpu_lock:
+            await pipeline.run(LLM, work, costs["llm"])
+        await pipeline.run(PREDICT, work, costs["predict"])
+        await pipeline.run(PREDICT, work, costs["db"])
+
+
+async def main_async(args):
+    costs = {
+        name: round(getattr(args, name) * args.scale, 4) for name in ("io", "transcribe", "llm", "predict", "db")
+    }
+    gpu_lock = asyncio.Lock()
+
+    print(f"\nЗапросов: {args.requests}, длительности этапов (с): {costs}")
+    print(f"{'режим':<18}{'время, с':>10}{'запросов/с':>12}")
+
+    started = perf_counter()
+    await run_sequential(costs, args.requests, gpu_lock)
+    elapsed = perf_counter() - started
+    print(f"{'последовательно':<18}{elapsed:>10.2f}{args.requests / elapsed:>12.2f}")
+
+    # Whisper-пул ограничивает одновременные транскрибации и без конвейера.
+    whisper = asyncio.Semaphore(args.transcription_workers)
+    started = perf_counter()
+    await asyncio.gather(
+        *(run_shared_pool_request(costs, gpu_lock, whisper) for _ in range(args.requests))
+    )
+    elapsed = perf_counter() - started
+    print(f"{'общий пул':<18}{elapsed:>10.2f}{args.requests / elapsed:>12.2f}")
+
+    pipeline = AnalysisPipeline(
+        io_workers=args.io_workers,
+        transcription_workers=args.transcription_workers,
+        llm_workers=1,
+        predict_workers=args.predict_workers,
+        queue_size=args.queue_size,
+        max_in_flight=args.requests,
+    )
+    started = perf_counter()
+    await asyncio.gather(*(run_pipeline_request(costs, gpu_lock, pipeline) for _ in range(args.requests)))
+    elapsed = perf_counter() - started
+    print(f"{'конвейер':<18}{elapsed:>10.2f}{args.requests / elapsed:>12.2f}")
+
+    # Ожидание gpu_lock в очередь этапа LLM не входит (см. extraction_batcher в /api/admin/stats).
+    print(f"\n{'этап':<15}{'потоков':>8}{'загрузка':>10}{'ожидание p50, мс':>18}{'p99, мс':>10}")
+    for name, stage in pipeline.stats()["stages"].items():
+        print(
+            f"{name:<15}{stage['workers']:>8}{stage['utilisation']:>10.2f}"
+            f"{stage['queue_wait_p50_ms'] or 0:>18.1f}{stage['queue_wait_p99_ms'] or 0:>10.1f}"
+        )
+    pipeline.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--io", type=float, default=0.05)
+    parser.add_argument("--transcribe", type=float, default=6.0)
+    parser.add_argument("--llm", type=float, default=3.0)
+    parser.add_argument("--predict", type=float, default=0.2)
+    parser.add_argument("--db", type=float, default=0.1)
+    parser.add_argument("--scale", type=float, default=0.1)
+    parser.add_argument("--io-workers", type=int, default=4)
+    parser.add_argument("--transcription-workers", type=int, default=2)
+    parser.add_argument("--predict-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк: predict_retention + explain_prediction против однопроходного score().
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_score --n 300
+
+Каждый кандидат уникален, поэтому кэши предиктора не влияют на замер.
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+
+from app.ml_legacy.generator import generate_if_needed
+from app.ml_legacy.predictor import DEFAULT_DATA_PATH, RetentionPredictor, train_if_needed
+
+
+def load_candidates(n: int) -> list[dict]:
+    generate_if_needed()
+    train_if_needed()
+
+    df = pd.read_csv(DEFAULT_DATA_PATH).drop(columns=["retention"])
+    df = df.drop_duplicates().head(n)
+    return df.to_dict(orient="records")
+
+
+def time_per_candidate(fn, candidates: list[dict]) -> float:
+    start = perf_counter()
+    for features in candidates:
+        fn(features)
+    return (perf_counter() - start) / len(candidates) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=300, help="Число кандидатов")
+    args = parser.parse_args()
+
+    candidates = load_candidates(args.n)
+
+    two_pass = RetentionPredictor()
+    two_pass.load_model()
+
+    single_pass = RetentionPredictor()
+    single_pass.load_model()
+
+    # Прогрев CatBoost, чтобы не учитывать ленивую инициализацию.
+    two_pass.predict_retention(candidates[0])
+    single_pass.score(candidates[0])
+
+    def run_two_pass(features):
+        two_pass.predict_retention(features)
+        two_pass.explain_prediction(features)
+
+    two_pass_ms = time_per_candidate(run_two_pass, candidates[1:])
+    single_pass_ms = time_per_candidate(single_pass.score, candidates[1:])
+
+    print(f"Кандидатов: {len(candidates) - 1}")
+    print(f"predict_retention + explain_prediction: {two_pass_ms:.3f} мс/кандидат")
+    print(f"score():                                {single_pass_ms:.3f} мс/кандидат")
+    print(f"Экономия: {two_pass_ms - single_pass_ms:.3f} мс/кандидат "
+          f"({(1 - single_pass_ms / two_pass_ms) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
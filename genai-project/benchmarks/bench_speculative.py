@@ -0,0 +1,93 @@
+"""
+Бенчмарк спекулятивного декодирования (assisted generation) экстрактора:
+время генерации обычным декодированием и с моделью-черновиком, доля
+принятых токенов черновика и ускорение.
+
+Запуск из каталога genai-project:
+    python -m benchmarks.bench_speculative --model Qwen/Qwen3-4B-Instruct-2507 \\
+        --draft Qwen/Qwen3-0.6B --backend cpu
+
+Черновик должен иметь тот же токенизатор, что и основная модель. Входные
+данные — examples/candidate*.txt; декодирование жадное, поэтому при
+корректной работе ответы в обоих режимах совпадают (столбец «=»).
+"""
+
+import argparse
+import glob
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.ai.extractor import extractor
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def load_examples() -> dict[str, str]:
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "candidate*.txt")))
+    examples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            examples[os.path.basename(path)] = f.read()
+    return examples
+
+
+def timed_generate(model_ext, text: str, repeats: int) -> tuple[float, str, dict]:
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        output = model_ext._generate(text)
+        timings.append(perf_counter() - start)
+    return min(timings), output, model_ext.generation_stats()["recent"][-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="Qwen/Qwen3-4B-Instruct-2507")
+    parser.add_argument("--draft", default="Qwen/Qwen3-0.6B")
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    model_ext = extractor(args.model, backend=args.backend, draft_model_name=args.draft)
+    draft = model_ext._assistant_model
+
+    print(f"Модель: {args.model}, черновик: {args.draft}, бэкенд: {args.backend}\n")
+    print(
+        f"{'файл':<18}{'токенов':>9}{'обычное, с':>12}{'с черновиком, с':>17}"
+        f"{'принято':>10}{'ускорение':>11}{'=':>3}"
+    )
+
+    total_plain = total_assisted = 0.0
+    drafted = accepted = 0
+
+    for name, text in examples.items():
+        model_ext._assistant_model = None
+        plain, plain_output, plain_stats = timed_generate(model_ext, text, args.repeats)
+
+        model_ext._assistant_model = draft
+        assisted, assisted_output, stats = timed_generate(model_ext, text, args.repeats)
+
+        total_plain += plain
+        total_assisted += assisted
+        drafted += stats["draft_tokens"]
+        accepted += stats["accepted_draft_tokens"]
+        acceptance = stats["accepted_draft_tokens"] / max(stats["draft_tokens"], 1)
+
+        print(
+            f"{name:<18}{plain_stats['generated_tokens']:>9}{plain:>12.2f}{assisted:>17.2f}"
+            f"{acceptance:>10.0%}{plain / assisted:>10.2f}x"
+            f"{'да' if plain_output == assisted_output else 'нет':>3}"
+        )
+
+    print(
+        f"\nИтого: принято {accepted / max(drafted, 1):.0%} токенов черновика, "
+        f"ускорение {total_plain / total_assisted:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
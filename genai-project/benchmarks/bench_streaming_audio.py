@@ -0,0 +1,105 @@
+"""
+Бенчмарк аудио → LLM: суммарная задержка от загрузки записи интервью до
+ответа экстрактора в трёх режимах:
+
+    последовательно  — вся запись декодируется (без VAD), затем промпт целиком;
+    VAD              — то же с vad_filter (паузы не декодируются);
+    VAD + префилл    — сегменты копятся по мере декодирования, промпт
+                       предзаполняется в KV-кэш параллельно с транскрибацией
+                       (TranscriptPrefill), после последнего сегмента остаётся
+                       только хвост промпта и генерация.
+
+Запуск из каталога genai-project (запись ~10 минут):
+    python -m benchmarks.bench_streaming_audio --audio interview.wav \\
+        --whisper medium --model Qwen/Qwen3-4B-Instruct-2507 --backend cpu
+
+Время генерации ответа одинаково во всех режимах (вывод не разбирается),
+разница — в транскрибации и префилле. «После речи» — время от последнего
+сегмента до ответа.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.ai.batching import ExtractionBatcher
+from app.ai.extractor import extractor
+from app.ai.transcriber import TranscriberPool
+from app.api.services import TranscriptPrefill, read_resume_text
+
+
+async def run_mode(pool, batcher, audio: str, prefill: bool) -> dict:
+    model_ext = batcher.extractor
+    feeder = TranscriptPrefill(batcher) if prefill else None
+    last_segment = None
+
+    def on_text(text):
+        nonlocal last_segment
+        last_segment = perf_counter()
+        if feeder is not None:
+            feeder(text)
+
+    start = perf_counter()
+    text = await read_resume_text(Path(audio), pool, on_text)
+    transcribed = perf_counter()
+    session = await feeder.result() if feeder is not None else None
+
+    async with batcher.gpu_lock:
+        await run_in_threadpool(model_ext._generate, text, prefill=session)
+    done = perf_counter()
+
+    return {
+        "transcribe_s": transcribed - start,
+        "after_speech_s": done - (last_segment or transcribed),
+        "total_s": done - start,
+        "prompt_tokens": model_ext.generation_stats()["recent"][-1]["prompt_tokens"],
+        "prefilled_tokens": session.fed_tokens if session is not None else 0,
+        "audio_s": pool.audio_seconds,
+    }
+
+
+async def main_async(args):
+    model_ext = extractor(args.model, backend=args.backend, num_threads=args.threads)
+    batcher = ExtractionBatcher(model_ext, gpu_lock=asyncio.Lock())
+
+    modes = [("последовательно", False, False), ("VAD", True, False), ("VAD + префилл", True, True)]
+
+    print(f"\nЗапись: {args.audio}, Whisper: {args.whisper}, LLM: {args.model} ({args.backend})")
+    print(
+        f"{'режим':<18}{'запись, с':>11}{'транскр., с':>13}{'после речи, с':>15}"
+        f"{'итого, с':>10}{'префилл':>14}"
+    )
+
+    for name, vad, prefill in modes:
+        pool = TranscriberPool(
+            args.whisper, device="cpu", compute_type=args.compute_type, cpu_threads=args.threads or 0, vad_filter=vad
+        )
+        pool.load()
+        result = await run_mode(pool, batcher, args.audio, prefill)
+        print(
+            f"{name:<18}{result['audio_s']:>11.0f}{result['transcribe_s']:>13.1f}"
+            f"{result['after_speech_s']:>15.1f}{result['total_s']:>10.1f}"
+            f"{result['prefilled_tokens']:>7}/{result['prompt_tokens']:<6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--audio", required=True)
+    parser.add_argument("--whisper", default="medium")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--model", default="Qwen/Qwen3-4B-Instruct-2507")
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--threads", type=int, default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
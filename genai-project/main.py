@@ -8,7 +8,7 @@ import sys
 import os
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
@@ -16,12 +16,20 @@ from contextlib import asynccontextmanager
 
 TESTING = os.getenv("TESTING", "0") == "1"
 
-from app.api.database import init_db
+from app.api.database import engine, init_db
+from app.api.cache_store import PersistentCache
+from app.api.pipeline import LLM, TRANSCRIPTION, AnalysisPipeline
+from app.api.readiness import ComponentRegistry, require_components
 from app.api.routes import router as api_router
 from app.ui_legacy.dashboard_api import router as dashboard_router
 from app.ml_legacy.generator import generate_if_needed
-from app.ml_legacy.predictor import train_if_needed
+from app.ml_legacy.predictor import RetentionPredictor, SharedPredictor, train_if_needed
 from app.core.config import settings
+from app.core.cache import LRUCache
+from app.ai.batching import ExtractionBatcher
+from app.ai.routing import ExtractionRouter
+from app.ai.rule_extractor import RuleExtractor
+from app.ai.transcriber import TranscriberPool
 
 if not TESTING:
     from app.ai.extractor import extractor
@@ -31,6 +39,119 @@ BASE_DIR = Path(__file__).resolve().parent
 FRONTEND_DIR = BASE_DIR / "app" / "frontend"
 
 
+def load_predictor(shared_predictor: SharedPredictor, logger: logging.Logger) -> None:
+    generate_if_needed()
+    train_if_needed()
+
+    if not shared_predictor.load():
+        logger.warning("Retention model is not available, ML fallback will be used.")
+
+
+def load_extractor(model_name: str, logger: logging.Logger, draft_model_name: str = None):
+    if TESTING:
+        return object()
+
+    return extractor(
+        model_name,
+        logger=logger,
+        backend=settings.EXTRACTOR_BACKEND,
+        num_threads=settings.EXTRACTOR_NUM_THREADS,
+        draft_model_name=draft_model_name,
+    )
+
+
+def load_transcriber(logger: logging.Logger, executor=None):
+    """Пул Whisper и его модели; модели добавляются в пул уже в цикле событий."""
+    if TESTING:
+        return None, []
+
+    pool = TranscriberPool(
+        settings.TRANSCRIBER_MODEL_SIZE,
+        device=settings.TRANSCRIBER_DEVICE,
+        compute_type=settings.TRANSCRIBER_COMPUTE_TYPE,
+        cpu_threads=settings.TRANSCRIBER_CPU_THREADS,
+        num_workers=settings.TRANSCRIBER_NUM_WORKERS,
+        pool_size=settings.TRANSCRIBER_POOL_SIZE,
+        vad_filter=settings.TRANSCRIBER_VAD_FILTER,
+        logger=logger,
+        executor=executor,
+    )
+    return pool, pool.load_models()
+
+
+async def load_components(app: FastAPI) -> None:
+    """
+    Фоновая загрузка ML-предиктора, LLM-экстрактора и пула Whisper (параллельно).
+
+    Малая модель (EXTRACTOR_SMALL_MODEL_NAME) грузится после основной, чтобы
+    пики памяти при загрузке не складывались; маршрутизатор включается,
+    когда готовы обе. Ошибка одного компонента не мешает другому: она
+    записывается в app.state.components и видна в /api/health/ready.
+    """
+    components = app.state.components
+    logger = app.state.logger
+
+    async def predictor_task():
+        await components.load("predictor", lambda: load_predictor(app.state.predictor, logger))
+
+    async def extractor_task():
+        try:
+            async with app.state.gpu_lock:
+                model_ext = await components.load(
+                    "extractor",
+                    lambda: load_extractor(
+                        settings.EXTRACTOR_MODEL_NAME, logger, settings.EXTRACTOR_DRAFT_MODEL_NAME
+                    ),
+                )
+        except Exception:
+            # Без основной модели малая не грузится: иначе она осталась бы pending
+            # и /api/health/ready бесконечно советовал бы повторить запрос.
+            if settings.EXTRACTOR_SMALL_MODEL_NAME:
+                components.fail("extractor_small", "Не загрузилась основная модель (extractor)")
+            raise
+        app.state.extractor = model_ext
+        app.state.extraction_batcher.extractor = model_ext
+
+        if not settings.EXTRACTOR_SMALL_MODEL_NAME:
+            return
+
+        async with app.state.gpu_lock:
+            small_ext = await components.load(
+                "extractor_small",
+                lambda: load_extractor(settings.EXTRACTOR_SMALL_MODEL_NAME, logger),
+            )
+        app.state.extraction_router = ExtractionRouter(
+            ExtractionBatcher(
+                small_ext,
+                gpu_lock=app.state.gpu_lock,
+                max_batch_size=settings.EXTRACTION_MAX_BATCH_SIZE,
+                window_ms=settings.EXTRACTION_BATCH_WINDOW_MS,
+                logger=logger,
+                executor=app.state.pipeline.stage(LLM),
+            ),
+            app.state.extraction_batcher,
+            count_tokens=small_ext.count_tokens,
+            max_small_tokens=settings.ROUTER_SMALL_MAX_TOKENS,
+            max_small_complexity=settings.ROUTER_SMALL_MAX_COMPLEXITY,
+            min_confidence=settings.ROUTER_MIN_CONFIDENCE,
+        )
+
+    async def transcriber_task():
+        pool, models = await components.load(
+            "transcriber", lambda: load_transcriber(logger, app.state.pipeline.stage(TRANSCRIPTION))
+        )
+        if pool is not None:
+            pool.add(models)
+        app.state.transcriber = pool
+
+    results = await asyncio.gather(
+        predictor_task(), extractor_task(), transcriber_task(), return_exceptions=True
+    )
+    for name, result in zip(("predictor", "extractor", "transcriber"), results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to load {name}: {result}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -50,27 +171,106 @@ async def lifespan(app: FastAPI):
     app.state.logger = logging.getLogger("uvicorn")
     init_db()
 
-    generate_if_needed()
-    train_if_needed()
+    # Модели грузятся в фоне: сервер сразу принимает запросы, а маршруты,
+    # которым нужен незагруженный компонент, отвечают 503 (см. app.api.readiness).
+    component_names = ["predictor", "extractor", "transcriber"]
+    if settings.EXTRACTOR_SMALL_MODEL_NAME:
+        component_names.append("extractor_small")
+    app.state.components = ComponentRegistry(
+        component_names,
+        retry_after_seconds=settings.STARTUP_RETRY_AFTER_SECONDS,
+    )
+
+    # Модель CatBoost загружается один раз на процесс и переиспользуется всеми запросами.
+    app.state.predictor = SharedPredictor(
+        predictor_factory=lambda: RetentionPredictor(
+            cache_factory=lambda: LRUCache(
+                max_size=settings.PREDICTOR_CACHE_SIZE,
+                ttl_seconds=settings.PREDICTOR_CACHE_TTL_SECONDS,
+            ),
+            lookup_resolution=settings.PREDICTOR_LOOKUP_RESOLUTION,
+        )
+    )
 
     app.state.gpu_lock = asyncio.Lock()
+    app.state.extractor = None
+
+    # Этапы анализа (I/O, Whisper, LLM, CatBoost + БД) со своими пулами потоков:
+    # разные запросы одновременно находятся на разных этапах.
+    app.state.pipeline = AnalysisPipeline(
+        io_workers=settings.PIPELINE_IO_WORKERS,
+        transcription_workers=settings.PIPELINE_TRANSCRIPTION_WORKERS or settings.TRANSCRIBER_POOL_SIZE,
+        llm_workers=settings.PIPELINE_LLM_WORKERS,
+        predict_workers=settings.PIPELINE_PREDICT_WORKERS,
+        queue_size=settings.PIPELINE_QUEUE_SIZE,
+        max_in_flight=settings.PIPELINE_MAX_IN_FLIGHT,
+        retry_after_seconds=settings.STARTUP_RETRY_AFTER_SECONDS,
+    )
+
+    # Запросы к LLM собираются в микробатчи; gpu_lock берётся на весь батч.
+    # Экстрактор подставляется, когда загрузится.
+    app.state.extraction_batcher = ExtractionBatcher(
+        None,
+        gpu_lock=app.state.gpu_lock,
+        max_batch_size=settings.EXTRACTION_MAX_BATCH_SIZE,
+        window_ms=settings.EXTRACTION_BATCH_WINDOW_MS,
+        logger=app.state.logger,
+        executor=app.state.pipeline.stage(LLM),
+    )
+    # Маршрутизатор малая/большая модель; None — всё идёт в основную.
+    app.state.extraction_router = None
+    # Пул Whisper для аудиорезюме; пока None, аудио получает 503.
+    app.state.transcriber = None
+
+    app.state.extraction_cache = (
+        PersistentCache(
+            engine,
+            "extraction",
+            max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+            max_bytes=settings.EXTRACTION_CACHE_MAX_BYTES,
+        )
+        if settings.EXTRACTION_CACHE_ENABLED
+        else None
+    )
+    # Транскрипты аудио по отпечатку файла: повторная загрузка записи без Whisper.
+    app.state.transcript_cache = (
+        PersistentCache(engine, "transcript", max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES)
+        if settings.TRANSCRIPT_CACHE_ENABLED
+        else None
+    )
+
+    # Шаблонные резюме разбираются правилами без LLM.
+    app.state.rule_extractor = (
+        RuleExtractor(min_confidence=settings.FAST_PATH_MIN_CONFIDENCE)
+        if settings.FAST_PATH_ENABLED
+        else None
+    )
+
+    app.state.startup_task = asyncio.create_task(load_components(app))
     if TESTING:
-        app.state.extractor = object()
-    else:
-        async with app.state.gpu_lock:
-            app.state.extractor = extractor(
-                "Qwen/Qwen3-4B-Instruct-2507", logger=app.state.logger
-            )
+        # Тестам нужно детерминированное состояние: ждём загрузку до первого запроса.
+        await app.state.startup_task
 
     yield
 
     print("Executing shutdown logic...")
+    if not app.state.startup_task.done():
+        # Поток загрузки модели не прерывается, но результат уже не нужен.
+        app.state.startup_task.cancel()
+    await app.state.extraction_batcher.stop()
+    if app.state.extraction_router:
+        await app.state.extraction_router.batchers["small"].stop()
     async with app.state.gpu_lock:
         if app.state.extractor:
             app.state.logger.info("Releasing extractor resources...")
             del app.state.extractor
             gc.collect()
             torch.cuda.empty_cache()
+    app.state.pipeline.shutdown()
+    # Время обращений копится в памяти кэшей, записываем его для порядка LRU.
+    for cache in (app.state.extraction_cache, app.state.transcript_cache):
+        if cache is not None:
+            cache.flush()
 
 
 app = FastAPI(
@@ -92,7 +292,12 @@ app.add_middleware(
 )
 
 app.include_router(api_router, prefix="/api")
-app.include_router(dashboard_router, prefix="/api")
+# What-if дашборда читает датасет и model.pkl, которые готовит загрузка предиктора.
+app.include_router(
+    dashboard_router,
+    prefix="/api",
+    dependencies=[Depends(require_components("predictor"))],
+)
 
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 
@@ -1,4 +1,7 @@
+import asyncio
+import json
 import os
+import uuid
 import pytest
 from unittest.mock import patch, AsyncMock
 from fastapi.testclient import TestClient
@@ -6,7 +9,7 @@ from fastapi.testclient import TestClient
 os.environ["TESTING"] = "1"
 
 from main import app
-from app.core.schemas import CandidateVector
+from app.core.schemas import CandidateResult, CandidateVector
 from app.core.enums import ShiftPreference
 
 
@@ -36,6 +39,34 @@ def test_get_history(client):
     assert isinstance(response.json(), list)
 
 
+def test_health_endpoints_report_loaded_components(client):
+    """
+    Проверяет liveness и readiness: в режиме TESTING lifespan дожидается
+    фоновой загрузки, поэтому все компоненты готовы.
+
+    Parameters
+    ----------
+    client : TestClient
+        Тестовый клиент приложения.
+
+    Returns
+    -------
+    None
+    """
+    assert client.get("/api/health/live").json() == {"status": "alive"}
+
+    response = client.get("/api/health/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert {name: state["status"] for name, state in body["components"].items()} == {
+        "predictor": "ready",
+        "extractor": "ready",
+        "transcriber": "ready",
+    }
+
+
 @patch("app.api.services.ml_predict", new_callable=AsyncMock)
 @patch("app.api.services.ai_extract", new_callable=AsyncMock)
 def test_post_analyze(mock_ai_extract, mock_ml_predict, client):
@@ -77,3 +108,201 @@ def test_post_analyze(mock_ai_extract, mock_ml_predict, client):
     assert response_data["raw_summary"] == "Test Summary"
     assert response_data["retention_score"] == 0.95
     assert response_data["risk_factors"] == ["No risks"]
+
+
+def test_ml_predict_uses_shared_predictor(client):
+    """
+    Проверяет, что ML-шаг использует предиктор, загруженный при старте приложения.
+
+    Parameters
+    ----------
+    client : TestClient
+        Клиент с выполненным lifespan (модель уже загружена в app.state).
+
+    Returns
+    -------
+    None
+    """
+    from app.api.services import ml_predict
+
+    shared_predictor = client.app.state.predictor
+    predictor = shared_predictor.get()
+    assert predictor is not None
+
+    vector = CandidateVector(
+        skills_verified_count=8,
+        years_experience=6.0,
+        commute_time_minutes=30,
+        shift_preference=ShiftPreference.DAY_ONLY,
+        salary_expectation=70000,
+        has_certifications=True,
+    )
+
+    score, risks = asyncio.run(ml_predict(vector, shared_predictor))
+
+    assert 0.0 <= score <= 1.0
+    assert isinstance(risks, list)
+    # Повторный вызов обслуживается тем же экземпляром без перезагрузки модели.
+    asyncio.run(ml_predict(vector, shared_predictor))
+    assert shared_predictor.get() is predictor
+
+
+def test_admin_stats_reports_predictor_cache(client):
+    """
+    Проверяет, что админский эндпоинт отдаёт счётчики кэшей предиктора.
+
+    Parameters
+    ----------
+    client : TestClient
+        Тестовый клиент приложения.
+
+    Returns
+    -------
+    None
+    """
+    response = client.get("/api/admin/stats")
+
+    assert response.status_code == 200
+    cache_stats = response.json()["predictor_cache"]
+    assert set(cache_stats) == {"prediction", "explain", "positive"}
+    assert {"hits", "misses", "evictions"} <= set(cache_stats["prediction"])
+
+
+def test_demo_predict_batch_matches_single(client):
+    """
+    Проверяет, что пакетный what-if эндпоинт возвращает по каждому кандидату
+    то же, что и одиночный /api/demo/predict, а некорректная строка даёт 400.
+
+    Parameters
+    ----------
+    client : TestClient
+        Тестовый клиент приложения.
+
+    Returns
+    -------
+    None
+    """
+    candidates = [
+        client.get(f"/api/demo/candidate/{category}").json()["candidate"]
+        for category in ("green", "yellow", "red", "edge")
+    ]
+
+    response = client.post("/api/demo/predict/batch", json=candidates)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == len(candidates)
+
+    columns = body["columns"]
+
+    for i, candidate in enumerate(candidates):
+        single = client.post("/api/demo/predict", json=candidate).json()
+
+        assert columns["retention_probability"][i] == pytest.approx(
+            single["retention_probability"]
+        )
+        for key in ("risk_level", "requires_review", "risk_factors", "positive_factors"):
+            assert columns[key][i] == single[key]
+
+    invalid = [candidates[0], {**candidates[1], "age": 16}]
+    response = client.post("/api/demo/predict/batch", json=invalid)
+
+    assert response.status_code == 400
+    assert "Кандидаты 1" in response.json()["detail"]
+
+
+def test_analyze_stream_emits_stages_tokens_and_result(client):
+    """
+    Проверяет SSE-эндпоинт: события этапов, фрагменты JSON от LLM и итоговый
+    результат последним событием. LLM и запись в БД замоканы.
+
+    Parameters
+    ----------
+    client : TestClient
+        Тестовый клиент приложения.
+
+    Returns
+    -------
+    None
+    """
+    vector = CandidateVector(
+        skills_verified_count=5,
+        years_experience=4.0,
+        commute_time_minutes=30,
+        shift_preference=ShiftPreference.ANY,
+        salary_expectation=70000,
+        has_certifications=True,
+    )
+
+    async def fake_stream(resume_text, batcher, prefill=None):
+        yield "token", '{"full_name": '
+        yield "token", '"Stream Candidate"'
+        yield "result", ("Stream Candidate", "Summary", vector)
+
+    def fake_save(session, full_name, raw_summary, vector, retention_score, risk_factors):
+        return CandidateResult(
+            id="stream-id",
+            full_name=full_name,
+            raw_summary=raw_summary,
+            vector=vector,
+            retention_score=retention_score,
+            risk_factors=risk_factors,
+        )
+
+    # Уникальный текст, чтобы не попасть в кэш экстракции от прошлых запусков.
+    content = f"stream resume {uuid.uuid4()}".encode()
+
+    with patch("app.api.services.stream_extraction", fake_stream), patch(
+        "app.api.services.save_candidate", fake_save
+    ):
+        response = client.post(
+            "/api/analyze/stream", files={"file": ("resume.txt", content, "text/plain")}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+    tokens = [event["text"] for event in events if event["event"] == "token"]
+    stages = [(event["stage"], event["status"]) for event in events if event["event"] == "stage"]
+
+    assert "".join(tokens) == '{"full_name": "Stream Candidate"'
+    assert stages[:3] == [("read", "started"), ("read", "done"), ("extract", "started")]
+    assert ("predict", "done") in stages
+    assert events[-1]["event"] == "result"
+    assert events[-1]["data"]["full_name"] == "Stream Candidate"
+    assert client.app.state.pipeline.stats()["in_flight"] == 0
+
+
+def test_analyze_stream_rejects_before_streaming_when_overloaded(client):
+    """
+    Проверяет, что перегруженный конвейер отвечает на /analyze/stream
+    статусом 503 с Retry-After, а не событием error в ответе 200.
+
+    Parameters
+    ----------
+    client : TestClient
+        Тестовый клиент приложения.
+
+    Returns
+    -------
+    None
+    """
+    pipeline = client.app.state.pipeline
+    release = pipeline.reserve(pipeline.max_in_flight)
+
+    try:
+        response = client.post(
+            "/api/analyze/stream", files={"file": ("resume.txt", b"resume", "text/plain")}
+        )
+    finally:
+        release()
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert pipeline.stats()["in_flight"] == 0
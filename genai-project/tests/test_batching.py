@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+from app.ai.batching import ExtractionBatcher
+
+
+class FakeExtractor:
+    """Экстрактор-заглушка: запоминает размеры батчей, на "bad" возвращает ошибку."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def extract_batch(self, prompts):
+        self.batch_sizes.append(len(prompts))
+        return [
+            ValueError("bad resume") if prompt == "bad" else (prompt.upper(), prompt, None)
+            for prompt in prompts
+        ]
+
+
+def test_batcher_groups_concurrent_requests():
+    """
+    Проверяет, что одновременные запросы собираются в батчи не больше
+    max_batch_size, каждый получает свой результат, а ошибка одного
+    резюме не ломает остальные.
+
+    Returns
+    -------
+    None
+    """
+    extractor = FakeExtractor()
+
+    async def scenario():
+        batcher = ExtractionBatcher(
+            extractor, gpu_lock=asyncio.Lock(), max_batch_size=3, window_ms=50
+        )
+        prompts = ["a", "b", "bad", "c", "d"]
+
+        results = await asyncio.gather(
+            *(batcher.submit(prompt) for prompt in prompts), return_exceptions=True
+        )
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert extractor.batch_sizes == [3, 2]
+    assert results[0] == ("A", "a", None)
+    assert isinstance(results[2], ValueError)
+    assert results[4] == ("D", "d", None)
+
+    assert stats["batches"] == 2
+    assert stats["completed"] == 4
+    assert stats["failed"] == 1
+    assert stats["batch_size_histogram"] == {"2": 1, "3": 1}
+    assert stats["queue_depth"] == 0
+
+
+def test_stop_fails_batch_in_flight():
+    """
+    Проверяет, что stop() завершает ошибкой запросы батча, который уже забран
+    из очереди и выполняется, а не оставляет их ждать вечно.
+
+    Returns
+    -------
+    None
+    """
+    started, release = threading.Event(), threading.Event()
+
+    class SlowExtractor:
+        def extract_batch(self, prompts):
+            started.set()
+            release.wait(timeout=5)
+            return [(prompt, prompt, None) for prompt in prompts]
+
+    async def scenario():
+        batcher = ExtractionBatcher(SlowExtractor(), gpu_lock=asyncio.Lock(), window_ms=1)
+        request = asyncio.ensure_future(batcher.submit("a"))
+
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+
+        await batcher.stop()
+        try:
+            return await asyncio.wait_for(request, timeout=1)
+        except RuntimeError as error:
+            return error
+        finally:
+            release.set()
+
+    assert isinstance(asyncio.run(scenario()), RuntimeError)
@@ -0,0 +1,53 @@
+from app.core.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """
+    Проверяет ограничение размера и LRU-вытеснение с учётом счётчиков.
+
+    Returns
+    -------
+    None
+    """
+    cache = LRUCache(max_size=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" становится самым свежим
+
+    cache.put("c", 3)  # вытесняет "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_lru_cache_ttl_and_invalidation():
+    """
+    Проверяет устаревание записей по TTL и полную инвалидацию.
+
+    Returns
+    -------
+    None
+    """
+    now = [0.0]
+    cache = LRUCache(max_size=10, ttl_seconds=5.0, clock=lambda: now[0])
+
+    cache.put("key", "value")
+    now[0] = 4.0
+    assert cache.get("key") == "value"
+
+    now[0] = 10.0
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.put("key", "value")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,89 @@
+import json
+
+import torch
+from lmformatenforcer import JsonSchemaParser
+
+from app.ai.extractor import JsonCompleteCriteria, schema_token_budget
+from app.core.schemas import RAW_SUMMARY_MAX_LENGTH, CandidateSummary
+
+
+class CharTokenizer:
+    """Токенизатор-заглушка: один символ — один токен, id 0 — EOS/паддинг."""
+
+    eos_token_id = 0
+    pad_token_id = 0
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": [ord(char) for char in text]}
+
+    def decode(self, token_ids, skip_special_tokens=True):
+        return "".join(chr(int(token)) for token in token_ids if int(token) != 0)
+
+
+def test_generation_stops_when_json_object_closes():
+    """
+    Проверяет, что строка батча останавливается на закрывающей скобке
+    корневого объекта, а незаконченная строка продолжает генерацию.
+
+    Returns
+    -------
+    None
+    """
+    summary = {
+        "full_name": "Ivan Petrov",
+        "raw_summary": "Welder } with {5} years",
+        "vector": {
+            "skills_verified_count": 3,
+            "years_experience": 5.0,
+            "commute_time_minutes": 40,
+            "shift_preference": 2,
+            "salary_expectation": 60000,
+            "has_certifications": True,
+        },
+    }
+    text = json.dumps(summary)
+    longer = json.dumps({**summary, "raw_summary": "Welder with five years " * 3})
+    prompt = [7, 7, 7]
+
+    criteria = JsonCompleteCriteria(
+        CharTokenizer(), JsonSchemaParser(CandidateSummary.model_json_schema())
+    )
+
+    stopped_at = None
+    for step in range(1, len(text) + 3):
+        rows = torch.tensor(
+            [
+                # закончившуюся строку generate дополняет паддингом
+                prompt + [ord(char) for char in text[:step]] + [0] * (step - len(text)),
+                prompt + [ord(char) for char in longer[:step]],
+            ]
+        )
+        done = criteria(rows, None)
+
+        if done[0] and stopped_at is None:
+            stopped_at = step
+        assert not done[1]
+
+    assert stopped_at == len(text)
+    assert criteria.stop_reasons == ["json", "budget"]
+    assert criteria.generated_tokens[0] == len(text)
+
+
+def test_token_budget_covers_longest_summary():
+    """
+    Проверяет, что бюджет токенов больше самого длинного допустимого ответа
+    и растёт вместе с ограничением длины raw_summary.
+
+    Returns
+    -------
+    None
+    """
+    schema = CandidateSummary.model_json_schema()
+    budget = schema_token_budget(CharTokenizer(), schema, margin=1.0, slack=0)
+    assert budget > RAW_SUMMARY_MAX_LENGTH + 100
+
+    longer = json.loads(json.dumps(schema))
+    longer["properties"]["raw_summary"]["maxLength"] = RAW_SUMMARY_MAX_LENGTH * 2
+    assert schema_token_budget(CharTokenizer(), longer, margin=1.0, slack=0) == (
+        budget + RAW_SUMMARY_MAX_LENGTH
+    )
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml_legacy.generator import generate_if_needed
+from app.ml_legacy.oblivious import ObliviousTreeEnsemble
+from app.ml_legacy.predictor import DEFAULT_DATA_PATH, RetentionPredictor, train_if_needed
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    generate_if_needed()
+    train_if_needed()
+
+    predictor = RetentionPredictor()
+    assert predictor.load_model()
+    return predictor
+
+
+@pytest.fixture(scope="module")
+def ensemble(predictor):
+    return ObliviousTreeEnsemble.from_catboost(predictor.model, predictor.feature_names)
+
+
+@pytest.fixture(scope="module")
+def dataset(predictor):
+    return pd.read_csv(DEFAULT_DATA_PATH)[predictor.feature_names]
+
+
+def assert_parity(predictor, ensemble, features):
+    np.testing.assert_allclose(
+        ensemble.predict_proba(features),
+        predictor.model.predict_proba(features),
+        rtol=0,
+        atol=1e-9,
+    )
+
+
+def test_parity_on_dataset(predictor, ensemble, dataset):
+    """
+    Проверяет совпадение с model.predict_proba на строках обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    assert_parity(predictor, ensemble, dataset)
+
+
+def test_parity_on_single_row_and_matrix(predictor, ensemble, dataset):
+    """
+    Проверяет одиночную строку и NumPy-матрицу вместо DataFrame.
+
+    Returns
+    -------
+    None
+    """
+    assert_parity(predictor, ensemble, dataset.head(1))
+    assert_parity(predictor, ensemble, dataset.to_numpy(dtype=float))
+
+
+def test_parity_on_random_and_out_of_range_rows(predictor, ensemble):
+    """
+    Проверяет случайные значения, включая выходящие за диапазон обучающих данных.
+
+    Returns
+    -------
+    None
+    """
+    rng = np.random.default_rng(7)
+    features = rng.uniform(-100, 250000, size=(5000, len(predictor.feature_names)))
+    assert_parity(predictor, ensemble, features)
+
+
+def test_parity_on_split_borders(predictor, ensemble, dataset):
+    """
+    Проверяет значения ровно на границах сплитов и в соседних float-точках.
+
+    Returns
+    -------
+    None
+    """
+    # Бесконечные границы — заглушки уровней неполных деревьев.
+    finite = np.isfinite(ensemble.split_borders)
+    borders = ensemble.split_borders[finite].astype(float)
+    split_features = ensemble.split_features[finite]
+
+    base = np.repeat(dataset.head(1).to_numpy(dtype=float), len(borders), axis=0)
+    rows = np.arange(len(base))
+
+    for shifted in (borders, np.nextafter(borders, np.inf), np.nextafter(borders, -np.inf)):
+        features = base.copy()
+        features[rows, split_features] = shifted
+        assert_parity(predictor, ensemble, features)
+
+
+def test_save_load_roundtrip(ensemble, dataset, tmp_path):
+    """
+    Проверяет, что сохранённый в .npz ансамбль оценивается так же без CatBoost.
+
+    Returns
+    -------
+    None
+    """
+    path = tmp_path / "ensemble.npz"
+    ensemble.save(str(path))
+    restored = ObliviousTreeEnsemble.load(str(path))
+
+    assert restored.feature_names == ensemble.feature_names
+    np.testing.assert_array_equal(restored.predict_raw(dataset), ensemble.predict_raw(dataset))
+
+
+def test_empty_batch(ensemble):
+    """
+    Проверяет пустую пачку.
+
+    Returns
+    -------
+    None
+    """
+    result = ensemble.predict_proba(np.empty((0, len(ensemble.feature_names))))
+    assert result.shape == (0, 2)
+
+
+def test_predictor_batch_with_numpy_engine(predictor, dataset):
+    """
+    Проверяет, что predict_retention_batch(engine="numpy") совпадает с CatBoost-путём.
+
+    Returns
+    -------
+    None
+    """
+    expected = predictor.predict_retention_batch(dataset)
+    result = predictor.predict_retention_batch(dataset, engine="numpy")
+
+    np.testing.assert_allclose(
+        result["retention_probability"], expected["retention_probability"], atol=1e-9
+    )
+    assert list(result["risk_level"]) == list(expected["risk_level"])
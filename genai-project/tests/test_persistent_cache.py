@@ -0,0 +1,236 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.ai.routing import ExtractionRouter
+from app.api.cache_store import PersistentCache
+from app.api.models_db import CacheEntryTable
+from app.ai.transcriber import TranscriptSegment
+from app.api.services import ai_extract, extraction_cache_key, read_resume_text
+from app.core.enums import ShiftPreference
+from app.core.schemas import CandidateVector
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_persistent_cache_evicts_least_recently_read():
+    """
+    Проверяет LRU-вытеснение по числу записей и по суммарному размеру.
+
+    Returns
+    -------
+    None
+    """
+    ticks = iter(range(100))
+    cache = PersistentCache(
+        make_engine(), "test", max_entries=2, max_bytes=10, clock=lambda: next(ticks)
+    )
+
+    cache.put("a", "1111")
+    cache.put("b", "2222")
+    assert cache.get("a") == "1111"  # "a" читали позже "b"
+
+    cache.put("c", "3333")  # превышен max_entries, вытесняется "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == "1111"
+
+    cache.put("d", "44444444")  # превышен max_bytes, вытесняются "c" и "a"
+    assert cache.get("a") is None
+    assert cache.get("d") == "44444444"
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["size_bytes"] == 8
+    assert stats["evictions"] == 3
+
+
+class CountingBatcher:
+    def __init__(self):
+        self.calls = 0
+
+    async def submit(self, text):
+        self.calls += 1
+        vector = CandidateVector(
+            skills_verified_count=3,
+            years_experience=2.5,
+            commute_time_minutes=40,
+            shift_preference=ShiftPreference.ANY,
+            salary_expectation=60000,
+            has_certifications=True,
+        )
+        return "Иван Иванов", "Сварщик", vector
+
+
+def test_ai_extract_reuses_cached_summary(tmp_path):
+    """
+    Проверяет, что тот же текст резюме (с другими пробелами и в другом файле)
+    не вызывает LLM повторно, а смена модели меняет ключ кэша: ответ,
+    полученный через маршрутизатор (возможно, малой моделью), не выдаётся за
+    ответ основной модели, а ответ основной модели маршрутизатору подходит.
+
+    Returns
+    -------
+    None
+    """
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+    first.write_text("Иван Иванов,  сварщик\n5 лет опыта", encoding="utf-8")
+    second.write_text("Иван Иванов, сварщик 5 лет опыта\n", encoding="utf-8")
+
+    batcher = CountingBatcher()
+    cache = PersistentCache(make_engine(), "extraction")
+
+    result_first = asyncio.run(ai_extract(first, batcher, cache))
+    result_second = asyncio.run(ai_extract(second, batcher, cache))
+
+    assert batcher.calls == 1
+    assert result_second == result_first
+    assert cache.stats()["hits"] == 1
+
+    text = second.read_text(encoding="utf-8")
+    assert extraction_cache_key(text, "model-a") != extraction_cache_key(text, "model-b")
+
+    small = CountingBatcher()
+    router = ExtractionRouter(small, batcher, count_tokens=len)
+
+    assert asyncio.run(ai_extract(first, batcher, cache, router=router)) == result_first
+    assert small.calls == 0
+
+    routed = tmp_path / "routed.txt"
+    routed.write_text("Пётр Петров, стропальщик 3 года", encoding="utf-8")
+    calls = batcher.calls
+
+    asyncio.run(ai_extract(routed, batcher, cache, router=router))
+    asyncio.run(ai_extract(routed, batcher, cache, router=router))
+    assert small.calls == 1
+    assert router.stats()["routes"] == {"simple_input": 1}
+    assert batcher.calls == calls + 1  # эскалация: ответ малой модели неправдоподобен
+
+    asyncio.run(ai_extract(routed, batcher, cache))
+    assert batcher.calls == calls + 2
+
+
+class CountingPool:
+    """Пул Whisper-заглушка: считает транскрибации."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def transcribe_stream(self, file_path, timestamps=False):
+        self.calls += 1
+        yield TranscriptSegment(0.0, 4.2, "Иван Иванов, сварщик.")
+        yield TranscriptSegment(4.2, 9.0, "Пять лет опыта.")
+
+
+def test_repeat_audio_upload_skips_whisper(tmp_path):
+    """
+    Проверяет кэш транскриптов: та же запись под другим именем берётся из
+    кэша без Whisper (даже когда пул не загружен), сегменты хранятся с
+    таймкодами, а другая запись — промах.
+
+    Returns
+    -------
+    None
+    """
+    first = tmp_path / "first.wav"
+    copy = tmp_path / "copy.wav"
+    other = tmp_path / "other.wav"
+    first.write_bytes(b"RIFF-interview")
+    copy.write_bytes(b"RIFF-interview")
+    other.write_bytes(b"RIFF-another")
+
+    pool = CountingPool()
+    cache = PersistentCache(make_engine(), "transcript")
+
+    text = asyncio.run(read_resume_text(first, pool, transcript_cache=cache))
+    assert asyncio.run(read_resume_text(copy, None, transcript_cache=cache)) == text
+    assert pool.calls == 1
+
+    asyncio.run(read_resume_text(other, pool, transcript_cache=cache))
+    assert pool.calls == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_persistent_cache_reads_do_not_write():
+    """
+    Проверяет, что чтение не пишет в базу: время обращения копится в памяти
+    и записывается при flush() или перед вытеснением.
+
+    Returns
+    -------
+    None
+    """
+    ticks = iter(range(100))
+    engine = make_engine()
+    cache = PersistentCache(engine, "test", clock=lambda: next(ticks))
+    cache.put("a", "1")
+
+    def stored():
+        with Session(engine) as session:
+            entry = session.get(CacheEntryTable, ("test", "a"))
+            return entry.last_access, entry.hits
+
+    assert cache.get("a") == "1"
+    assert cache.get("a") == "1"
+    assert stored() == (0, 0)
+
+    cache.flush()
+    assert stored() == (2, 2)
+    assert cache.stats()["hits"] == 2
+
+
+def test_stream_reuses_answer_cached_through_router(tmp_path, monkeypatch):
+    """
+    Проверяет, что /analyze/stream берёт из кэша ответ, сохранённый /analyze
+    через маршрутизатор, а не генерирует его заново основной моделью.
+
+    Returns
+    -------
+    None
+    """
+    from app.api import services
+
+    resume = tmp_path / "resume.txt"
+    resume.write_text("Иван Иванов, сварщик 5 лет опыта", encoding="utf-8")
+
+    cache = PersistentCache(make_engine(), "extraction")
+    router = ExtractionRouter(CountingBatcher(), CountingBatcher(), count_tokens=len)
+    routed = asyncio.run(CountingBatcher().submit(""))
+    services.store_extraction(
+        cache, resume.read_text(encoding="utf-8"), routed, services.extraction_model_name(router)
+    )
+
+    async def no_stream(*args, **kwargs):
+        raise AssertionError("LLM не должна вызываться")
+        yield
+
+    async def fake_predict(vector, shared_predictor, pipeline=None):
+        return 0.8, []
+
+    monkeypatch.setattr(services, "stream_extraction", no_stream)
+    monkeypatch.setattr(services, "ml_predict", fake_predict)
+    monkeypatch.setattr(
+        services, "save_candidate", lambda session, *outcome: SimpleNamespace(model_dump=lambda mode: {})
+    )
+
+    async def collect():
+        return [
+            event
+            async for event in services.process_candidate_stream(
+                resume, CountingBatcher(), None, cache, router=router
+            )
+        ]
+
+    events = asyncio.run(collect())
+    assert {"event": "stage", "stage": "extract", "status": "done", "cached": True} in events
+    assert events[-1] == {"event": "result", "data": {}}
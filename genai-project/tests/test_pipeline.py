@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pipeline import LLM, TRANSCRIPTION, AnalysisPipeline, PipelineStage
+
+
+def test_stage_bounds_workers_and_queue():
+    """
+    Проверяет, что этап выполняет не больше workers задач одновременно,
+    принимает в очередь не больше queue_size, а остальные вызывающие ждут;
+    метрики загрузки и ожидания заполняются.
+
+    Returns
+    -------
+    None
+    """
+    stage = PipelineStage("test", workers=2, queue_size=1)
+    lock = threading.Lock()
+    active = max_active = 0
+
+    def work(i):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return i
+
+    async def run():
+        return await asyncio.gather(*(stage.run(work, i) for i in range(6)))
+
+    assert asyncio.run(run()) == list(range(6))
+    stage.shutdown()
+
+    stats = stage.stats()
+    assert max_active == 2
+    assert stats["max_queued"] <= 3  # workers + queue_size
+    assert stats["max_blocked"] == 3
+    assert stats["completed"] == 6
+    assert stats["queue_wait_p99_ms"] > 0
+    assert 0 < stats["utilisation"] <= 1
+
+
+def test_pipeline_overlaps_requests_across_stages():
+    """
+    Проверяет конвейерность: пока первый запрос в LLM, второй уже
+    транскрибируется (этапы не делят потоки).
+
+    Returns
+    -------
+    None
+    """
+    pipeline = AnalysisPipeline(transcription_workers=1, llm_workers=1)
+    spans = {}
+
+    def step(name):
+        started = time.perf_counter()
+        time.sleep(0.1)
+        spans[name] = (started, time.perf_counter())
+
+    async def request(i):
+        await pipeline.run(TRANSCRIPTION, step, f"transcribe-{i}")
+        await pipeline.run(LLM, step, f"llm-{i}")
+
+    async def run():
+        await asyncio.gather(request(0), request(1))
+
+    asyncio.run(run())
+    pipeline.shutdown()
+
+    llm_start, llm_end = spans["llm-0"]
+    transcribe_start, transcribe_end = spans["transcribe-1"]
+    assert transcribe_start < llm_end and llm_start < transcribe_end
+    assert pipeline.stats()["stages"][LLM]["completed"] == 2
+
+
+def test_admit_rejects_over_max_in_flight():
+    """
+    Проверяет, что сверх max_in_flight запрос получает 503 с Retry-After,
+    а после завершения предыдущего снова принимается.
+
+    Returns
+    -------
+    None
+    """
+    pipeline = AnalysisPipeline(max_in_flight=1, retry_after_seconds=3)
+
+    async def run():
+        async with pipeline.admit():
+            with pytest.raises(HTTPException) as error:
+                async with pipeline.admit():
+                    pass
+        async with pipeline.admit():
+            pass
+        return error.value
+
+    error = asyncio.run(run())
+    pipeline.shutdown()
+
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "3"
+    assert pipeline.stats()["rejected"] == 1
+    assert pipeline.stats()["in_flight"] == 0
+
+
+def test_reserve_counts_each_resume():
+    """
+    Проверяет, что пакет занимает по месту на резюме, освобождение
+    идемпотентно, а пакет больше max_in_flight проходит в пустой конвейер.
+
+    Returns
+    -------
+    None
+    """
+    pipeline = AnalysisPipeline(max_in_flight=4)
+
+    release = pipeline.reserve(3)
+    assert pipeline.stats()["in_flight"] == 3
+
+    with pytest.raises(HTTPException):
+        pipeline.reserve(2)
+
+    release()
+    release()
+    assert pipeline.stats()["in_flight"] == 0
+
+    pipeline.reserve(10)()
+    pipeline.shutdown()
+
+    assert pipeline.stats()["max_seen_in_flight"] == 10
+    assert pipeline.stats()["rejected"] == 1
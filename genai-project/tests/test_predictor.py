@@ -0,0 +1,287 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml_legacy.feature_contract import CONTINUOUS_FEATURE_RANGES, FEATURE_DEFAULTS
+from app.ml_legacy.feature_vector import FeatureVector
+from app.ml_legacy.generator import generate_if_needed
+from app.ml_legacy.predictor import (
+    DEFAULT_DATA_PATH,
+    PredictionGrid,
+    RetentionPredictor,
+    train_if_needed,
+)
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    generate_if_needed()
+    train_if_needed()
+
+    predictor = RetentionPredictor()
+    assert predictor.load_model()
+    return predictor
+
+
+@pytest.fixture(scope="module")
+def candidates(predictor):
+    df = pd.read_csv(DEFAULT_DATA_PATH)
+    sample = df[predictor.feature_names].head(200).copy()
+    # Edge case из бизнес-логики: нулевой опыт уходит в Yellow Zone.
+    sample.loc[sample.index[:5], "years_experience"] = 0.0
+    return sample
+
+
+def test_predict_retention_batch_matches_scalar(predictor, candidates):
+    """
+    Проверяет, что пакетная оценка построчно совпадает со скалярной.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    batch = predictor.predict_retention_batch(candidates)
+    records = candidates.to_dict(orient="records")
+
+    for i, features in enumerate(records):
+        scalar = predictor.predict_retention(features)
+
+        assert batch["retention_probability"][i] == pytest.approx(
+            scalar["retention_probability"], abs=1e-9
+        )
+        assert batch["will_stay"][i] == scalar["will_stay"]
+        assert batch["risk_level"][i] == scalar["risk_level"]
+        assert batch["requires_review"][i] == scalar["requires_review"]
+        assert batch["uncertainty_low"][i] == pytest.approx(scalar["uncertainty_low"])
+        assert batch["uncertainty_high"][i] == pytest.approx(scalar["uncertainty_high"])
+        assert batch["uncertainty_margin"][i] == scalar["uncertainty_margin"]
+
+
+def test_predict_retention_batch_accepts_matrix_and_dicts(predictor, candidates):
+    """
+    Проверяет, что матрица NumPy и список словарей дают тот же результат, что и DataFrame.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    expected = predictor.predict_retention_batch(candidates)
+    from_matrix = predictor.predict_retention_batch(candidates.to_numpy(dtype=float))
+    from_dicts = predictor.predict_retention_batch(candidates.to_dict(orient="records"))
+
+    for result in (from_matrix, from_dicts):
+        np.testing.assert_allclose(
+            result["retention_probability"], expected["retention_probability"]
+        )
+        assert list(result["risk_level"]) == list(expected["risk_level"])
+
+
+def test_explain_prediction_batch_matches_scalar(predictor, candidates):
+    """
+    Проверяет, что пакетные SHAP-объяснения совпадают со скалярными для каждой строки.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    batch = predictor.explain_prediction_batch(candidates)
+    records = candidates.to_dict(orient="records")
+
+    assert len(batch) == len(records)
+
+    for features, risks in zip(records, batch):
+        assert risks == predictor.explain_prediction(features)
+
+
+def test_positive_factors_batch_matches_scalar(predictor, candidates):
+    """
+    Проверяет, что векторная таблица правил даёт те же положительные факторы и
+    rule-based риски, что и скалярный путь, в том числе при неполных признаках.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    batch = predictor.explain_positive_factors_batch(candidates)
+
+    for features, factors in zip(candidates.to_dict(orient="records"), batch):
+        assert factors == predictor.explain_positive_factors(features)
+
+    partial = {"years_experience": 0, "commute_time_minutes": 130}
+    risks = predictor._rule_based_weighted_risks(partial)
+
+    assert risks[0] == "Требуется уточнение опыта"
+    assert "Очень длинная дорога до работы" in risks
+
+
+def test_feature_vector_is_drop_in_for_dict(predictor, candidates):
+    """
+    Проверяет, что FeatureVector подставляет значения по умолчанию, хэшируется
+    по значениям и даёт те же ответы предиктора, что и исходный словарь.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    features = candidates.iloc[0].to_dict()
+    partial = {k: v for k, v in features.items() if k not in FEATURE_DEFAULTS}
+
+    vector = FeatureVector.from_mapping(partial)
+
+    assert vector == {**FEATURE_DEFAULTS, **partial}
+    assert hash(vector) == hash(FeatureVector.from_mapping(dict(vector)))
+    assert FeatureVector.from_mapping(vector) is vector
+    assert vector.as_array(predictor.feature_names).shape == (len(predictor.feature_names),)
+
+    with pytest.raises(ValueError):
+        FeatureVector.from_mapping({"age": 30}).as_array()
+
+    predictor.invalidate_caches()
+    expected = predictor.score(dict(vector))
+    predictor.invalidate_caches()
+
+    assert predictor.score(vector) == expected
+    assert predictor.explain_positive_factors(vector) == predictor.explain_positive_factors(partial)
+
+
+def test_score_matches_two_pass_path(candidates):
+    """
+    Проверяет, что однопроходный score() совпадает с predict_retention + explain_prediction.
+
+    Parameters
+    ----------
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    single_pass = RetentionPredictor()
+    single_pass.load_model()
+
+    two_pass = RetentionPredictor()
+    two_pass.load_model()
+
+    for features in candidates.head(50).to_dict(orient="records"):
+        scored = single_pass.score(features)
+        prediction = two_pass.predict_retention(features)
+
+        assert scored["retention_probability"] == pytest.approx(
+            prediction["retention_probability"], abs=1e-9
+        )
+        assert scored["risk_level"] == prediction["risk_level"]
+        assert scored["requires_review"] == prediction["requires_review"]
+        assert scored["risk_factors"] == two_pass.explain_prediction(features)
+
+
+def test_prediction_grid_is_exact_on_grid_nodes(predictor, candidates):
+    """
+    Проверяет табличный режим: в узлах сетки таблица совпадает с моделью,
+    а измеренная ошибка на реальных строках доступна через error_bound.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    grid = PredictionGrid.build(predictor.model, predictor.feature_names, resolution=2)
+
+    # Подменяем непрерывные признаки представителями их корзин — это узлы сетки.
+    on_grid = candidates.copy().astype(float)
+    for name, edges in grid.edges.items():
+        axis = predictor.feature_names.index(name)
+        bucket_values = PredictionGrid._bucket_values(edges, *CONTINUOUS_FEATURE_RANGES[name])
+        assert len(bucket_values) == grid.table.shape[axis]
+        on_grid[name] = bucket_values[np.searchsorted(edges, on_grid[name], side="left")]
+
+    exact = predictor.model.predict_proba(on_grid)[:, 1]
+    np.testing.assert_allclose(grid.lookup(on_grid), exact, atol=1e-3)
+
+    error = grid.measure_error(predictor.model, candidates)
+    assert error["rows"] == len(candidates)
+    assert 0.0 <= error["mean_abs_error"] <= error["max_abs_error"] <= 1.0
+
+
+def test_lookup_mode_covers_score_and_falls_back_outside_grid(predictor, candidates):
+    """
+    Проверяет табличный режим в score/score_batch: вероятность берётся из
+    таблицы, а строки вне её области (навыков больше 10) оцениваются точной
+    моделью, а не обрезаются до края таблицы.
+
+    Parameters
+    ----------
+    predictor : RetentionPredictor
+        Загруженный предиктор.
+    candidates : pd.DataFrame
+        Выборка кандидатов из обучающего датасета.
+
+    Returns
+    -------
+    None
+    """
+    tabular = RetentionPredictor(lookup_resolution=2)
+    tabular.model, tabular.feature_names = predictor.model, predictor.feature_names
+    tabular.lookup = PredictionGrid.build(predictor.model, predictor.feature_names, resolution=2)
+
+    rows = candidates.head(20).copy()
+    rows.loc[rows.index[0], "skills_verified_count"] = 12
+    covered = tabular.lookup.covers(rows)
+    assert not covered[0] and covered[1:].all()
+
+    with pytest.raises(ValueError):
+        tabular.lookup.lookup(rows)
+
+    exact = predictor.model.predict_proba(rows)[:, 1]
+    batch = tabular.score_batch(rows)
+    assert batch["retention_probability"][0] == pytest.approx(exact[0], abs=1e-9)
+    np.testing.assert_allclose(
+        batch["retention_probability"][1:], tabular.lookup.lookup(rows.iloc[1:]), atol=1e-9
+    )
+
+    records = rows.to_dict(orient="records")
+    assert tabular.score(records[0])["retention_probability"] == pytest.approx(exact[0], abs=1e-9)
+    assert tabular.score(records[1])["retention_probability"] == pytest.approx(
+        batch["retention_probability"][1], abs=1e-9
+    )
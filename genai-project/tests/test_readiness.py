@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.readiness import ComponentRegistry, require_components
+
+
+def test_routes_wait_for_their_components():
+    """
+    Проверяет, что маршрут отвечает 503 с Retry-After, пока нужный ему
+    компонент не загружен, 200 после загрузки и 503 без Retry-After, если
+    загрузка упала; маршрут без зависимостей доступен сразу.
+
+    Returns
+    -------
+    None
+    """
+    app = FastAPI()
+    app.state.components = ComponentRegistry(("model", "broken"), retry_after_seconds=7)
+
+    @app.get("/model", dependencies=[Depends(require_components("model"))])
+    def model_route():
+        return {"ok": True}
+
+    @app.get("/broken", dependencies=[Depends(require_components("broken"))])
+    def broken_route():
+        return {"ok": True}
+
+    @app.get("/history")
+    def history_route():
+        return []
+
+    client = TestClient(app)
+
+    response = client.get("/model")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert client.get("/history").status_code == 200
+
+    asyncio.run(app.state.components.load("model", lambda: "loaded"))
+    assert client.get("/model").status_code == 200
+
+    def fail():
+        raise RuntimeError("no weights")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(app.state.components.load("broken", fail))
+
+    response = client.get("/broken")
+    assert response.status_code == 503
+    assert "Retry-After" not in response.headers
+
+    snapshot = app.state.components.snapshot()
+    assert snapshot["model"]["status"] == "ready"
+    assert snapshot["broken"]["status"] == "failed"
+    assert snapshot["broken"]["error"] == "no weights"
+    assert not app.state.components.ready()
+
+
+def test_small_extractor_fails_with_main_extractor(monkeypatch):
+    """
+    Проверяет, что при ошибке загрузки основной модели малая модель
+    помечается упавшей, а не остаётся pending (иначе readiness-проба
+    бесконечно отвечает 503 с Retry-After).
+
+    Returns
+    -------
+    None
+    """
+    import main
+    from app.core.config import settings
+
+    def broken_extractor(*args, **kwargs):
+        raise RuntimeError("no weights")
+
+    monkeypatch.setattr(settings, "EXTRACTOR_SMALL_MODEL_NAME", "small-model")
+    monkeypatch.setattr(main, "load_extractor", broken_extractor)
+    monkeypatch.setattr(main, "load_predictor", lambda *args: None)
+    monkeypatch.setattr(main, "load_transcriber", lambda *args: (None, []))
+
+    app = FastAPI()
+    app.state.components = ComponentRegistry(("predictor", "extractor", "transcriber", "extractor_small"))
+    app.state.logger = logging.getLogger("test")
+    app.state.predictor = None
+
+    async def scenario():
+        app.state.gpu_lock = asyncio.Lock()
+        await main.load_components(app)
+
+    asyncio.run(scenario())
+
+    snapshot = app.state.components.snapshot()
+    assert snapshot["extractor"]["status"] == "failed"
+    assert snapshot["extractor_small"]["status"] == "failed"
+    assert snapshot["predictor"]["status"] == "ready"
@@ -0,0 +1,166 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.ai import routing
+from app.ai.routing import ExtractionRouter, complexity_score, extraction_confidence
+from app.core.enums import ShiftPreference
+from app.core.schemas import CandidateVector
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+TEMPLATED = (EXAMPLES_DIR / "candidate4.txt").read_text(encoding="utf-8")
+INTERVIEW = (EXAMPLES_DIR / "candidate2.txt").read_text(encoding="utf-8")
+
+VECTOR = CandidateVector(
+    skills_verified_count=4,
+    years_experience=6.0,
+    commute_time_minutes=35,
+    shift_preference=ShiftPreference.ANY,
+    salary_expectation=85000,
+    has_certifications=True,
+)
+GOOD = ("Кузнецов Андрей Викторович", "Оператор ЧПУ", VECTOR)
+LARGE = ("LARGE", "LARGE", VECTOR)
+
+
+class FakeBatcher:
+    """Планировщик-заглушка: отдаёт заданный ответ (или исключение) и считает вызовы."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def submit(self, text):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def make_router(small_result, **kwargs):
+    small, large = FakeBatcher(small_result), FakeBatcher(LARGE)
+    router = ExtractionRouter(small, large, count_tokens=lambda text: len(text.split()), **kwargs)
+    return router, small, large
+
+
+def test_complexity_score_separates_templates_from_interviews():
+    """
+    Проверяет, что шаблонная анкета считается простой, а интервью — сложным.
+
+    Returns
+    -------
+    None
+    """
+    assert complexity_score(TEMPLATED) < 0.5 < complexity_score(INTERVIEW)
+    assert complexity_score("") == 0.0
+
+
+def test_extraction_confidence_checks_name_salary_and_experience():
+    """
+    Проверяет, что правдоподобие падает на треть за каждое поле, которого
+    нет в тексте (ФИО, зарплата, стаж).
+
+    Returns
+    -------
+    None
+    """
+    assert extraction_confidence(TEMPLATED, *GOOD[::2]) == 1.0
+
+    wrong_salary = VECTOR.model_copy(update={"salary_expectation": 40000})
+    assert extraction_confidence(TEMPLATED, GOOD[0], wrong_salary) == pytest.approx(2 / 3)
+    assert extraction_confidence(TEMPLATED, "Петров Иван", wrong_salary) == pytest.approx(1 / 3)
+
+
+def test_choose_respects_token_and_complexity_thresholds(monkeypatch):
+    """
+    Проверяет границы выбора модели: ровно max_small_tokens токенов и
+    сложность ровно max_small_complexity — ещё малая модель, чуть больше — большая.
+
+    Returns
+    -------
+    None
+    """
+    router, _, _ = make_router(GOOD, max_small_tokens=3, max_small_complexity=0.5)
+
+    monkeypatch.setattr(routing, "complexity_score", lambda text: 0.5)
+    assert router.choose("a b c") == ("small", "simple_input")
+    assert router.choose("a b c d") == ("large", "long_input")
+
+    monkeypatch.setattr(routing, "complexity_score", lambda text: 0.51)
+    assert router.choose("a b c") == ("large", "complex_input")
+
+
+def test_small_model_answer_is_accepted():
+    """
+    Проверяет, что правдоподобный ответ малой модели возвращается без
+    обращения к большой, а сложное резюме сразу идёт в большую.
+
+    Returns
+    -------
+    None
+    """
+    router, small, large = make_router(GOOD)
+
+    assert asyncio.run(router.submit(TEMPLATED)) == GOOD
+    assert asyncio.run(router.submit(INTERVIEW)) == LARGE
+    assert (small.calls, large.calls) == (1, 1)
+
+    stats = router.stats()
+    assert stats["models"]["small"]["accepted"] == 1
+    assert stats["models"]["large"]["accepted"] == 1
+    assert stats["routes"] == {"simple_input": 1, "complex_input": 1}
+    assert stats["escalations"] == {}
+
+
+def test_escalates_when_small_answer_fails_validation():
+    """
+    Проверяет, что ответ малой модели, не прошедший схему (ValueError),
+    повторяется на большой.
+
+    Returns
+    -------
+    None
+    """
+    router, _, large = make_router(ValueError("invalid JSON"))
+
+    assert asyncio.run(router.submit(TEMPLATED)) == LARGE
+    assert large.calls == 1
+    assert router.stats()["escalations"] == {"validation_failed": 1}
+
+
+def test_escalates_when_small_model_raises():
+    """
+    Проверяет, что ошибка малой модели (не валидации) не пробрасывается
+    клиенту, а резюме повторяется на большой.
+
+    Returns
+    -------
+    None
+    """
+    router, _, large = make_router(RuntimeError("CUDA out of memory"))
+
+    assert asyncio.run(router.submit(TEMPLATED)) == LARGE
+    assert large.calls == 1
+    assert router.stats()["escalations"] == {"small_failed": 1}
+
+
+def test_escalates_just_below_min_confidence():
+    """
+    Проверяет порог правдоподобия: ответ с уверенностью ровно min_confidence
+    принимается, а чуть ниже порога — повторяется на большой модели.
+
+    Returns
+    -------
+    None
+    """
+    invented = (GOOD[0], GOOD[1], VECTOR.model_copy(update={"salary_expectation": 40000}))
+    confidence = extraction_confidence(TEMPLATED, invented[0], invented[2])
+
+    accepted, _, _ = make_router(invented, min_confidence=confidence)
+    assert asyncio.run(accepted.submit(TEMPLATED)) == invented
+
+    escalated, _, large = make_router(invented, min_confidence=confidence + 1e-6)
+    assert asyncio.run(escalated.submit(TEMPLATED)) == LARGE
+    assert large.calls == 1
+    assert escalated.stats()["escalations"] == {"low_confidence": 1}
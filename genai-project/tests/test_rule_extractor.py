@@ -0,0 +1,157 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.ai.rule_extractor import (
+    AMBIGUOUS_CONFIDENCE,
+    LABELED_CONFIDENCE,
+    RuleExtractor,
+    parse_certifications,
+    parse_minutes,
+    parse_salary,
+    parse_shift,
+    parse_years,
+)
+from app.api.services import ai_extract
+from app.core.enums import ShiftPreference
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+
+class CountingBatcher:
+    """Планировщик-заглушка: считает вызовы LLM и отдаёт фиксированный результат."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def submit(self, text):
+        self.calls += 1
+        return "LLM", "LLM", None
+
+
+def test_rule_extractor_parses_templated_resume():
+    """
+    Проверяет разбор шаблонной анкеты: все поля вектора, ФИО и уверенность.
+
+    Returns
+    -------
+    None
+    """
+    rules = RuleExtractor(min_confidence=0.9)
+    result = rules.extract((EXAMPLES_DIR / "candidate4.txt").read_text(encoding="utf-8"))
+
+    assert result.full_name == "Кузнецов Андрей Викторович"
+    assert result.confidence >= 0.9
+    assert result.vector.years_experience == 6.0
+    assert result.vector.commute_time_minutes == 35
+    assert result.vector.shift_preference == ShiftPreference.ANY
+    assert result.vector.salary_expectation == 85000
+    assert result.vector.skills_verified_count == 4
+    assert result.vector.has_certifications is True
+    assert result.raw_summary.startswith("Оператор станков с ЧПУ")
+
+
+@pytest.mark.parametrize(
+    "parser, text, value, confidence",
+    [
+        (parse_shift, "готов только к дневным сменам", ShiftPreference.DAY_ONLY, LABELED_CONFIDENCE),
+        (parse_shift, "ночные не рассматриваю", ShiftPreference.DAY_ONLY, LABELED_CONFIDENCE),
+        (parse_shift, "без ночных", ShiftPreference.DAY_ONLY, LABELED_CONFIDENCE),
+        (parse_shift, "2/2, только день", ShiftPreference.DAY_ONLY, AMBIGUOUS_CONFIDENCE),
+        (parse_shift, "2/2, готов к ночным сменам", ShiftPreference.ANY, LABELED_CONFIDENCE),
+        (parse_shift, "готов", ShiftPreference.ANY, LABELED_CONFIDENCE),
+        (parse_shift, "5/2", ShiftPreference.DAY_ONLY, LABELED_CONFIDENCE),
+        (parse_years, "нет опыта в сварке, 3 года стропальщиком", 3.0, AMBIGUOUS_CONFIDENCE),
+        (parse_years, "без опыта", 0.0, LABELED_CONFIDENCE),
+        (parse_years, "с 2015 года", None, None),
+        (parse_years, "1998 г.", None, None),
+        (parse_years, "5 лет (2018-2023)", 5.0, AMBIGUOUS_CONFIDENCE),
+        (parse_salary, "1,5 млн", 1_500_000, AMBIGUOUS_CONFIDENCE),
+        (parse_salary, "60 тыс.", 60000, LABELED_CONFIDENCE),
+        (parse_salary, "от 70 000", 70000, AMBIGUOUS_CONFIDENCE),
+        (parse_salary, "1 500 $", 1500, AMBIGUOUS_CONFIDENCE),
+        (parse_salary, "2000 евро", 2000, AMBIGUOUS_CONFIDENCE),
+        (parse_years, "около 5 лет", 5.0, AMBIGUOUS_CONFIDENCE),
+        (parse_years, "больше 10 лет", 10.0, AMBIGUOUS_CONFIDENCE),
+        (parse_minutes, "примерно 40 минут", 40, AMBIGUOUS_CONFIDENCE),
+        (parse_certifications, "Нет", False, LABELED_CONFIDENCE),
+        (parse_certifications, "нету", False, LABELED_CONFIDENCE),
+        (parse_certifications, "нет, но готов получить", False, AMBIGUOUS_CONFIDENCE),
+        (parse_certifications, "не имею действующих", False, AMBIGUOUS_CONFIDENCE),
+        (parse_certifications, "удостоверение сварщика НАКС", True, LABELED_CONFIDENCE),
+    ],
+)
+def test_parsers_handle_negation_and_conflicting_cues(parser, text, value, confidence):
+    """
+    Проверяет разбор отрицаний, противоречивых указаний графика, смешанного
+    "нет опыта ... N лет" и сумм в миллионах: неоднозначное уходит в LLM.
+
+    Returns
+    -------
+    None
+    """
+    expected = None if value is None else (value, confidence)
+    assert parser(text) == expected
+
+
+@pytest.mark.parametrize(
+    "original, replacement",
+    [
+        ("Опыт работы: 6 лет", "Опыт работы: с 2015 года"),
+        ("Опыт работы: 6 лет", "Опыт работы: около 6 лет"),
+        ("Ожидаемая зарплата: 85 000 руб.", "Ожидаемая зарплата: 1 500 $"),
+        ("Ожидаемая зарплата: 85 000 руб.", "Ожидаемая зарплата: 1,5 млн"),
+        ("График: 2/2, готов к ночным сменам", "График: 2/2, только день"),
+        ("Сертификаты: удостоверение", "Сертификаты: нет, но готов получить удостоверение"),
+    ],
+)
+def test_fast_path_falls_back_on_ambiguous_field(original, replacement):
+    """
+    Проверяет, что шаблонная анкета с одним неоднозначным полем (дата вместо
+    стажа, оговорка, валюта, противоречивый график, отрицание) не проходит
+    быстрый путь и уходит в LLM.
+
+    Returns
+    -------
+    None
+    """
+    templated = (EXAMPLES_DIR / "candidate4.txt").read_text(encoding="utf-8")
+    assert original in templated
+
+    rules = RuleExtractor(min_confidence=0.9)
+    assert rules.try_extract(templated) is not None
+    assert rules.try_extract(templated.replace(original, replacement)) is None
+
+
+def test_ai_extract_uses_fast_path_only_for_confident_resumes(tmp_path):
+    """
+    Проверяет, что шаблонная анкета обходится без LLM, а интервью в свободной
+    форме и анкета с диапазоном зарплаты уходят в модель.
+
+    Returns
+    -------
+    None
+    """
+    templated = (EXAMPLES_DIR / "candidate4.txt").read_text(encoding="utf-8")
+    ranged = tmp_path / "ranged.txt"
+    ranged.write_text(
+        templated.replace("85 000 руб.", "80 000 - 90 000 руб."), encoding="utf-8"
+    )
+
+    batcher = CountingBatcher()
+    rules = RuleExtractor(min_confidence=0.9)
+
+    name, _, vector = asyncio.run(ai_extract(EXAMPLES_DIR / "candidate4.txt", batcher, None, rules))
+    assert name == "Кузнецов Андрей Викторович"
+    assert vector.salary_expectation == 85000
+    assert batcher.calls == 0
+
+    asyncio.run(ai_extract(EXAMPLES_DIR / "candidate1.txt", batcher, None, rules))
+    asyncio.run(ai_extract(ranged, batcher, None, rules))
+    assert batcher.calls == 2
+
+    stats = rules.stats()
+    assert stats["attempts"] == 3
+    assert stats["hits"] == 1
+    assert stats["low_confidence_fields"]["salary_expectation"] == 2
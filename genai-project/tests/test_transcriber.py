@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import app.ai.transcriber as transcriber_module
+from app.ai.transcriber import TranscriberPool, TranscriptSegment
+
+
+class FakeWhisper:
+    """Модель-заглушка: считает загрузки и одновременные вызовы."""
+
+    loads = 0
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self, model_name, **kwargs):
+        FakeWhisper.loads += 1
+        self.kwargs = kwargs
+
+    def __call__(self, file_path, **kwargs):
+        with FakeWhisper.lock:
+            FakeWhisper.active += 1
+            FakeWhisper.max_active = max(FakeWhisper.max_active, FakeWhisper.active)
+
+        def segments():
+            time.sleep(0.05)
+            with FakeWhisper.lock:
+                FakeWhisper.active -= 1
+            yield SimpleNamespace(start=0.0, end=10.0, text=f"текст {file_path}")
+
+        return segments(), SimpleNamespace(duration=10.0)
+
+
+def test_pool_loads_models_once_and_bounds_concurrency(monkeypatch):
+    """
+    Проверяет, что пул создаёт модели один раз при load(), одновременно
+    выполняет не больше pool_size транскрибаций, а остальные ждут в очереди.
+
+    Returns
+    -------
+    None
+    """
+    monkeypatch.setattr(transcriber_module, "transcriber", FakeWhisper)
+
+    pool = TranscriberPool("tiny", compute_type="int8", cpu_threads=2, pool_size=2)
+    pool.load()
+
+    async def run():
+        return await asyncio.gather(*(pool.transcribe(f"{i}.wav") for i in range(6)))
+
+    texts = asyncio.run(run())
+
+    assert texts == [f"текст {i}.wav" for i in range(6)]
+    assert FakeWhisper.loads == 2
+    assert FakeWhisper.max_active == 2
+
+    stats = pool.stats()
+    assert stats["completed"] == 6
+    assert stats["idle"] == 2
+    assert stats["max_waiting"] >= 4
+    assert stats["audio_seconds"] == 60.0
+    assert stats["compute_type"] == "int8"
+
+
+class FakePool:
+    """Пул-заглушка: отдаёт сегменты с паузой, как потоковое декодирование."""
+
+    segments = ["Меня зовут Иван Петров.", "Опыт сварщиком пять лет.", "Зарплата 60 тысяч."]
+
+    async def transcribe_stream(self, file_path, timestamps=False):
+        for index, text in enumerate(self.segments):
+            await asyncio.sleep(0.02)
+            yield TranscriptSegment(index * 5.0, index * 5.0 + 5.0, text) if timestamps else text
+
+
+class RecordingPrefill:
+    def __init__(self):
+        self.fed = []
+
+    def feed(self, text):
+        self.fed.append(text)
+
+
+def test_background_load_wakes_waiting_request(monkeypatch):
+    """
+    Проверяет фоновую загрузку: модели создаются в рабочем потоке, а в
+    очередь пула добавляются в цикле событий, поэтому запрос, пришедший
+    во время загрузки, дожидается модели.
+
+    Returns
+    -------
+    None
+    """
+    monkeypatch.setattr(transcriber_module, "transcriber", FakeWhisper)
+    pool = TranscriberPool("tiny", pool_size=1)
+
+    async def run():
+        request = asyncio.ensure_future(pool.transcribe("early.wav"))
+        await asyncio.sleep(0.01)
+        assert pool.stats()["waiting"] == 1
+
+        models = await asyncio.get_running_loop().run_in_executor(None, pool.load_models)
+        pool.add(models)
+        return await asyncio.wait_for(request, timeout=2)
+
+    assert asyncio.run(run()) == "текст early.wav"
+
+
+class PrefillBatcher:
+    """Планировщик-заглушка с экстрактором, поддерживающим префилл."""
+
+    gpu_lock = None
+
+    def __init__(self):
+        self.session = RecordingPrefill()
+        self.extractor = SimpleNamespace(prefill_session=lambda: self.session)
+        self.kwargs = None
+        self.blocking_calls = []
+
+    async def run_blocking(self, fn, *args):
+        self.blocking_calls.append(fn)
+        return fn(*args)
+
+    async def submit(self, text, **kwargs):
+        self.text, self.kwargs = text, kwargs
+        return "Иван Петров", text, None
+
+
+def test_audio_extraction_prefills_prompt_while_transcribing(tmp_path):
+    """
+    Проверяет потоковый путь аудио: промпт экстрактора предзаполняется
+    накопленным текстом во время транскрибации, а генерация получает
+    заполненный кэш и полный текст.
+
+    Returns
+    -------
+    None
+    """
+    from app.api.services import ai_extract
+
+    audio = tmp_path / "interview.wav"
+    audio.write_bytes(b"RIFF")
+    batcher = PrefillBatcher()
+
+    asyncio.run(ai_extract(audio, batcher, transcriber_pool=FakePool()))
+
+    full_text = " ".join(FakePool.segments)
+    assert batcher.text == full_text
+    assert batcher.kwargs == {"prefill": batcher.session}
+    # Копия KV-кэша создаётся в потоке экстрактора, а не в цикле событий.
+    assert batcher.blocking_calls[0] is batcher.extractor.prefill_session
+    assert batcher.session.fed[0] == FakePool.segments[0]
+    assert all(full_text.startswith(text) for text in batcher.session.fed)
+
+
+def test_bulk_transcribes_audio_in_one_batch_and_keeps_order(tmp_path, monkeypatch):
+    """
+    Проверяет массовую загрузку: все аудиофайлы уходят в один вызов
+    transcribe_batch, текстовые читаются как есть, результаты возвращаются
+    в порядке загрузки, а ошибка экстракции одного файла не мешает остальным.
+
+    Returns
+    -------
+    None
+    """
+    import app.api.services as services
+
+    paths = [tmp_path / name for name in ("a.wav", "b.txt", "c.mp3", "d.txt")]
+    for path in paths:
+        path.write_text(f"резюме {path.name}", encoding="utf-8")
+    uploads = [SimpleNamespace(filename=path.name, path=path) for path in paths]
+
+    async def fake_save(upload_file, pipeline=None):
+        return upload_file.path
+
+    async def fake_predict(vector, predictor, pipeline=None):
+        return 0.5, []
+
+    def fake_save_candidate(session, full_name, raw_summary, vector, score, risks):
+        return {"full_name": full_name}
+
+    monkeypatch.setattr(services, "save_upload_file", fake_save)
+    monkeypatch.setattr(services, "ml_predict", fake_predict)
+    monkeypatch.setattr(services, "save_candidate", fake_save_candidate)
+    monkeypatch.setattr(services, "BulkAnalyzeItem", SimpleNamespace)
+
+    class BatchPool:
+        calls = []
+
+        async def transcribe_batch(self, file_paths, batch_size=8, timestamps=False):
+            self.calls.append(list(file_paths))
+            return [[TranscriptSegment(0.0, 5.0, f"интервью {path.name}")] for path in file_paths]
+
+    class Batcher:
+        async def submit(self, text):
+            if "d.txt" in text:
+                raise ValueError("невалидный JSON")
+            return text, text, None
+
+    pool = BatchPool()
+    items = asyncio.run(services.process_candidates_bulk(uploads, None, Batcher(), None, transcriber_pool=pool))
+
+    assert pool.calls == [[paths[0], paths[2]]]
+    assert [item.filename for item in items] == ["a.wav", "b.txt", "c.mp3", "d.txt"]
+    assert [item.result and item.result["full_name"] for item in items] == [
+        "интервью a.wav",
+        "резюме b.txt",
+        "интервью c.mp3",
+        None,
+    ]
+    assert items[3].error == "невалидный JSON"